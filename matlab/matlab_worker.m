@@ -0,0 +1,71 @@
+function matlab_worker(varargin)
+  % This function is meant to be used as a stand alone executable.
+  % It stays alive, reading jobs from stdin, so that the MATLAB runtime
+  % only has to be initialized once for any number of calls to
+  % ``channelize``, ``synthesize`` and ``generate_test_vector``.
+  %
+  % Each job is a single line of tab separated fields: the name of the
+  % function to call followed by the same arguments that the stand alone
+  % executable of that function takes. Anything the function prints is
+  % passed through to stdout. Once the job is done, a single status line
+  % is written:
+  %
+  % .. code-block::
+  %
+  %   @@worker ok
+  %   @@worker error <message>
+  %
+  % The special jobs ``ping`` and ``exit`` reply ``@@worker pong`` and
+  % stop the worker, respectively. The worker also stops when stdin is
+  % closed.
+  %
+  % Example:
+  %
+  % .. code-block::
+  %
+  %   ./matlab_worker
+  %   @@worker ready
+  %   channelize	in.dump	8	8/7	config/OS_Prototype_FIR_8.mat	out.dump	./	1
+  %   ...
+  %   @@worker ok
+  %
+  % Args:
+  %   varargin (cell): Unused.
+
+  allowed = {'channelize', 'synthesize', 'generate_test_vector'};
+  status_prefix = '@@worker';
+
+  fprintf('%s ready\n', status_prefix);
+  while true
+    try
+      line = input('', 's');
+    catch
+      % stdin was closed
+      break;
+    end
+    if isempty(line)
+      continue;
+    end
+    fields = strsplit(line, sprintf('\t'));
+    job_name = fields{1};
+    job_args = fields(2:end);
+
+    if strcmp(job_name, 'exit')
+      break;
+    elseif strcmp(job_name, 'ping')
+      fprintf('%s pong\n', status_prefix);
+      continue;
+    elseif ~any(strcmp(job_name, allowed))
+      fprintf('%s error unknown job %s\n', status_prefix, job_name);
+      continue;
+    end
+
+    try
+      feval(job_name, job_args{:});
+      fprintf('%s ok\n', status_prefix);
+    catch err
+      message = strrep(err.message, newline, ' ');
+      fprintf('%s error %s\n', status_prefix, message);
+    end
+  end
+end
@@ -7,9 +7,10 @@ import matplotlib.pyplot as plt
 import numpy as np
 import scipy.signal
 
-import psr_formats
 import comparator
 
+from data_gen import dada
+
 __all__ = [
     "load_n_chop",
     "compare_dump_files"
@@ -50,29 +51,64 @@ dtype_map = {
 }
 
 
+def binary_data_size(file_path: str,
+                     dtype: np.dtype, offset: int = 0) -> int:
+    """
+    Get the number of elements of type dtype in a binary file after offset
+    bytes, without reading the file.
+    """
+    n_bytes = max(os.path.getsize(file_path) - offset, 0)
+    return n_bytes // np.dtype(dtype).itemsize
+
+
 def load_binary_data(file_path: str,
-                     dtype: np.dtype, offset: int = 0) -> np.ndarray:
-    with open(file_path, "rb") as f:
-        buffer = f.read()
-    data = np.frombuffer(buffer, dtype=dtype, offset=offset)
-    return data
+                     dtype: np.dtype,
+                     offset: int = 0,
+                     count: int = None,
+                     stride: int = 1) -> np.ndarray:
+    """
+    Memory map a binary file, starting offset bytes into the file.
+    Only the bytes covered by the requested elements are read from disk,
+    and only once they are accessed.
+
+    Args:
+        file_path (str): Path to binary file
+        dtype (np.dtype): Data type of the file
+        offset (int): Data location (in bytes) in the file
+        count (int): Number of elements to return. Defaults to all
+            elements after offset.
+        stride (int): Return every stride-th element
+    Returns:
+        np.ndarray: read only view of the file
+    """
+    n_avail = binary_data_size(file_path, dtype, offset)
+    n_avail = (n_avail + stride - 1) // stride
+    if count is None or count > n_avail:
+        count = n_avail
+    n_items = (count - 1) * stride + 1 if count > 0 else 0
+
+    if n_items == 0:
+        return np.empty(0, dtype=dtype)
+    data = np.memmap(file_path, dtype=dtype, mode="r",
+                     offset=offset, shape=(n_items,))
+    return data[::stride]
 
 
 def load_n_chop_binary(
     *file_paths: typing.Tuple[str],
     dtype: np.dtype = None,
-    offset: int = 0
+    offset: int = 0,
+    stride: int = 1
 ):
     module_logger.debug((f"load_n_chop_binary: loading data from "
                          f"{len(file_paths)} files"))
-    data = []
 
-    for file_path in file_paths:
-        data.append(
-            load_binary_data(file_path, dtype=dtype, offset=offset))
-
-    min_dat = np.amin([d.shape[0] for d in data])
-    data = [d[:min_dat] for d in data]
+    min_dat = np.amin([binary_data_size(f, dtype=dtype, offset=offset)
+                       for f in file_paths])
+    min_dat = (min_dat + stride - 1) // stride
+    data = [load_binary_data(f, dtype=dtype, offset=offset,
+                             count=min_dat, stride=stride)
+            for f in file_paths]
     return data
 
 
@@ -109,9 +145,16 @@ def load_n_chop_dada(
     chan: list = None,
     dat: list = None
 ):
+    """
+    Memory map each DADA file, and select the requested slice from each.
+    Only the selected data are read from disk.
+
+    Returns:
+        tuple: list of selected data, and list of DADA headers
+    """
     module_logger.debug((f"load_n_chop: loading data from "
                          f"{len(file_paths)} files"))
-    dada_files = [psr_formats.DADAFile(f).load_data() for f in file_paths]
+    data, headers = zip(*[dada.load_memmap(f) for f in file_paths])
     pol = _process_dim(pol)
     chan = _process_dim(chan)
     dat = _process_dim(dat)
@@ -119,10 +162,10 @@ def load_n_chop_dada(
     module_logger.debug((f"load_n_chop: comparing pol={pol},"
                          f" chan={chan}, dat={dat}"))
 
-    min_dat = np.amin([d.ndat for d in dada_files])
-    data = [d.data[:min_dat, :, :] for d in dada_files]
-    data = [d[dat, chan, pol].flatten() for d in data]
-    return data, dada_files
+    min_dat = np.amin([d.shape[0] for d in data])
+    data = [d[:min_dat, :, :] for d in data]
+    data = [d[dat, chan, pol].ravel() for d in data]
+    return data, list(headers)
 
 
 def correlate(a, b):
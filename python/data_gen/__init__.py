@@ -4,17 +4,27 @@ from .dspsr_util import (
     run_psrdiff,
     run_psrtxt,
     load_psrtxt_data,
+    parse_psrtxt,
     find_in_log,
-    BaseRunner)
+    LogIndex,
+    log_index,
+    BaseRunner,
+    RunContext)
 from .generate_test_vector import (
     generate_test_vector,
+    generate_test_vector_async,
     complex_sinusoid,
     time_domain_impulse)
-from .channelize import channelize
-from .synthesize import synthesize
+from .channelize import channelize, channelize_async
+from .synthesize import synthesize, synthesize_async
 from .pipeline import pipeline
 from .dispose import dispose
 from .config import config, config_dir
+from .cache import ProductCache
+from .catalog import TestVectorCatalog, meta_data_file_name
+from .matlab_worker import MatlabWorker
+from .tables import TableCache
+from .fft_backend import FFTBackend
 
 __version__ = "0.6.1"
 
@@ -24,15 +34,28 @@ __all__ = [
     "run_psrdiff",
     "run_psrtxt",
     "load_psrtxt_data",
+    "parse_psrtxt",
     "find_in_log",
+    "LogIndex",
+    "log_index",
     "BaseRunner",
+    "RunContext",
     "generate_test_vector",
+    "generate_test_vector_async",
     "complex_sinusoid",
     "time_domain_impulse",
     "channelize",
+    "channelize_async",
     "synthesize",
+    "synthesize_async",
     "pipeline",
     "dispose",
     "config",
-    "config_dir"
+    "config_dir",
+    "ProductCache",
+    "TestVectorCatalog",
+    "meta_data_file_name",
+    "MatlabWorker",
+    "TableCache",
+    "FFTBackend"
 ]
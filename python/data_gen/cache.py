@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import typing
+import uuid
+
+import numpy as np
+
+__all__ = [
+    "file_hash",
+    "ProductCache"
+]
+
+module_logger = logging.getLogger(__name__)
+
+_file_hash_memo = {}
+
+
+def file_hash(file_path: str, chunk_size: int = 2**24) -> str:
+    """
+    sha256 hash of a file's contents. Results are remembered for as long as
+    the file's size and modification time do not change.
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_hash_memo:
+        h = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        _file_hash_memo[memo_key] = h.hexdigest()
+    return _file_hash_memo[memo_key]
+
+
+def _to_json(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (type, np.dtype)):
+        return np.dtype(obj).name
+    raise TypeError(f"Can't hash object of type {type(obj)}")
+
+
+class ProductCache:
+    """
+    On disk cache of data products, keyed by a hash of all the parameters
+    used to create them.
+
+    Products are hard linked (or copied, if linking is not possible) between
+    the cache directory and the location where they are needed, so removing
+    a product after use does not remove it from the cache. When the total
+    size of the cache exceeds ``max_bytes``, the least recently used
+    products are evicted.
+
+    Usage:
+
+    .. code-block:: python
+
+        cache = ProductCache("data/cache", max_bytes=50*2**30)
+        generator = generate_test_vector(
+            backend="python", domain_name="time", cache=cache)
+        channelizer = channelize(backend="python", cache=cache)
+
+    Args:
+        cache_dir (str): Directory in which cached products reside
+        max_bytes (int): Maximum total size of cached products
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 50*2**30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._path_keys = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, **params) -> str:
+        """
+        Create a cache key from product parameters. Any parameter ending
+        in ``_file_path`` is replaced with the hash of the file's contents.
+        """
+        params = dict(params)
+        for name in list(params.keys()):
+            if name.endswith("_file_path") and params[name] is not None:
+                params[name] = file_hash(params[name])
+        params_str = json.dumps(params, sort_keys=True, default=_to_json)
+        return hashlib.sha256(params_str.encode("utf-8")).hexdigest()
+
+    def key_for_file(self, dada_file) -> str:
+        """
+        Get the key identifying the contents of some product, either as
+        a path or as a DADAFile like object. Products that went through
+        this cache are identified by their cache key, otherwise by the
+        hash of the file's contents, or of the data of DADAFile objects
+        that only reside in memory.
+        """
+        if hasattr(dada_file, "cache_key"):
+            return dada_file.cache_key
+        file_path = getattr(dada_file, "file_path", dada_file)
+        abs_path = os.path.abspath(file_path)
+        if abs_path in self._path_keys:
+            return self._path_keys[abs_path]
+        if not os.path.exists(file_path) and \
+                getattr(dada_file, "data", None) is not None:
+            return hashlib.sha256(
+                memoryview(np.ascontiguousarray(dada_file.data))).hexdigest()
+        return file_hash(file_path)
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.dump")
+
+    def fetch(self, key: str, file_path: str) -> bool:
+        """
+        Place the product with the given key at file_path. On a miss, any
+        existing file at file_path is removed, so that creating the product
+        does not write through a link to some other cached product.
+
+        Returns:
+            bool: Whether the product was found in the cache
+        """
+        cache_path = self._cache_path(key)
+        try:
+            os.utime(cache_path)
+            _link(cache_path, file_path)
+        except FileNotFoundError:
+            module_logger.debug(f"ProductCache.fetch: miss {key}")
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            return False
+        module_logger.debug(f"ProductCache.fetch: hit {key}")
+        self._path_keys[os.path.abspath(file_path)] = key
+        return True
+
+    def store(self, key: str, file_path: str) -> None:
+        """
+        Add the product at file_path to the cache, and then evict least
+        recently used products until the cache is no larger than
+        ``max_bytes``.
+        """
+        cache_path = self._cache_path(key)
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        _link(file_path, tmp_path)
+        os.replace(tmp_path, cache_path)
+        self._path_keys[os.path.abspath(file_path)] = key
+        module_logger.debug(f"ProductCache.store: {key} <- {file_path}")
+        self.evict()
+
+    def evict(self) -> typing.List[str]:
+        """
+        Remove least recently used products until the cache is no larger
+        than ``max_bytes``.
+
+        Returns:
+            list: keys of evicted products
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".dump"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        total_bytes = sum(entry[1] for entry in entries)
+        evicted = []
+        for mtime, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            evicted.append(os.path.splitext(os.path.basename(path))[0])
+        if len(evicted) > 0:
+            module_logger.debug(f"ProductCache.evict: evicted {evicted}")
+        return evicted
+
+
+def _link(src: str, dst: str) -> None:
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError as err:
+        if isinstance(err, FileNotFoundError):
+            raise
+        shutil.copy2(src, dst)
@@ -0,0 +1,312 @@
+import json
+import logging
+import os
+import sqlite3
+import typing
+
+from .cache import file_hash
+
+__all__ = [
+    "catalog_file_name",
+    "meta_data_file_name",
+    "test_data_arg_order",
+    "test_data_sub_dir",
+    "TestVectorCatalog"
+]
+
+module_logger = logging.getLogger(__name__)
+
+catalog_file_name = "catalog.sqlite"
+meta_data_file_name = "meta.json"
+
+test_data_arg_order = {
+    "time": ("offset", "width"),
+    "freq": ("frequency", "phase", "bin_offset")
+}
+
+_sub_dir_format_map = {
+    "time": "o-{offset:.3f}_w-{width:.3f}",
+    "freq": "f-{frequency:.3f}_b-{bin_offset:.3f}_p-{phase:.3f}"
+}
+
+_sub_dir_abbreviations = {
+    "o": "offset",
+    "w": "width",
+    "f": "frequency",
+    "b": "bin_offset",
+    "p": "phase"
+}
+
+_param_names = ("offset", "width", "frequency", "phase", "bin_offset")
+
+# meta data fields that refer to data products
+_product_fields = (
+    "input_file",
+    "channelized_file",
+    "inverted_file",
+    "dspsr_pre_dump",
+    "dspsr_ar_file"
+)
+
+_schema = """
+CREATE TABLE IF NOT EXISTS test_vectors (
+    sub_dir TEXT PRIMARY KEY,
+    domain_name TEXT NOT NULL,
+    param_key TEXT NOT NULL,
+    offset REAL,
+    width REAL,
+    frequency REAL,
+    phase REAL,
+    bin_offset REAL,
+    meta_data TEXT,
+    processed INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS test_vectors_param_key
+    ON test_vectors (domain_name, param_key);
+CREATE INDEX IF NOT EXISTS test_vectors_offset
+    ON test_vectors (domain_name, offset);
+CREATE INDEX IF NOT EXISTS test_vectors_frequency
+    ON test_vectors (domain_name, frequency);
+CREATE TABLE IF NOT EXISTS products (
+    sub_dir TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    checksum TEXT,
+    PRIMARY KEY (sub_dir, kind)
+);
+"""
+
+
+def test_data_sub_dir(domain_name: str,
+                      params: typing.Union[tuple, dict]) -> str:
+    """
+    Get the name of the sub directory in which test data created with the
+    given parameters reside.
+
+    Args:
+        domain_name (str): "time" or "freq"
+        params (tuple or dict): Dictionary or tuple of arguments for
+            test vector creation
+    """
+    if not hasattr(params, "keys"):
+        params = {
+            arg_name: params[i]
+            for i, arg_name in enumerate(test_data_arg_order[domain_name])
+        }
+    return _sub_dir_format_map[domain_name].format(**params)
+
+
+def _params_from_sub_dir(sub_dir: str) -> dict:
+    params = {}
+    for item in os.path.basename(sub_dir).split("_"):
+        key, val = item.split("-", 1)
+        params[_sub_dir_abbreviations[key]] = float(val)
+    return params
+
+
+class TestVectorCatalog:
+    """
+    Index of test vector directories and the data products in them,
+    backed by an SQLite database. Looking up test data by parameters is an
+    index lookup, rather than a walk of the directory tree.
+
+    Usage:
+
+    .. code-block:: python
+
+        catalog = TestVectorCatalog("data/test_vectors/catalog.sqlite")
+        catalog.index_directory("data/test_vectors")
+        meta_data = catalog.lookup("freq", (0.1, 0.785, 0.1))
+        rows = catalog.find("time", offset=(0.0, 0.5))
+
+    Args:
+        db_path (str): Path to the SQLite database. Created if it does not
+            exist.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, timeout=60)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(_schema)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self,
+            sub_dir: str,
+            domain_name: str,
+            params: typing.Union[tuple, dict] = None,
+            meta_data: dict = None,
+            processed: bool = None) -> None:
+        """
+        Add or update a test vector directory. If ``params`` is not given,
+        they are parsed from the name of ``sub_dir``. Data products listed
+        in ``meta_data`` are recorded along with their checksums.
+        """
+        if params is None:
+            params = _params_from_sub_dir(sub_dir)
+        elif not hasattr(params, "keys"):
+            params = dict(zip(test_data_arg_order[domain_name], params))
+        param_key = test_data_sub_dir(domain_name, params)
+        sub_dir = os.path.abspath(sub_dir)
+
+        row = {name: params.get(name) for name in _param_names}
+        row.update(
+            sub_dir=sub_dir,
+            domain_name=domain_name,
+            param_key=param_key,
+            meta_data=None if meta_data is None else json.dumps(meta_data))
+
+        with self._conn:
+            self._conn.execute(
+                ("INSERT INTO test_vectors "
+                 "(sub_dir, domain_name, param_key, offset, width, "
+                 "frequency, phase, bin_offset, meta_data) "
+                 "VALUES (:sub_dir, :domain_name, :param_key, :offset, "
+                 ":width, :frequency, :phase, :bin_offset, :meta_data) "
+                 "ON CONFLICT(sub_dir) DO UPDATE SET "
+                 "meta_data=COALESCE(excluded.meta_data, meta_data)"),
+                row)
+            if processed is not None:
+                self._conn.execute(
+                    "UPDATE test_vectors SET processed=? WHERE sub_dir=?",
+                    (int(processed), sub_dir))
+
+        if meta_data is not None:
+            for kind in _product_fields:
+                if kind in meta_data:
+                    file_path = os.path.join(sub_dir, meta_data[kind])
+                    if os.path.exists(file_path):
+                        self.add_product(sub_dir, kind, file_path)
+
+    def add_product(self,
+                    sub_dir: str,
+                    kind: str,
+                    file_path: str,
+                    checksum: str = None) -> None:
+        """
+        Record a data product, like a channelized or inverted file,
+        belonging to a test vector directory.
+        """
+        if checksum is None:
+            checksum = file_hash(file_path)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?)",
+                (os.path.abspath(sub_dir), kind,
+                 os.path.abspath(file_path), checksum))
+
+    def mark_processed(self, sub_dir: str, processed: bool = True) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE test_vectors SET processed=? WHERE sub_dir=?",
+                (int(processed), os.path.abspath(sub_dir)))
+
+    def is_processed(self, sub_dir: str) -> bool:
+        row = self._conn.execute(
+            "SELECT processed FROM test_vectors WHERE sub_dir=?",
+            (os.path.abspath(sub_dir),)).fetchone()
+        return row is not None and bool(row["processed"])
+
+    def lookup(self,
+               domain_name: str,
+               params: typing.Union[tuple, dict]) -> typing.Optional[dict]:
+        """
+        Get the meta data of the test vector created with the given
+        parameters, or None if there is no such test vector.
+        """
+        row = self._conn.execute(
+            ("SELECT * FROM test_vectors "
+             "WHERE domain_name=? AND param_key=?"),
+            (domain_name, test_data_sub_dir(domain_name, params))).fetchone()
+        if row is None:
+            return None
+        return self._row_to_dict(row)
+
+    def find(self, domain_name: str, **ranges) -> typing.List[dict]:
+        """
+        Get all test vectors whose parameters fall in the given ranges.
+        Each keyword argument is either a value, or an inclusive
+        ``(low, high)`` range.
+        """
+        clauses = ["domain_name=?"]
+        values = [domain_name]
+        for name, val in ranges.items():
+            if name not in _param_names:
+                raise RuntimeError(f"TestVectorCatalog.find: unknown {name}")
+            if hasattr(val, "__iter__"):
+                clauses.append(f"{name} BETWEEN ? AND ?")
+                values.extend(val)
+            else:
+                clauses.append(f"{name}=?")
+                values.append(val)
+        rows = self._conn.execute(
+            f"SELECT * FROM test_vectors WHERE {' AND '.join(clauses)}",
+            values).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def products(self, sub_dir: str) -> typing.Dict[str, dict]:
+        """
+        Get the data products recorded for a test vector directory.
+        """
+        rows = self._conn.execute(
+            "SELECT * FROM products WHERE sub_dir=?",
+            (os.path.abspath(sub_dir),)).fetchall()
+        return {row["kind"]: {"file_path": row["file_path"],
+                              "checksum": row["checksum"]}
+                for row in rows}
+
+    def index_directory(self, base_dir: str) -> int:
+        """
+        Add every test vector directory under base_dir to the catalog. Only
+        directories not yet in the catalog are read.
+
+        Returns:
+            int: The number of directories added
+        """
+        known = {row["sub_dir"] for row in self._conn.execute(
+            "SELECT sub_dir FROM test_vectors")}
+        n_added = 0
+        for domain_name in test_data_arg_order:
+            domain_dir = os.path.join(base_dir, domain_name)
+            if not os.path.isdir(domain_dir):
+                continue
+            for entry in os.scandir(domain_dir):
+                if not entry.is_dir() or os.path.abspath(entry.path) in known:
+                    continue
+                meta_data = None
+                meta_data_file_path = os.path.join(
+                    entry.path, meta_data_file_name)
+                if os.path.exists(meta_data_file_path):
+                    with open(meta_data_file_path, "r") as f:
+                        meta_data = json.load(f)
+                try:
+                    params = _params_from_sub_dir(entry.path)
+                except (KeyError, ValueError):
+                    module_logger.warning(
+                        (f"TestVectorCatalog.index_directory: skipping "
+                         f"{entry.path}, which is not a test vector "
+                         f"directory"))
+                    continue
+                self.add(entry.path, domain_name, params=params,
+                         meta_data=meta_data)
+                n_added += 1
+        module_logger.debug((f"TestVectorCatalog.index_directory: "
+                             f"added {n_added} directories from {base_dir}"))
+        return n_added
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> dict:
+        res = dict(row)
+        if res["meta_data"] is not None:
+            res["meta_data"] = json.loads(res["meta_data"])
+        res["processed"] = bool(res["processed"])
+        return res
@@ -1,38 +1,83 @@
 import argparse
+import asyncio
+import itertools
 import os
 import logging
 
+import numpy as np
+
 import partialize
 import pfb.format_handler
 import psr_formats
 
-from . import util
+from . import util, dada, fir_filter, polyphase
+from .cache import ProductCache
+from .matlab_worker import MatlabWorker
 from .config import config, config_dir, build_dir
 
 __all__ = [
-    "channelize"
+    "channelize",
+    "channelize_async"
 ]
 
 module_logger = logging.getLogger(__name__)
 
+lowcbf_fir_filter_file_name = "PST_filtertaps.txt"
 
-@partialize.partialize
-def channelize(input_data_file_path: str,
-               channels: int = None,
-               os_factor_str: str = None,
-               fir_filter_path: str = None,
-               output_file_name: str = None,
-               output_dir: str = "./",
-               backend: str = "matlab",
-               use_padded: bool = False):
-    """
-    channelize data contained in some single channel input data file.
-    Use either matlab or Python backends.
 
-    Sample Matlab command line call
-    ./build/channelize single_channel.dump 8 8/7 \
-        config/OS_Prototype_FIR_8.mat channelized_data.dump ./ 1
+def _channelize(input_data_file_path,
+                channels: int = None,
+                os_factor_str: str = None,
+                fir_filter_path: str = None,
+                output_file_name: str = None,
+                output_dir: str = "./",
+                backend: str = "matlab",
+                use_padded: bool = False,
+                analysis_function: str = None,
+                engine: str = None,
+                block_size: int = None,
+                save_output: bool = True,
+                cache: ProductCache = None):
     """
+    Generator that channelizes data, yielding a ``(cmd_str, log_file_path)``
+    pair for each Matlab command it needs run. See :func:`channelize`.
+    """
+
+    if analysis_function == "polyphase_analysis":
+        analysis_function = None
+
+    if analysis_function is not None:
+        if backend != "python" or \
+                analysis_function not in polyphase.analysis_function_params:
+            raise RuntimeError((f"channelize: analysis_function "
+                                f"{analysis_function} is not supported by "
+                                f"the {backend} backend"))
+        func_channels, func_os_factor_str, _ = \
+            polyphase.analysis_function_params[analysis_function]
+        if channels is None:
+            channels = func_channels
+        if os_factor_str is None:
+            os_factor_str = func_os_factor_str
+        if fir_filter_path is None:
+            fir_filter_path = os.path.join(
+                config_dir, lowcbf_fir_filter_file_name)
+        if (channels, str(os_factor_str)) != \
+                (func_channels, func_os_factor_str):
+            raise RuntimeError((f"channelize: {analysis_function} requires "
+                                f"channels={func_channels} and "
+                                f"os_factor_str={func_os_factor_str}"))
+
+    if engine is None:
+        engine = "pfb" if analysis_function is None else "numpy"
+    if backend == "python" and engine not in ["pfb", "numpy"]:
+        raise RuntimeError(f"channelize: unknown engine {engine}")
+    if analysis_function is not None and engine != "numpy":
+        raise RuntimeError((f"channelize: {analysis_function} is only "
+                            f"supported by the numpy engine"))
+    if block_size is not None and \
+            (backend != "python" or engine != "numpy"):
+        raise RuntimeError(("channelize: block_size is only supported by "
+                            "the Python backend's numpy engine"))
 
     if channels is None:
         channels = config["channels"]
@@ -47,9 +92,12 @@ def channelize(input_data_file_path: str,
 
     module_logger.debug((f"_channelize: "
                          f"input_data_file_path={input_data_file_path}, "
+                         f"save_output={save_output}, "
                          f"channels={channels}, "
                          f"os_factor_str={os_factor_str}, "
                          f"fir_filter_path={fir_filter_path}, "
+                         f"analysis_function={analysis_function}, "
+                         f"engine={engine}, "
                          f"output_file_name={output_file_name}, "
                          f"output_dir={output_dir}"))
 
@@ -61,8 +109,30 @@ def channelize(input_data_file_path: str,
     output_base, log_file_name, output_file_name = \
         util.create_output_file_names(output_file_name, output_base)
 
+    output_file_path = os.path.join(output_dir, output_file_name)
+
+    cache_key = None
+    if cache is not None and save_output:
+        cache_key = cache.key(
+            product="channelized",
+            input_key=cache.key_for_file(input_data_file_path),
+            channels=channels,
+            os_factor_str=os_factor_str,
+            fir_filter_file_path=fir_filter_path,
+            use_padded=use_padded,
+            analysis_function=analysis_function,
+            backend=backend,
+            engine=engine if backend == "python" else None)
+        if cache.fetch(cache_key, output_file_path):
+            output_data_file = psr_formats.DADAFile(output_file_path)
+            if block_size is None:
+                output_data_file.load_data()
+            output_data_file.cache_key = cache_key
+            return output_data_file
+
     if backend == "matlab":
         use_padded_int = 1 if use_padded else 0
+        input_data_file_path = util.as_file_path(input_data_file_path)
         cmd_str = (f"{os.path.join(build_dir, matlab_cmd_str)} "
                    f"{input_data_file_path} "
                    f"{channels} {os_factor_str} {fir_filter_path} "
@@ -70,27 +140,230 @@ def channelize(input_data_file_path: str,
 
         module_logger.debug(f"channelize: cmd_str={cmd_str}")
 
-        util.run_cmd(cmd_str, log_file_path=os.path.join(
-            output_dir, log_file_name))
+        yield cmd_str, os.path.join(output_dir, log_file_name)
 
-        return psr_formats.DADAFile(
-            os.path.join(output_dir, output_file_name)).load_data()
+        output_data_file = psr_formats.DADAFile(
+            output_file_path).load_data()
+
+    elif backend == "python" and engine == "numpy":
+        input_data_file = util.as_dada_file(input_data_file_path)
+        output_data_file = _channelize_python_engine(
+            input_data_file,
+            analysis_function=analysis_function,
+            channels=channels,
+            os_factor_str=os_factor_str,
+            fir_filter_path=fir_filter_path,
+            output_file_path=output_file_path,
+            block_size=block_size,
+            save_output=save_output)
 
     elif backend == "python":
-        input_data_file = psr_formats.DADAFile(input_data_file_path)
+        input_data_file = util.as_dada_file(input_data_file_path)
         channelizer = pfb.format_handler.PSRFormatChannelizer(
             use_ifft=True,
             os_factor=os_factor_str,
             nchan=channels,
             fir_filter_coeff=fir_filter_path
         )
-        output_data_file = channelizer(
-            input_data_file,
-            output_dir=output_dir,
-            output_file_name=output_file_name
-        )
+
+        def _write(pfb_output_dir):
+            return channelizer(
+                input_data_file,
+                output_dir=pfb_output_dir,
+                output_file_name=output_file_name
+            )
+
+        if save_output:
+            output_data_file = _write(output_dir)
+        else:
+            output_data_file = util.run_in_memory(_write, output_file_path)
+
+    if cache_key is not None:
+        cache.store(cache_key, output_data_file.file_path)
+        output_data_file.cache_key = cache_key
+
+    return output_data_file
+
+
+def _channelize_python_engine(input_data_file: psr_formats.DADAFile,
+                              analysis_function: str,
+                              channels: int,
+                              os_factor_str: str,
+                              fir_filter_path: str,
+                              output_file_path: str,
+                              block_size: int,
+                              save_output: bool) -> psr_formats.DADAFile:
+    """
+    Channelize with one of the analysis functions in :mod:`polyphase`,
+    writing the header fields that Matlab's ``channelize`` would. If
+    ``analysis_function`` is None, :func:`polyphase.polyphase_analysis`
+    is used with ``channels`` and ``os_factor_str``. With a
+    ``block_size``, the input is memory mapped and channelized
+    ``block_size`` samples at a time, and each channelized block is
+    appended to the output file as soon as it is computed.
+    """
+    analysis_kwargs = {}
+    if analysis_function is None:
+        analysis_function = "polyphase_analysis"
+        analysis_kwargs = dict(channels=channels, os_factor_str=os_factor_str)
+
+    input_data = dada.data_view(input_data_file)
+    header = dada.load_header_template(
+        os.path.join(config_dir, config["header_file_path"]))
+    if os.path.exists(input_data_file.file_path):
+        header.update(dada.read_header(input_data_file.file_path))
+    elif getattr(input_data_file, "header", None) is not None:
+        header.update(input_data_file.header)
+
+    fir_filter_coeff = fir_filter.read_fir_filter_coeff(fir_filter_path)
+    # channelized data are complex, even if the input is real
+    dtype = np.result_type(input_data.dtype, np.complex64)
+    if block_size is None:
+        analysis = getattr(polyphase, analysis_function)
+        output_blocks = iter([analysis(
+            input_data[:, 0, :], fir_filter_coeff,
+            **analysis_kwargs).astype(dtype, copy=False)])
+    else:
+        analysis = getattr(polyphase, f"iter_{analysis_function}")
+        input_blocks = (input_data[idx:idx + block_size, 0, :]
+                        for idx in range(0, input_data.shape[0], block_size))
+        output_blocks = (block.astype(dtype, copy=False) for block in
+                         analysis(input_blocks, fir_filter_coeff,
+                                  **analysis_kwargs))
+    # the header needs the output shape, so peek at the first block
+    first_block = next(output_blocks, None)
+    if first_block is None:
+        raise RuntimeError((f"_channelize_python_engine: "
+                            f"{input_data_file.file_path} is too short to "
+                            f"channelize with {analysis_function}"))
+    output_blocks = itertools.chain([first_block], output_blocks)
+
+    os_nu, os_de = [int(v) for v in os_factor_str.split("/")]
+    header = dada.create_header(
+        header, n_chan=first_block.shape[1], n_pol=first_block.shape[2],
+        dtype=dtype)
+    header["TSAMP"] = str(float(header["TSAMP"]) * channels * os_de / os_nu)
+    header["PFB_DC_CHAN"] = "1"
+    header["NCHAN_PFB_0"] = str(channels)
+    header["OS_FACTOR"] = os_factor_str
+    header.update(fir_filter.fir_filter_header(
+        fir_filter_coeff, os_factor_str))
+
+    output_data_file = psr_formats.DADAFile(output_file_path)
+    output_data_file.header = header
+    if save_output and block_size is not None:
+        # leave the data on disk; callers load it if they need to
+        dada.stream_data(output_file_path, header, output_blocks)
         return output_data_file
 
+    output_data = np.concatenate(list(output_blocks))
+    if save_output:
+        dada.stream_data(output_file_path, header, [output_data])
+    output_data_file.data = output_data
+    return output_data_file
+
+
+@partialize.partialize
+def channelize(input_data_file_path,
+               channels: int = None,
+               os_factor_str: str = None,
+               fir_filter_path: str = None,
+               output_file_name: str = None,
+               output_dir: str = "./",
+               backend: str = "matlab",
+               use_padded: bool = False,
+               analysis_function: str = None,
+               engine: str = None,
+               block_size: int = None,
+               save_output: bool = True,
+               cache: ProductCache = None,
+               matlab_worker: MatlabWorker = None):
+    """
+    channelize data contained in some single channel input data file.
+    Use either matlab or Python backends.
+
+    ``input_data_file_path`` can also be a ``DADAFile`` object. With the
+    Python backend its data are used directly, without reading from disk.
+    With ``save_output=False``, the Python backend returns the
+    channelized ``DADAFile`` with its data in memory, and nothing is
+    written to ``output_dir``. The same channelizer runs either way:
+    ``pfb``'s channelizer can only write its output, so it writes to a
+    temporary directory that is removed once the data are loaded.
+
+    If ``cache`` is provided, a previously channelized product with the
+    same input, channelizer parameters, FIR filter coefficients and backend
+    is reused if one exists. Newly channelized products are added to the
+    cache.
+
+    With the Python backend, ``engine`` is either "pfb", the default,
+    which uses ``pfb.format_handler.PSRFormatChannelizer``, or "numpy",
+    which uses :func:`polyphase.polyphase_analysis`, a NumPy port of
+    Matlab's ``polyphase_analysis``.
+
+    ``analysis_function`` selects one of the numpy engine's other filter
+    banks. Currently the only one is ``polyphase_analysis_lowcbf``, the
+    256 channel, 4/3 oversampled Low CBF filter bank that keeps 216
+    channels. ``channels`` and ``os_factor_str`` default to the filter
+    bank's, and ``fir_filter_path`` to ``config/PST_filtertaps.txt``.
+
+    ``block_size`` streams the numpy engine: the input file is memory
+    mapped and channelized ``block_size`` samples at a time, carrying the
+    filter history over between blocks, and each channelized block is
+    appended to the output file as it is computed. Peak memory then
+    depends on ``block_size`` rather than the length of the input, and
+    the output is identical to channelizing in one go. With
+    ``save_output=True``, the returned ``DADAFile`` has not had its data
+    loaded. ``pfb``'s channelizer can only channelize whole files.
+
+    If ``matlab_worker`` is provided, the Matlab backend runs as a job on
+    that long lived :class:`MatlabWorker`, rather than starting a new
+    executable.
+
+    Sample Matlab command line call
+    ./build/channelize single_channel.dump 8 8/7 \
+        config/OS_Prototype_FIR_8.mat channelized_data.dump ./ 1
+    """
+    return util.run_cmd_steps(_channelize(
+        input_data_file_path,
+        channels=channels,
+        os_factor_str=os_factor_str,
+        fir_filter_path=fir_filter_path,
+        output_file_name=output_file_name,
+        output_dir=output_dir,
+        backend=backend,
+        use_padded=use_padded,
+        analysis_function=analysis_function,
+        engine=engine,
+        block_size=block_size,
+        save_output=save_output,
+        cache=cache),
+        matlab_worker=matlab_worker)
+
+
+async def channelize_async(input_data_file_path,
+                           semaphore: asyncio.Semaphore = None,
+                           matlab_worker: MatlabWorker = None,
+                           **kwargs):
+    """
+    asyncio variant of :func:`channelize`. The Matlab executable runs
+    as an asyncio subprocess, its output streamed to the log file. Pass
+    the same semaphore to many calls to bound how many Matlab processes
+    are in flight. The Python backend runs in the calling thread.
+
+    Usage:
+
+    .. code-block:: python
+
+        semaphore = asyncio.Semaphore(4)
+        channelized = await asyncio.gather(*[
+            channelize_async(file_path, semaphore=semaphore,
+                             channels=8, os_factor_str="8/7")
+            for file_path in file_paths])
+    """
+    return await util.run_cmd_steps_async(
+        _channelize(input_data_file_path, **kwargs),
+        semaphore=semaphore, matlab_worker=matlab_worker)
+
 
 def create_parser():
 
@@ -103,10 +376,28 @@ def create_parser():
                         required=True)
 
     parser.add_argument("-c", "--channels",
-                        dest="channels", type=int, required=True)
+                        dest="channels", type=int, required=False)
 
     parser.add_argument("-osf", "--os_factor",
-                        dest="os_factor", type=str, required=True)
+                        dest="os_factor", type=str, required=False)
+
+    parser.add_argument("-a", "--analysis-function",
+                        dest="analysis_function", type=str, required=False,
+                        default=None,
+                        help=("Specify a Python channelizer engine, "
+                              "eg \"polyphase_analysis_lowcbf\""))
+
+    parser.add_argument("-e", "--engine",
+                        dest="engine", type=str, required=False,
+                        default=None,
+                        help=("Specify a Python backend engine, "
+                              "either \"pfb\", the default, or \"numpy\""))
+
+    parser.add_argument("-bs", "--block-size",
+                        dest="block_size", type=int, required=False,
+                        default=None,
+                        help=("Channelize this many input samples at a "
+                              "time. Requires the numpy engine"))
 
     parser.add_argument("-b", "--backend",
                         dest="backend", type=str, required=False,
@@ -137,6 +428,9 @@ if __name__ == "__main__":
             file_path,
             channels=parsed.channels,
             os_factor_str=parsed.os_factor,
+            analysis_function=parsed.analysis_function,
+            engine=parsed.engine,
+            block_size=parsed.block_size,
             output_dir=parsed.output_dir,
             output_file_name=output_file_name
         )
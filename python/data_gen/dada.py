@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import typing
+
+import numpy as np
+
+__all__ = [
+    "default_hdr_size",
+    "load_header_template",
+    "create_header",
+    "write_header",
+    "stream_data",
+    "read_header",
+    "load_memmap",
+    "data_view"
+]
+
+module_logger = logging.getLogger(__name__)
+
+default_hdr_size = 4096
+
+# (NBIT, NDIM) -> dtype of a single sample
+_dtype_lookup = {
+    (32, 2): np.complex64,
+    (64, 2): np.complex128,
+    (32, 1): np.float32,
+    (64, 1): np.float64,
+    (16, 1): np.int16,
+    (8, 1): np.int8
+}
+
+
+def load_header_template(header_template_path: str) -> dict:
+    """
+    Load a DADA header template, like ``config/default_header.json``
+    """
+    with open(header_template_path, "r") as f:
+        header = json.load(f)
+    return header
+
+
+def create_header(header: dict,
+                  n_chan: int,
+                  n_pol: int,
+                  dtype: np.dtype) -> dict:
+    """
+    Make sure that the data characteristics in the header agree with the
+    data that will be written. Mirrors Matlab's ``write_dada_header``.
+    """
+    dtype = np.dtype(dtype)
+    header = dict(header)
+    n_dim = 2 if np.issubdtype(dtype, np.complexfloating) else 1
+    header["NBIT"] = str(8*dtype.itemsize // n_dim)
+    header["NDIM"] = str(n_dim)
+    header["NCHAN"] = str(n_chan)
+    header["NPOL"] = str(n_pol)
+    if "HDR_SIZE" not in header:
+        header["HDR_SIZE"] = str(default_hdr_size)
+    return header
+
+
+def write_header(file_obj: typing.BinaryIO, header: dict) -> int:
+    """
+    Write a DADA header to an open binary file, padding with null bytes up
+    to ``HDR_SIZE``. Mirrors Matlab's ``write_header``.
+
+    Returns:
+        int: the number of bytes written
+    """
+    hdr_size = int(header.get("HDR_SIZE", default_hdr_size))
+
+    def _get_hdr_str(hdr_size):
+        lines = [f"HDR_SIZE {hdr_size}"]
+        lines.extend([f"{key} {header[key]}" for key in header
+                      if key != "HDR_SIZE"])
+        return "\n".join(lines) + "\n"
+
+    hdr_str = _get_hdr_str(hdr_size)
+    while len(hdr_str) > hdr_size:
+        hdr_size *= 2
+        hdr_str = _get_hdr_str(hdr_size)
+
+    hdr_bytes = hdr_str.encode("ascii")
+    file_obj.write(hdr_bytes + b"\0"*(hdr_size - len(hdr_bytes)))
+    return hdr_size
+
+
+def stream_data(file_path: str,
+                header: dict,
+                blocks: typing.Iterable[np.ndarray]) -> int:
+    """
+    Write a DADA header once, and then append each block of data as it
+    is produced. Only a single block is ever held in memory.
+
+    Args:
+        file_path (str): Path to output DADA file
+        header (dict): DADA header, see :func:`create_header`
+        blocks (iterable): Arrays of shape ``(ndat, nchan, npol)``
+    Returns:
+        int: the total number of time samples written
+    """
+    ndat = 0
+    with open(file_path, "wb") as f:
+        write_header(f, header)
+        for block in blocks:
+            np.ascontiguousarray(block).tofile(f)
+            ndat += block.shape[0]
+    module_logger.debug(f"stream_data: wrote {ndat} samples to {file_path}")
+    return ndat
+
+
+def read_header(file_path: str) -> dict:
+    """
+    Read the header of a DADA file. Values are left as strings.
+    Mirrors Matlab's ``read_header``.
+    """
+    def _read_header(hdr_size):
+        with open(file_path, "rb") as f:
+            hdr_bytes = f.read(hdr_size)
+        header = {}
+        hdr_str = hdr_bytes.split(b"\0", 1)[0].decode("ascii")
+        for line in hdr_str.split("\n"):
+            if line.startswith("#"):
+                continue
+            key_val = line.split()
+            if len(key_val) > 1:
+                header[key_val[0]] = key_val[1]
+        return header
+
+    hdr_size = default_hdr_size
+    header = _read_header(hdr_size)
+    while int(header.get("HDR_SIZE", hdr_size)) != hdr_size:
+        hdr_size = int(header["HDR_SIZE"])
+        header = _read_header(hdr_size)
+    return header
+
+
+def load_memmap(file_path: str,
+                mode: str = "r") -> typing.Tuple[np.ndarray, dict]:
+    """
+    Memory map the data portion of a DADA file. Nothing is read from disk
+    until the returned array, or some slice of it, is accessed.
+
+    Usage:
+
+    .. code-block:: python
+
+        data, header = load_memmap("channelized.dump")
+        # only this channel and polarization is paged in from disk
+        chan_dat = data[:, 10, 0]
+
+    Args:
+        file_path (str): Path to DADA file
+        mode (str): Passed to ``np.memmap``
+    Returns:
+        tuple: array of shape ``(ndat, nchan, npol)`` and the DADA header
+    """
+    header = read_header(file_path)
+    hdr_size = int(header["HDR_SIZE"])
+    n_chan = int(header["NCHAN"])
+    n_pol = int(header["NPOL"])
+    n_bit = int(header["NBIT"])
+    n_dim = int(header["NDIM"])
+
+    if (n_bit, n_dim) not in _dtype_lookup:
+        raise RuntimeError((f"load_memmap: unsupported NBIT={n_bit}, "
+                            f"NDIM={n_dim} in {file_path}"))
+    dtype = np.dtype(_dtype_lookup[(n_bit, n_dim)])
+
+    n_bytes = os.path.getsize(file_path) - hdr_size
+    ndat = n_bytes // (n_chan * n_pol * dtype.itemsize)
+    shape = (ndat, n_chan, n_pol)
+
+    if ndat == 0:
+        return np.empty(shape, dtype=dtype), header
+
+    data = np.memmap(file_path, dtype=dtype, mode=mode,
+                     offset=hdr_size, shape=shape)
+    return data, header
+
+
+def data_view(dada_file) -> np.ndarray:
+    """
+    Get the ``(ndat, nchan, npol)`` data of a ``DADAFile`` like object.
+    Data already in memory are returned as is, otherwise the file is
+    memory mapped.
+    """
+    if getattr(dada_file, "data", None) is not None:
+        return dada_file.data
+    return load_memmap(dada_file.file_path)[0]
@@ -1,12 +1,17 @@
 # dspsr_util.py
 import os
-import glob
+import re
 import logging
 import subprocess
 import argparse
 import shlex
+import shutil
+import tempfile
 import typing
 import functools
+import threading
+import collections
+import concurrent.futures
 
 import numpy as np
 import psr_formats
@@ -21,37 +26,48 @@ __all__ = [
     "run_psrdiff",
     "run_psrtxt",
     "load_psrtxt_data",
+    "parse_psrtxt",
     "find_in_log",
-    "BaseRunner"
+    "LogIndex",
+    "log_index",
+    "BaseRunner",
+    "RunContext"
 ]
 
 
-def _coro(func):
-    @functools.wraps(func)
-    def wrapped(*args, **kwargs):
-        res = func(*args, **kwargs)
-        next(res)
-        return res
-    return wrapped
-
-
-class Singleton(type):
+class RunContext(typing.NamedTuple):
+    """
+    Everything a single runner invocation needs to know about its input and
+    output. Each invocation creates its own, rather than storing it on the
+    runner, so that concurrent invocations can't overwrite each other's.
+    """
+    file_paths: typing.Tuple[str, ...]
+    output_dir: str
+    output_file_name_base: str
+    extra_args: str
 
-    _instances = {}
 
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(
-                *args, **kwargs)
-        return cls._instances[cls]
+class BaseRunner:
+    """
+    Base for callables that run an external program.
 
+    Runners keep no per invocation state, and runners whose programs
+    write to the working directory run each invocation in a fresh one, so
+    a single runner can be called from many threads at once.
+    :meth:`submit` runs an invocation
+    on the runner's own thread pool, and returns a
+    ``concurrent.futures.Future``, so that, for instance, one archive can
+    be post processed while the next is being created.
 
-class BaseRunner(metaclass=Singleton):
+    Args:
+        max_workers (int): Size of the thread pool used by :meth:`submit`.
+            Defaults to the number of CPUs.
+    """
 
-    def __init__(self):
-        self.output_dir = None
-        self.output_file_name_base = None
-        self.extra_args = None
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
 
     def _get_file_base(self, file_path: str, output_file_name: str = None):
         file_name = os.path.basename(file_path)
@@ -62,29 +78,64 @@ class BaseRunner(metaclass=Singleton):
 
         return file_name_base
 
-    def _reset(self):
-        self.output_dir = None
-        self.output_file_name_base = None
-        self.extra_args = None
-
     def __call__(self, *args, **kwargs):
-        res = self.call(*args, **kwargs)
-        self._reset()
-        return res
+        return self.call(*args, **kwargs)
 
     def call(self,
              file_path: str,
              output_file_name: str = None,
              output_dir: str = None,
-             extra_args: str = ""):
+             extra_args: str = "") -> RunContext:
+
+        return self._context(
+            file_path,
+            output_file_name=output_file_name,
+            output_dir=output_dir,
+            extra_args=extra_args)
+
+    def _context(self,
+                 *file_paths: str,
+                 output_file_name: str = None,
+                 output_dir: str = None,
+                 extra_args: str = "") -> RunContext:
+        """
+        Create the :class:`RunContext` of a single invocation. The output
+        directory defaults to that of the first input file.
+        """
+        if output_dir is None:
+            output_dir = os.path.dirname(file_paths[0])
 
-        self.output_file_name_base = self._get_file_base(
-            file_path, output_file_name)
+        return RunContext(
+            file_paths=file_paths,
+            output_dir=output_dir,
+            output_file_name_base=self._get_file_base(
+                file_paths[0], output_file_name),
+            extra_args=extra_args)
 
-        if output_dir is None:
-            output_dir = os.path.dirname(file_path)
-        self.output_dir = output_dir
-        self.extra_args = extra_args
+    def submit(self, *args, **kwargs) -> concurrent.futures.Future:
+        """
+        Run the same invocation as ``self(*args, **kwargs)`` on the
+        runner's thread pool.
+
+        Returns:
+            concurrent.futures.Future: resolves to the invocation's result
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.__class__.__name__)
+            return self._executor.submit(self, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shut down the thread pool used by :meth:`submit`. A later
+        :meth:`submit` starts a new one.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
 
     @staticmethod
     def chain(*callbacks):
@@ -104,6 +155,54 @@ class BaseRunner(metaclass=Singleton):
         return _chain
 
 
+def _run_isolated(cmd_str: str,
+                  log_file_path: str,
+                  work_dir_base: str,
+                  products: typing.Dict[str, str] = None) -> int:
+    """
+    Run a command in a fresh working directory under ``work_dir_base``, so
+    that concurrent runs don't clobber each other's intermediate files.
+    Any files named in ``products`` are moved out of the working directory
+    before it is removed; products the command didn't create are logged
+    and skipped.
+
+    As the command doesn't run in the caller's working directory, any of
+    its arguments that name an existing path relative to the caller's
+    working directory are made absolute first. Relative paths to files that
+    don't exist yet, like output files, are still resolved against the
+    temporary working directory, so those have to be given as absolute
+    paths.
+
+    Returns:
+        int: the command's return code
+    """
+    cmd_split = shlex.split(cmd_str)
+    cmd_split = cmd_split[:1] + [
+        os.path.abspath(arg)
+        if not arg.startswith("-") and not os.path.isabs(arg)
+        and os.path.exists(arg) else arg
+        for arg in cmd_split[1:]]
+    work_dir = tempfile.mkdtemp(prefix=".work.", dir=work_dir_base)
+    try:
+        with open(log_file_path, "w") as log_file:
+            cmd = subprocess.run(cmd_split,
+                                 stdout=log_file,
+                                 stderr=log_file,
+                                 cwd=work_dir)
+        if cmd.returncode == 0 and products is not None:
+            for file_name, dest in products.items():
+                product_path = os.path.join(work_dir, file_name)
+                if not os.path.exists(product_path):
+                    module_logger.error(
+                        (f"_run_isolated: {cmd_str} didn't create "
+                         f"{file_name}, see {log_file_path}"))
+                    continue
+                shutil.move(product_path, dest)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return cmd.returncode
+
+
 class DspsrRunner(BaseRunner):
     """
     Run `dspsr`
@@ -121,72 +220,143 @@ class DspsrRunner(BaseRunner):
             output_dir="./",
             extra_args="-IF 1:16384"
         )
+
+    Run many inversions concurrently, each ``dspsr`` process in its own
+    working directory
+
+    .. code-block:: python
+
+        results = run_dspsr.map(
+            ["a.dump", "b.dump"],
+            output_dir="./",
+            extra_args=["-IF 1:16384", "-IF 16:D"],
+            max_workers=8
+        )
+
+    Run an inversion in the background, in its own working directory,
+    while the previous archive is post processed
+
+    .. code-block:: python
+
+        future = run_dspsr.submit("b.dump", output_dir="./")
+        data, log = run_psrtxt(ar, pipe=True)
+        ar, log = future.result()
     """
-    @_coro
-    def _call(self,
-              file_path: str,
-              dspsr_bin: str = None,
-              dm: float = None,
-              period: float = None,
-              **kwargs):
+    def call(self, *args, **kwargs):
         """
-         Args:
-             file_path (str): Path to file containing data on which to operate
-             dm (float): dispersion measure
-             period (float): pulsar period
-             kwargs (dict): passed to parent class call
-         Returns:
-             tuple: tuple with archive file and log file from dspsr command
+        Args:
+            file_path (str): Path to file containing data on which to operate
+            dspsr_bin (str): dspsr executable. Defaults to ``dspsr``
+            dm (float): dispersion measure
+            period (float): pulsar period
+            output_file_name (str): Name of the archive, without extension
+            output_dir (str): Directory for the archive and log files
+            extra_args (str): Additional arguments for dspsr. dspsr runs in
+                a temporary working directory, so relative paths in
+                extra_args are made absolute if they exist, and must
+                otherwise be given as absolute paths.
+        Returns:
+            tuple: tuple with archive file and log file from dspsr command
+        """
+        return self._call_single(*args, **kwargs)
+
+    def _call_single(self,
+                     file_path: str,
+                     output_file_name: str = None,
+                     output_dir: str = None,
+                     extra_args: str = "",
+                     **kwargs):
+        """
+        Run a single ``dspsr`` process, as :meth:`call` and :meth:`map` do.
+        """
+        ctx = self._context(
+            file_path,
+            output_file_name=output_file_name,
+            output_dir=output_dir,
+            extra_args=extra_args)
+        return self._run(ctx, **kwargs)
+
+    def _run(self,
+             ctx: RunContext,
+             dspsr_bin: str = None,
+             dm: float = None,
+             period: float = None,
+             products: typing.Dict[str, str] = None):
+        """
+        Run ``dspsr`` as described by ``ctx``, in its own working directory,
+        without touching any runner state.
         """
-        super(DspsrRunner, self).call(file_path, **kwargs)
-
-        yield
-
         if dm is None:
             dm = config["dm"]
         if period is None:
             period = config["period"]
         if dspsr_bin is None:
             dspsr_bin = "dspsr"
+        output_dir = os.path.abspath(ctx.output_dir)
 
-        output_ar = os.path.join(self.output_dir, self.output_file_name_base)
+        output_ar = os.path.join(output_dir, ctx.output_file_name_base)
         output_log = os.path.join(
-            self.output_dir, f"{self.output_file_name_base}.log")
-
-        module_logger.debug(f"run_dspsr: output archive: {output_ar}")
-        module_logger.debug(f"run_dspsr: output log: {output_log}")
-        dspsr_cmd_str = (f"{dspsr_bin} -c {period} -D {dm} {file_path} "
-                         f"-O {output_ar} {self.extra_args}")
-
+            output_dir, f"{ctx.output_file_name_base}.log")
+        dspsr_cmd_str = (f"{dspsr_bin} -c {period} -D {dm} "
+                         f"{os.path.abspath(ctx.file_paths[0])} "
+                         f"-O {output_ar} {ctx.extra_args}")
         module_logger.debug(f"run_dspsr: dspsr command: {dspsr_cmd_str}")
 
-        try:
-            with open(output_log, "w") as log_file:
-                dspsr_cmd = subprocess.run(shlex.split(dspsr_cmd_str),
-                                           stdout=log_file,
-                                           stderr=log_file)
-            if dspsr_cmd.returncode == 0:
-                after_cmd_str = (yield)
-                if after_cmd_str is not None:
-                    subprocess.run(shlex.split(after_cmd_str))
-        except subprocess.CalledProcessError as err:
-            module_logger.error(
-                f"Couldn't execute command {dspsr_cmd_str}: {err}")
-        finally:
-            dat_files = glob.glob("*.dat")
-            if len(dat_files) > 0:
-                for dat_file in dat_files:
-                    os.remove(dat_file)
-        ar = f"{output_ar}.ar"
-        # if not os.path.exists(os.path.join(self.output_dir, ar)):
-        #     ar = f"{output_ar}_0002.ar"
-
-        yield (ar, output_log)
-
-    def call(self, *args, **kwargs):
-        coro = self._call(*args, **kwargs)
-        next(coro)
-        return coro.send(None)
+        returncode = _run_isolated(
+            dspsr_cmd_str, output_log, output_dir, products=products)
+        if returncode != 0:
+            module_logger.error((f"run_dspsr: {dspsr_cmd_str} exited with "
+                                 f"status {returncode}, see {output_log}"))
+        return f"{output_ar}.ar", output_log
+
+    def map(self,
+            file_paths: typing.List[str],
+            output_file_name: typing.Union[str, typing.List[str]] = None,
+            extra_args: typing.Union[str, typing.List[str]] = "",
+            max_workers: int = None,
+            **kwargs) -> list:
+        """
+        Run ``dspsr`` on each of file_paths concurrently. Each process runs
+        in its own temporary working directory, so intermediate files
+        from different runs can't collide.
+
+        Args:
+            file_paths (list): Paths to files on which to operate
+            output_file_name (str or list): Either one output name per
+                file, or None to derive names from the input files.
+            extra_args (str or list): Either one string of arguments for
+                all files, or one string per file.
+            max_workers (int): Maximum number of concurrent ``dspsr``
+                processes. Defaults to the number of CPUs.
+            kwargs (dict): passed to each individual run
+        Returns:
+            list: results of each run, in the same order as file_paths
+        """
+        n_files = len(file_paths)
+        if output_file_name is None or hasattr(output_file_name, "format"):
+            output_file_name = [output_file_name] * n_files
+        if hasattr(extra_args, "format"):
+            extra_args = [extra_args] * n_files
+        if max_workers is None:
+            max_workers = os.cpu_count()
+
+        results = [None] * n_files
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self._call_single, file_paths[idx],
+                    output_file_name=output_file_name[idx],
+                    extra_args=extra_args[idx],
+                    **kwargs): idx
+                for idx in range(n_files)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                idx = futures[future]
+                results[idx] = future.result()
+                module_logger.debug((f"{self.__class__.__name__}.map: "
+                                     f"finished {file_paths[idx]}"))
+        return results
 
 
 class DspsrDumpRunner(DspsrRunner):
@@ -212,91 +382,169 @@ class DspsrDumpRunner(DspsrRunner):
         file_path (str): Path to file containing data on which to operate
         kwargs (dict): passed to _run_dspsr
     Returns:
-        psr_formats.DADAFile: DADAFile object corresponding to dump file
+        tuple: DADAFile object corresponding to dump file, or None if
+            dspsr failed before creating it, and the archive and log files
     """
-    def call(self, *args,
-             dump_stage: str = "Detection",
-             extra_args: str = "",
-             **kwargs):
+    def _call_single(self, file_path: str,
+                     dump_stage: str = "Detection",
+                     extra_args: str = "",
+                     output_file_name: str = None,
+                     output_dir: str = None,
+                     **kwargs):
 
         dump_stage = dump_stage.capitalize()
-        extra_args += f" -dump {dump_stage}"
-        coro = self._call(*args, extra_args=extra_args, **kwargs)
-        next(coro)
+        ctx = self._context(
+            file_path,
+            output_file_name=output_file_name,
+            output_dir=output_dir,
+            extra_args=f"{extra_args} -dump {dump_stage}")
         output_dump = os.path.join(
-            self.output_dir,
-            f"pre_{dump_stage}.{self.output_file_name_base}.dump")
+            ctx.output_dir,
+            f"pre_{dump_stage}.{ctx.output_file_name_base}.dump")
 
-        module_logger.debug((f"run_dspsr_with_dump: "
-                             f"dumping after {dump_stage} operation"))
+        ar, log = self._run(
+            ctx,
+            products={f"pre_{dump_stage}.dump": output_dump},
+            **kwargs)
+        return self._load_dump(output_dump, log), ar, log
 
-        after_cmd_str = f"mv pre_{dump_stage}.dump {output_dump}"
-
-        ar, log = coro.send(after_cmd_str)
-        return psr_formats.DADAFile(output_dump).load_data(), ar, log
+    @staticmethod
+    def _load_dump(output_dump: str, log: str):
+        """
+        Load the dump file, if dspsr got as far as creating it.
+        """
+        if not os.path.exists(output_dump):
+            module_logger.error(
+                (f"run_dspsr_with_dump: {output_dump} was not created, "
+                 f"see {log}"))
+            return None
+        return psr_formats.DADAFile(output_dump).load_data()
 
 
 class PsrdiffRunner(BaseRunner):
+    """
+    Run `psrdiff`
+
+    ``psrdiff`` always writes ``psrdiff.out`` in the working directory, so
+    each invocation runs in its own working directory, from which
+    ``psrdiff.out`` is moved to the output file.
+    """
 
     psrdiff_default_out = "psrdiff.out"
 
+    def _context(self,
+                 *file_paths: str,
+                 output_file_name: str = None,
+                 output_dir: str = None,
+                 extra_args: str = "") -> RunContext:
+        """
+        Outputs are named after all of the input files, unless
+        output_file_name is given.
+        """
+        if output_file_name is None:
+            bases = [self._get_file_base(f) for f in file_paths]
+            output_file_name = "-".join(bases) + ".out"
+        return super(PsrdiffRunner, self)._context(
+            *file_paths,
+            output_file_name=output_file_name,
+            output_dir=output_dir,
+            extra_args=extra_args)
+
     def call(self, *file_paths,
              output_file_name: str = None,
              output_dir: str = "./"):
+        """
+        Run ``psrdiff`` in its own working directory.
+        """
+        ctx = self._context(
+            *file_paths,
+            output_file_name=output_file_name,
+            output_dir=os.path.abspath(output_dir))
+        if output_file_name is None:
+            output_file_name = f"{ctx.output_file_name_base}.out"
+        output_file_path = os.path.join(ctx.output_dir, output_file_name)
+        log_file_path = os.path.join(
+            ctx.output_dir, f"{ctx.output_file_name_base}.log")
+        psrdiff_cmd_str = "psrdiff " + " ".join(
+            os.path.abspath(f) for f in ctx.file_paths)
+        module_logger.debug(
+            f"PsrdiffRunner.call: psrdiff command={psrdiff_cmd_str}")
+        returncode = _run_isolated(
+            psrdiff_cmd_str, log_file_path, ctx.output_dir,
+            products={self.psrdiff_default_out: output_file_path})
+        if returncode != 0:
+            module_logger.error(
+                (f"PsrdiffRunner.call: {psrdiff_cmd_str} exited with "
+                 f"status {returncode}, see {log_file_path}"))
+        return output_file_path, log_file_path
 
-        module_logger.debug(f"PsrdiffRunner.call: file_paths={file_paths}")
 
-        if output_file_name is None:
-            bases = [self._get_file_base(f) for f in file_paths]
-            output_file_name_base = "-".join(bases)
-            output_file_name = f"{output_file_name_base}.out"
-        else:
-            output_file_name_base = os.path.splitext(
-                output_file_name)[0]
+# number of bytes of psrtxt output parsed at a time
+psrtxt_chunk_size = 2**24
 
-        self.output_file_name_base = output_file_name_base
 
-        log_file_name = f"{output_file_name_base}.log"
+class PsrtxtRunner(BaseRunner):
+    """
+    Run `psrtxt`
 
-        log_file_path = os.path.join(output_dir, log_file_name)
-        output_file_path = os.path.join(output_dir, output_file_name)
-        psrdiff_cmd_str = f"psrdiff {' '.join(file_paths)}"
-        module_logger.debug(f"PsrdiffRunner.call: psrdiff command={psrdiff_cmd_str}")
-        after_cmd_str = f"mv {self.psrdiff_default_out} {output_file_path}"
-        module_logger.debug(f"PsrdiffRunner.call: mv command={after_cmd_str}")
+    Usage:
 
-        try:
-            with open(log_file_path, "w") as log_file:
-                psrdiff_cmd = subprocess.run(shlex.split(psrdiff_cmd_str),
-                                             stdout=log_file,
-                                             stderr=log_file)
-            if psrdiff_cmd.returncode == 0:
-                if after_cmd_str is not None:
-                    subprocess.run(shlex.split(after_cmd_str))
-        except subprocess.CalledProcessError as err:
-            module_logger.error(
-                f"Couldn't execute command {psrdiff_cmd_str}: {err}")
+    Write the text dump to a ``.txt`` file, and load it
 
-        return output_file_path, log_file_path
+    .. code-block:: python
 
+        txt_file_path, log = run_psrtxt("simulated_pulsar.ar")
+        data = load_psrtxt_data(txt_file_path)
 
-class PsrtxtRunner(BaseRunner):
+    Parse ``psrtxt``'s output as it is written, without the intermediate
+    ``.txt`` file
+
+    .. code-block:: python
+
+        data, log = run_psrtxt("simulated_pulsar.ar", pipe=True)
+    """
 
     def call(self, file_path,
              output_file_name: str = None,
-             output_dir: str = None):
-        super(PsrtxtRunner, self).call(file_path,
-                                       output_file_name=output_file_name,
-                                       output_dir=output_dir)
+             output_dir: str = None,
+             pipe: bool = False):
+        """
+        Args:
+            file_path (str): Path to archive
+            output_file_name (str): Name of the ``.txt`` file
+            output_dir (str): Directory for the ``.txt`` and log files
+            pipe (bool): Parse ``psrtxt``'s standard output directly with
+                :func:`parse_psrtxt`, rather than writing a ``.txt`` file
+        Returns:
+            tuple: the ``.txt`` file path, or, with ``pipe=True``, the
+                parsed data, and the log file path
+        """
+        ctx = self._context(
+            file_path,
+            output_file_name=output_file_name,
+            output_dir=output_dir)
 
         if output_file_name is None:
-            output_file_name = f"{self.output_file_name_base}.txt"
-
-        output_file_path = os.path.join(self.output_dir, output_file_name)
-        log_file_name = f"{self.output_file_name_base}.log"
-        log_file_path = os.path.join(self.output_dir, log_file_name)
-
-        psrtxt_cmd_str = f"psrtxt {file_path}"
+            output_file_name = f"{ctx.output_file_name_base}.txt"
+
+        output_file_path = os.path.join(ctx.output_dir, output_file_name)
+        log_file_name = f"{ctx.output_file_name_base}.log"
+        log_file_path = os.path.join(ctx.output_dir, log_file_name)
+
+        psrtxt_cmd_str = f"psrtxt {ctx.file_paths[0]}"
+
+        if pipe:
+            with open(log_file_path, "w") as log_file, subprocess.Popen(
+                shlex.split(psrtxt_cmd_str),
+                stdout=subprocess.PIPE,
+                stderr=log_file
+            ) as psrtxt_cmd:
+                data = parse_psrtxt(psrtxt_cmd.stdout)
+            if psrtxt_cmd.returncode != 0:
+                module_logger.error(
+                    (f"PsrtxtRunner.call: {psrtxt_cmd_str} exited with "
+                     f"status {psrtxt_cmd.returncode}, see {log_file_path}"))
+            return data, log_file_path
 
         try:
             with open(log_file_path, "w") as log_file, \
@@ -314,22 +562,173 @@ class PsrtxtRunner(BaseRunner):
         return output_file_path, log_file_path
 
 
-def load_psrtxt_data(psrtxt_file_path: str):
+def load_psrtxt_data(psrtxt_file_path: str,
+                     chunk_size: int = psrtxt_chunk_size) -> np.ndarray:
+    """
+    Load in data from a `psrtxt` dump file. See :func:`parse_psrtxt`.
+    """
+    with open(psrtxt_file_path, "rb") as f:
+        return parse_psrtxt(f, chunk_size=chunk_size)
+
+
+def parse_psrtxt(stream: typing.BinaryIO,
+                 chunk_size: int = psrtxt_chunk_size) -> np.ndarray:
+    """
+    Parse `psrtxt` output, one row of space separated values per line,
+    from a binary file object, or from the standard output of a running
+    ``psrtxt`` process.
+
+    The output is read ``chunk_size`` bytes at a time, and all the complete
+    lines in each chunk are parsed with a single call to
+    ``np.fromstring``, rather than one ``float`` call per value.
+
+    Returns:
+        np.ndarray: ``(n_columns, n_lines)`` array; each column of the
+            text is a row
+    """
+    n_col = None
+    blocks = []
+    remainder = b""
+    for chunk in iter(functools.partial(stream.read, chunk_size), b""):
+        chunk = remainder + chunk
+        end = chunk.rfind(b"\n") + 1
+        remainder = chunk[end:]
+        n_col = _parse_psrtxt_block(chunk[:end], n_col, blocks)
+    _parse_psrtxt_block(remainder, n_col, blocks)
+
+    if len(blocks) == 0:
+        return np.zeros((0, 0))
+    return np.concatenate(blocks).transpose()
+
+
+def _parse_psrtxt_block(block: bytes,
+                        n_col: typing.Optional[int],
+                        blocks: typing.List[np.ndarray]) -> int:
+    """
+    Parse the complete lines in ``block``, appending them to ``blocks``.
+    The number of values per line is taken from the first line that has
+    any, and returned.
+    """
+    if block.strip() == b"":
+        return n_col
+    if n_col is None:
+        first_line = next(
+            line for line in block.splitlines() if line.strip() != b"")
+        n_col = len(first_line.split())
+    values = np.fromstring(block.decode("ascii"), dtype=np.float64, sep=" ")
+    if values.shape[0] % n_col != 0:
+        raise ValueError(
+            (f"parse_psrtxt: {values.shape[0]} values can't be split "
+             f"into lines of {n_col} values"))
+    blocks.append(values.reshape((-1, n_col)))
+    return n_col
+
+
+class LogIndex:
     """
-    Load in data from a `psrtxt` dump file
+    Every ``key=value`` pair in a log file, found with a single pass over
+    the log, rather than with a scan of the whole log for each key.
+
+    All occurrences of each key are kept, in the order they appear in the
+    log. A value runs from ``sep`` up to the next ``delimiter``, or the end
+    of the line.
+
+    Usage:
+
+    .. code-block:: python
+
+        index = log_index("inverted.log")
+        output_fft_length = int(index["output_fft_length"])
+        nchans = index.values("nchan")
+
+    Args:
+        log_file_path (str): Path to log file
+        sep (str): Separator between keys and values
+        delimiter (str): Separator between successive pairs
     """
-    with open(psrtxt_file_path, "r") as f:
-        txt_data = f.read()
 
-    data = []
-    for line in txt_data.split("\n"):
-        if line == "":
-            continue
-        data.append([float(v) for v in line.split(" ")])
+    def __init__(self,
+                 log_file_path: str,
+                 sep: str = "=",
+                 delimiter: str = " "):
+        self.log_file_path = log_file_path
+        with open(log_file_path, "r") as f:
+            txt = f.read()
+        pattern = re.compile(
+            (f"([^\\s{re.escape(sep)}]+){re.escape(sep)}"
+             f"([^{re.escape(delimiter)}\\n]*)"))
+        self._values = {}
+        for match in pattern.finditer(txt):
+            self._values.setdefault(match.group(1), []).append(
+                match.group(2))
+        self._resolved = {}
+
+    def _key(self, keyword: str) -> typing.Optional[str]:
+        """
+        ``keyword`` itself, if it is a key, or otherwise the first key that
+        ends with it, like ``find_in_log`` used to find keywords anywhere
+        in the log.
+        """
+        if keyword in self._values:
+            return keyword
+        if keyword not in self._resolved:
+            self._resolved[keyword] = next(
+                (key for key in self._values if key.endswith(keyword)),
+                None)
+        return self._resolved[keyword]
+
+    def __contains__(self, keyword: str) -> bool:
+        return self._key(keyword) is not None
+
+    def __getitem__(self, keyword: str) -> str:
+        """
+        The first value of ``keyword``.
+        """
+        return self.values(keyword)[0]
+
+    def values(self, keyword: str) -> typing.List[str]:
+        """
+        Every value of ``keyword``, in the order they appear in the log.
+        """
+        key = self._key(keyword)
+        if key is None:
+            raise KeyError(
+                f"LogIndex: couldn't find {keyword} in {self.log_file_path}")
+        return self._values[key]
+
+    def keys(self) -> typing.List[str]:
+        return list(self._values.keys())
+
+
+# (path, size, mtime, sep, delimiter) -> LogIndex
+_log_index_memo = collections.OrderedDict()
+_log_index_memo_lock = threading.Lock()
+log_index_memo_size = 64
+
+
+def log_index(log_file_path: str,
+              sep: str = "=",
+              delimiter: str = " ") -> LogIndex:
+    """
+    Get the :class:`LogIndex` of a log file. Logs are only indexed once
+    for as long as their size and modification time do not change; the
+    ``log_index_memo_size`` most recently used indexes are kept.
+    """
+    stat = os.stat(log_file_path)
+    memo_key = (os.path.abspath(log_file_path), stat.st_size,
+                stat.st_mtime_ns, sep, delimiter)
+    with _log_index_memo_lock:
+        if memo_key in _log_index_memo:
+            _log_index_memo.move_to_end(memo_key)
+            return _log_index_memo[memo_key]
 
-    data = np.array([np.array(a) for a in data]).transpose()
+    index = LogIndex(log_file_path, sep=sep, delimiter=delimiter)
 
-    return data
+    with _log_index_memo_lock:
+        _log_index_memo[memo_key] = index
+        while len(_log_index_memo) > log_index_memo_size:
+            _log_index_memo.popitem(last=False)
+    return index
 
 
 def find_in_log(log_file_path: str,
@@ -337,23 +736,17 @@ def find_in_log(log_file_path: str,
                 sep: str = "=",
                 delimiter: str = " "):
     """
-    Get a value from a log file.
+    Get a value from a log file. The log is indexed once, with
+    :func:`log_index`, however many keys are looked up, and however many
+    times.
     """
-    with open(log_file_path, "r") as f:
-        txt = f.read()
-
-    def _get_val_after_keyword(txt: str, keyword: str):
-        if keyword not in txt:
-            raise RuntimeError(f"find_in_log: couldn't find {keyword}")
-        key_idx = txt.find(keyword)
-        sep_idx = txt.find(sep, key_idx)
-        delim_idx = txt.find(delimiter, sep_idx)
-        val = txt[sep_idx+1:delim_idx]
-        return val
+    index = log_index(log_file_path, sep=sep, delimiter=delimiter)
 
     vals = []
     for key in keywords:
-        vals.append(_get_val_after_keyword(txt, key))
+        if key not in index:
+            raise RuntimeError(f"find_in_log: couldn't find {key}")
+        vals.append(index[key])
 
     if len(keywords) == 1:
         return vals[0]
@@ -0,0 +1,171 @@
+import logging
+import os
+import threading
+import typing
+
+import numpy as np
+
+try:
+    import pyfftw
+    import pyfftw.builders
+except ImportError:
+    pyfftw = None
+
+try:
+    # scipy >= 1.4
+    import scipy.fft
+except ImportError:
+    scipy = None
+
+__all__ = [
+    "FFTBackend"
+]
+
+module_logger = logging.getLogger(__name__)
+
+
+class FFTBackend:
+    """
+    Batched forward FFTs for comparing arrays in the frequency domain.
+
+    All the arrays being compared are copied into the rows of a single 2-D
+    buffer, which is reused from one call to the next, and transformed
+    with a single FFT call, rather than one ``np.fft.fft`` per array. If
+    every array is real, the batch is transformed with a real FFT, which
+    does half the work, and the full spectra are filled in from their
+    Hermitian symmetry.
+
+    FFT plans are reused between calls. If pyFFTW is installed, a
+    ``pyfftw.FFTW`` object is planned once for each batch shape and type,
+    and FFTW's wisdom is kept for the life of the process. Otherwise
+    ``scipy.fft`` is used, which caches its own plans, and runs with
+    ``workers`` threads, or, with older versions of scipy, ``np.fft``,
+    which ignores ``workers``.
+
+    Usage:
+
+    .. code-block:: python
+
+        fft_backend = FFTBackend(workers=4)
+        spectra = fft_backend.spectra(input_dat, inverted_dat,
+                                      domain=[0, fft_size])
+        metrics = purity_metrics(spectra)
+
+    Args:
+        workers (int): Number of threads used by each FFT. Negative
+            values count back from the number of CPUs, as in ``scipy.fft``.
+        use_pyfftw (bool): Use pyFFTW if it is installed.
+        planner_effort (str): pyFFTW planner effort
+    """
+
+    def __init__(self,
+                 workers: int = None,
+                 use_pyfftw: bool = True,
+                 planner_effort: str = "FFTW_MEASURE"):
+        self.workers = workers
+        self.planner_effort = planner_effort
+        self.name = "numpy"
+        if use_pyfftw and pyfftw is not None:
+            self.name = "pyfftw"
+        elif scipy is not None:
+            self.name = "scipy"
+        self._plans = {}
+        self._buffers = {}
+        self._lock = threading.Lock()
+        module_logger.debug(
+            (f"FFTBackend: using {self.name} with workers={workers}"))
+
+    @property
+    def threads(self) -> int:
+        """
+        ``workers`` as a number of threads.
+        """
+        if self.workers is None:
+            return 1
+        if self.workers < 0:
+            return max(os.cpu_count() + 1 + self.workers, 1)
+        return self.workers
+
+    def spectra(self,
+                *arrays: np.ndarray,
+                domain: typing.Sequence[int] = None) -> np.ndarray:
+        """
+        Compute the spectra of ``arrays``, a row each, with a single
+        batched FFT. Like ``comparator.FrequencyDomainComparator``, only
+        the samples in ``domain``, a ``[start, stop]`` pair, are
+        transformed.
+
+        Returns:
+            np.ndarray: ``(len(arrays), n)`` complex spectra. They are only
+                valid until the next call with the same shape, as the
+                output buffer is reused.
+        """
+        if domain is not None:
+            arrays = [a[domain[0]:domain[1]] for a in arrays]
+        lengths = set(a.shape[0] for a in arrays)
+        if len(lengths) != 1:
+            raise ValueError(
+                (f"FFTBackend.spectra: arrays have different lengths "
+                 f"{sorted(lengths)}"))
+        n = lengths.pop()
+        is_real = not any(np.iscomplexobj(a) for a in arrays)
+        # double precision, as np.fft.fft used to give the comparator
+        dtype = np.result_type(np.float64, *[a.dtype for a in arrays])
+        shape = (len(arrays), n)
+        with self._lock:
+            batch = self._buffer("batch", shape, dtype)
+            for i, a in enumerate(arrays):
+                batch[i] = a
+            if is_real:
+                return self._hermitian(self._rfft(batch), n)
+            return self._fft(batch)
+
+    def _buffer(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        key = (name, shape, np.dtype(dtype))
+        if key not in self._buffers:
+            if self.name == "pyfftw":
+                self._buffers[key] = pyfftw.empty_aligned(shape, dtype=dtype)
+            else:
+                self._buffers[key] = np.empty(shape, dtype=dtype)
+        return self._buffers[key]
+
+    def _plan(self, builder: str, batch: np.ndarray):
+        key = (builder, batch.shape, batch.dtype)
+        if key not in self._plans:
+            module_logger.debug(f"FFTBackend._plan: planning {key}")
+            # planning overwrites the batch buffer, which the plan uses as
+            # its input array
+            saved = batch.copy()
+            self._plans[key] = getattr(pyfftw.builders, builder)(
+                batch, axis=-1, threads=self.threads,
+                planner_effort=self.planner_effort,
+                avoid_copy=True)
+            batch[:] = saved
+        return self._plans[key]
+
+    def _fft(self, batch: np.ndarray) -> np.ndarray:
+        if self.name == "pyfftw":
+            return self._plan("fft", batch)(batch)
+        if self.name == "scipy":
+            # the batch is our own buffer, so it can be overwritten
+            return scipy.fft.fft(batch, axis=-1, overwrite_x=True,
+                                 workers=self.workers)
+        return np.fft.fft(batch, axis=-1)
+
+    def _rfft(self, batch: np.ndarray) -> np.ndarray:
+        if self.name == "pyfftw":
+            return self._plan("rfft", batch)(batch)
+        if self.name == "scipy":
+            return scipy.fft.rfft(batch, axis=-1, workers=self.workers)
+        return np.fft.rfft(batch, axis=-1)
+
+    def _hermitian(self, half: np.ndarray, n: int) -> np.ndarray:
+        """
+        Fill in the full spectra of real arrays from the non negative
+        frequencies, using ``X[n - k] = conj(X[k])``.
+        """
+        full = self._buffer("hermitian", (half.shape[0], n), half.dtype)
+        n_half = half.shape[-1]
+        full[:, :n_half] = half
+        np.conjugate(half[:, n - n_half:0:-1], out=full[:, n_half:])
+        return full
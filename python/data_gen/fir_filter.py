@@ -0,0 +1,124 @@
+import os
+import logging
+import uuid
+
+import numpy as np
+import scipy.io
+
+from .cache import file_hash
+from .config import build_dir
+
+__all__ = [
+    "read_fir_filter_coeff",
+    "fir_filter_header"
+]
+
+module_logger = logging.getLogger(__name__)
+
+default_cache_dir = os.path.join(build_dir, "fir_filter_cache")
+
+# (path, size, mtime) -> coefficients
+_coeff_memo = {}
+
+
+def read_fir_filter_coeff(file_path: str,
+                          cache_dir: str = None,
+                          use_cache: bool = True) -> np.ndarray:
+    """
+    Read in FIR filter coefficients. Mirrors Matlab's
+    ``read_fir_filter_coeff``: ``.mat`` files must have either a ``hQ`` or
+    ``h`` field, ``.npy`` files are loaded as is, while any other file is
+    read as whitespace separated text, like ``config/PST_filtertaps.txt``.
+
+    Each coefficient file is only parsed once. The parsed coefficients are
+    saved in ``cache_dir`` as a ``.npy`` file named after the hash of the
+    coefficient file's contents, and later reads, in this or any other
+    process, memory map that instead. Within a process, coefficients are
+    also remembered for as long as the file's size and modification time
+    do not change.
+
+    Only readers that go through this function benefit, which currently
+    means the channelize numpy engine. ``pfb``'s channelizer and the
+    Matlab executables are given the coefficient file's path, and still
+    parse it themselves on every call.
+
+    Args:
+        file_path (str): Path to coefficient file
+        cache_dir (str): Directory of parsed coefficients. Defaults to
+            ``build/fir_filter_cache``.
+        use_cache (bool): Whether to use or add to the cache at all
+    Returns:
+        np.ndarray: read only 1-D array of filter coefficients
+    """
+    if not use_cache:
+        return _parse_fir_filter_coeff(file_path)
+
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _coeff_memo:
+        return _coeff_memo[memo_key]
+
+    if os.path.splitext(file_path)[1] == ".npy":
+        coeff = _load_npy(file_path)
+    else:
+        if cache_dir is None:
+            cache_dir = default_cache_dir
+        cache_path = os.path.join(cache_dir, f"{file_hash(file_path)}.npy")
+        try:
+            coeff = _load_npy(cache_path)
+        except FileNotFoundError:
+            coeff = _parse_fir_filter_coeff(file_path)
+            try:
+                _save_npy(cache_path, coeff)
+                coeff = _load_npy(cache_path)
+            except OSError as err:
+                module_logger.error(
+                    (f"read_fir_filter_coeff: couldn't cache {file_path} "
+                     f"in {cache_dir}: {err}"))
+    coeff.setflags(write=False)
+    _coeff_memo[memo_key] = coeff
+    return coeff
+
+
+def _load_npy(file_path: str) -> np.ndarray:
+    coeff = np.asarray(np.load(file_path, mmap_mode="r")).ravel()
+    if coeff.dtype != np.float64:
+        coeff = coeff.astype(np.float64)
+    return coeff
+
+
+def _save_npy(file_path: str, coeff: np.ndarray) -> None:
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, coeff, allow_pickle=False)
+    os.replace(tmp_path, file_path)
+
+
+def _parse_fir_filter_coeff(file_path: str) -> np.ndarray:
+    module_logger.debug(f"_parse_fir_filter_coeff: parsing {file_path}")
+    ext = os.path.splitext(file_path)[1]
+    if ext == ".npy":
+        return np.load(file_path).ravel().astype(np.float64)
+    if ext == ".mat":
+        filter_struct = scipy.io.loadmat(file_path)
+        for key in ["hQ", "h"]:
+            if key in filter_struct:
+                return filter_struct[key].ravel().astype(np.float64)
+        raise RuntimeError((f"read_fir_filter_coeff: {file_path} "
+                            f"has neither an 'hQ' or 'h' field"))
+    return np.loadtxt(file_path, dtype=np.float64).ravel()
+
+
+def fir_filter_header(fir_filter_coeff: np.ndarray,
+                      os_factor_str: str) -> dict:
+    """
+    DADA header fields describing a single stage filter bank. Mirrors
+    Matlab's ``add_fir_filter_to_header``.
+    """
+    return {
+        "NSTAGE": "1",
+        "COEFF_0": ",".join(f"{c:0.6E}" for c in fir_filter_coeff),
+        "OVERSAMP_0": os_factor_str,
+        "NTAP_0": str(len(fir_filter_coeff))
+    }
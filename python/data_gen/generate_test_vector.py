@@ -1,3 +1,4 @@
+import asyncio
 import typing
 import logging
 import os
@@ -9,43 +10,148 @@ import partialize
 import numpy as np
 import psr_formats
 
-from . import util
+from . import util, dada
+from .cache import ProductCache
+from .matlab_worker import MatlabWorker
 from .config import config, config_dir, build_dir
 
 __all__ = [
     "complex_sinusoid",
     "time_domain_impulse",
-    "generate_test_vector"
+    "noise",
+    "iter_complex_sinusoid",
+    "iter_time_domain_impulse",
+    "iter_noise",
+    "generate_test_vector",
+    "generate_test_vector_async"
 ]
 
 module_logger = logging.getLogger(__name__)
 
+domain_func_names = {
+    "time": "time_domain_impulse",
+    "freq": "complex_sinusoid",
+    "noise": "noise"
+}
+
+
+def _single_block(blocks: typing.Iterator[np.ndarray],
+                  dtype: np.dtype) -> np.ndarray:
+    """
+    The whole signal from one of the ``iter_*`` generators called without
+    a ``block_size``: its only block, or an empty array if ``n`` is 0.
+    """
+    return next(blocks, np.zeros(0, dtype=dtype))
+
+
+def iter_complex_sinusoid(n: int,
+                          freqs: typing.List[float],
+                          phases: typing.List[float],
+                          bin_offset: float = 0.0,
+                          dtype: np.dtype = np.complex64,
+                          single_precision: bool = False,
+                          block_elements: int = 2**20,
+                          block_size: int = None):
+    """
+    Generate a complex sinusoid of length n, yielding ``block_size``
+    samples at a time. See :func:`complex_sinusoid`.
+    """
+    if not hasattr(freqs, "__iter__"):
+        freqs = [freqs]
+        phases = [phases]
+
+    if n == 0:
+        return
+
+    if block_size is None:
+        block_size = n
+
+    freqs = [int(n*freq) if freq < 1.0 else freq for freq in freqs]
+    omega = 2*np.pi*(np.asarray(freqs, dtype=np.float64) + bin_offset)/n
+    phases = np.asarray(phases, dtype=np.float64)
+
+    accum_dtype = np.complex64 if single_precision else np.complex128
+
+    n_tones = omega.shape[0]
+    table_size = max(1, min(block_size, block_elements // max(n_tones, 1)))
+
+    table = np.exp(
+        1j*np.outer(np.arange(table_size), omega)).astype(accum_dtype)
+
+    for block_start in range(0, n, block_size):
+        block_stop = min(block_start + block_size, n)
+        sig = np.zeros(block_stop - block_start, dtype=dtype)
+        for start in range(block_start, block_stop, table_size):
+            stop = min(start + table_size, block_stop)
+            rotation = np.exp(
+                1j*(omega*start + phases)).astype(accum_dtype)
+            sig[start - block_start:stop - block_start] = \
+                table[:stop - start] @ rotation
+        yield sig
+
 
 def complex_sinusoid(n: int,
                      freqs: typing.List[float],
                      phases: typing.List[float],
                      bin_offset: float = 0.0,
-                     dtype: np.dtype = np.complex64):
+                     dtype: np.dtype = np.complex64,
+                     single_precision: bool = False,
+                     block_elements: int = 2**20):
     """
     Generate a complex sinusoid of length n.
     The sinusoid will be comprised of len(freq) frequencies. Each composite
     sinusoid will have a corresponding phase shift from phases.
+
+    All tones are generated together, one block of samples at a time. A
+    table of ``exp(1j*omega*k)`` for the samples in a block is computed
+    once, and each block is obtained by rotating the table by the phase of
+    each tone at the start of the block and summing over tones with a
+    single matrix-vector product.
+
+    Args:
+        single_precision (bool): Accumulate in complex64 instead of
+            complex128. Avoids double precision temporaries when the
+            output ``dtype`` is complex64.
+        block_elements (int): Approximate number of elements in the
+            per-block table of ``(samples, tones)``.
     """
     module_logger.debug((f"complex_sinusoid: n={n}, freqs={freqs}, "
                          f"phases={phases}, bin_offset={bin_offset}"))
-    if not hasattr(freqs, "__iter__"):
-        freqs = [freqs]
-        phases = [phases]
+    return _single_block(iter_complex_sinusoid(
+        n, freqs, phases, bin_offset,
+        dtype=dtype,
+        single_precision=single_precision,
+        block_elements=block_elements), dtype)
+
+
+def iter_time_domain_impulse(n: int,
+                             offsets: typing.List[float],
+                             widths: typing.List[int],
+                             dtype: np.dtype = np.complex64,
+                             block_size: int = None):
+    """
+    Generate a time domain impulse of length n, yielding ``block_size``
+    samples at a time. See :func:`time_domain_impulse`.
+    """
+    if not hasattr(offsets, "__iter__"):
+        offsets = [offsets]
+        widths = [widths]
 
-    t = np.arange(n)
-    sig = np.zeros(n, dtype=dtype)
-    for i in range(len(freqs)):
-        freq = freqs[i]
-        if freq < 1.0:
-            freq = int(n*freqs[i])
-        sig += np.exp(
-            1j*(2*np.pi*(freq + bin_offset)/n*t + phases[i]))
-    return sig
+    if block_size is None:
+        block_size = max(n, 1)
+
+    offsets = [int(offset*n) if offset < 1.0 else offset
+               for offset in offsets]
+
+    for block_start in range(0, n, block_size):
+        block_stop = min(block_start + block_size, n)
+        sig = np.zeros(block_stop - block_start, dtype=dtype)
+        for offset, width in zip(offsets, widths):
+            start = max(offset, block_start)
+            stop = min(offset + width, block_stop)
+            if start < stop:
+                sig[start - block_start:stop - block_start] = 1.0
+        yield sig
 
 
 def time_domain_impulse(n: int,
@@ -56,62 +162,45 @@ def time_domain_impulse(n: int,
     """
     module_logger.debug((f"time_domain_impulse: n={n}, offsets={offsets}, "
                          f"widths={widths}"))
-
-    if not hasattr(offsets, "__iter__"):
-        offsets = [offsets]
-        widths = [widths]
-
-    sig = np.zeros(n, dtype=dtype)
-    for i in range(len(offsets)):
-        offset = offsets[i]
-        if offset < 1.0:
-            offset = int(offsets[i]*n)
-        width = widths[i]
-        sig[offset: offset+width] = 1.0
-    return sig
+    return _single_block(
+        iter_time_domain_impulse(n, offsets, widths, dtype=dtype), dtype)
 
 
-@partialize.partialize
-def generate_test_vector(*args,
-                         n_bins: int,
-                         domain_name: str,
-                         header_template: str = None,
-                         output_file_name: str = None,
-                         output_dir: str = "./",
-                         n_pol: int = 1,
-                         dtype: np.dtype = np.complex64,
-                         backend: str = "matlab"):
+def iter_noise(n: int,
+               dtype: np.dtype = np.complex64,
+               block_size: int = None):
     """
-    Sample Matlab command line call:
-
-    .. code-block:: bash
-
-        generate_test_vector complex_sinusoid 1000 0.01,0.5,0.1 single 1 \
-            config/default_header.json single_channel.dump ./ 1
-
-
-    Usage:
-
-    .. code-block:: python
-
-        generator = generate_test_vector(backend="matlab", domain_name="freq")
-        dada_file = generator([10], [np.pi/4], 0.1,
-                              n_bins=1000,
-                              n_pol=2,
-                              output_dir="./",
-                              output_file_name="complex_sinusoid.dump",
-                              dtype=np.complex64)
-
-        generator = generate_test_vector(backend="python", domain_name="time")
-        dada_file = generator([10], [1],
-                              n_bins=1000,
-                              n_pol=2,
-                              output_dir="./",
-                              output_file_name="complex_sinusoid.dump",
-                              dtype=np.complex64)
-
-    Args:
-        backend (str): Whether use Matlab or Python
+    Generate uniform complex noise of length n, yielding ``block_size``
+    samples at a time.
+    """
+    if block_size is None:
+        block_size = max(n, 1)
+    for block_start in range(0, n, block_size):
+        block_n = min(block_size, n - block_start)
+        yield (np.random.rand(block_n) +
+               1j*np.random.rand(block_n)).astype(dtype)
+
+
+def noise(n: int, dtype: np.dtype = np.complex64):
+    return _single_block(iter_noise(n, dtype=dtype), dtype)
+
+
+def _generate_test_vector(*args,
+                          n_bins: int,
+                          domain_name: str,
+                          header_template: str = None,
+                          output_file_name: str = None,
+                          output_dir: str = "./",
+                          n_pol: int = 1,
+                          dtype: np.dtype = np.complex64,
+                          backend: str = "matlab",
+                          block_size: int = None,
+                          save_output: bool = True,
+                          cache: ProductCache = None):
+    """
+    Generator that creates a test vector, yielding a
+    ``(cmd_str, log_file_path)`` pair for each Matlab command it needs
+    run. See :func:`generate_test_vector`.
     """
 
     module_logger.debug((f"_generate_test_vector: "
@@ -122,7 +211,8 @@ def generate_test_vector(*args,
                          f"output_file_name={output_file_name}, "
                          f"output_dir={output_dir}, "
                          f"n_pol={n_pol}, "
-                         f"dtype={dtype}"))
+                         f"dtype={dtype}, "
+                         f"block_size={block_size}"))
 
     if header_template is None:
         header_template = os.path.join(
@@ -155,18 +245,39 @@ def generate_test_vector(*args,
     )
     args_str = args_str_comma_sep
 
+    output_base = output_base.format(func_name=domain_func_names[domain_name])
+
+    output_base, log_file_name, output_file_name = \
+        util.create_output_file_names(output_file_name, output_base)
+
+    output_file_path = os.path.join(output_dir, output_file_name)
+
+    if block_size is not None and not save_output:
+        raise RuntimeError(("generate_test_vector: block_size streams the "
+                            "test vector to disk, so it can't be used with "
+                            "save_output=False"))
+
+    cache_key = None
+    if cache is not None and save_output and domain_name != "noise":
+        cache_key = cache.key(
+            product="test_vector",
+            domain_name=domain_name,
+            args=args,
+            n_bins=n_bins,
+            n_pol=n_pol,
+            dtype=dtype,
+            header_template_file_path=header_template,
+            backend=backend)
+        if cache.fetch(cache_key, output_file_path):
+            dada_file = psr_formats.DADAFile(output_file_path)
+            if block_size is None:
+                dada_file.load_data()
+            dada_file.cache_key = cache_key
+            return dada_file
+
     if backend == "matlab":
-        matlab_domain_name_map = {
-            "time": "time_domain_impulse",
-            "freq": "complex_sinusoid"
-        }
         matlab_cmd_str = "generate_test_vector"
-        matlab_handler_name = matlab_domain_name_map[domain_name]
-
-        output_base = output_base.format(func_name=matlab_handler_name)
-
-        output_base, log_file_name, output_file_name = \
-            util.create_output_file_names(output_file_name, output_base)
+        matlab_handler_name = domain_func_names[domain_name]
 
         cmd_str = (f"{os.path.join(build_dir, matlab_cmd_str)} "
                    f"{matlab_handler_name} {n_bins} "
@@ -176,34 +287,151 @@ def generate_test_vector(*args,
         module_logger.debug((f"_generate_test_vector: backend={backend} "
                              f"cmd_str={cmd_str}"))
 
-        util.run_cmd(cmd_str, log_file_path=os.path.join(
-            output_dir, log_file_name))
+        yield cmd_str, os.path.join(output_dir, log_file_name)
 
-        return psr_formats.DADAFile(
-            os.path.join(output_dir, output_file_name)).load_data()
+        dada_file = psr_formats.DADAFile(output_file_path).load_data()
 
     elif backend == "python":
         func_lookup = {
             "time": time_domain_impulse,
             "freq": complex_sinusoid,
-            "noise": lambda n, dtype=np.float32: (
-                np.random.rand(n) +
-                1j*np.random.rand(n)).astype(dtype)
+            "noise": noise
         }
-        sig = func_lookup[domain_name](n_bins, *args, dtype=dtype)
-        output_data = np.zeros((sig.shape[0], 1, n_pol), dtype=dtype)
-        for i_pol in range(n_pol):
-            output_data[:, 0, i_pol] = sig
+        iter_func_lookup = {
+            "time": iter_time_domain_impulse,
+            "freq": iter_complex_sinusoid,
+            "noise": iter_noise
+        }
+
+        # both modes write the same header, built from the template
+        header = dada.create_header(
+            dada.load_header_template(header_template),
+            n_chan=1, n_pol=n_pol, dtype=dtype)
+        dada_file = psr_formats.DADAFile(output_file_path)
+        dada_file.header = header
+
+        if block_size is not None:
+            blocks = iter_func_lookup[domain_name](
+                n_bins, *args, dtype=dtype, block_size=block_size)
+            dada.stream_data(
+                output_file_path, header,
+                (np.broadcast_to(sig[:, np.newaxis, np.newaxis],
+                                 (sig.shape[0], 1, n_pol))
+                 for sig in blocks))
+        else:
+            sig = func_lookup[domain_name](n_bins, *args, dtype=dtype)
+            output_data = np.empty((sig.shape[0], 1, n_pol), dtype=dtype)
+            output_data[:] = sig[:, np.newaxis, np.newaxis]
+
+            dada_file.data = output_data
+            if save_output:
+                dada.stream_data(output_file_path, header, [output_data])
+
+    if cache_key is not None:
+        cache.store(cache_key, output_file_path)
+        dada_file.cache_key = cache_key
+
+    return dada_file
+
+
+@partialize.partialize
+def generate_test_vector(*args,
+                         n_bins: int,
+                         domain_name: str,
+                         header_template: str = None,
+                         output_file_name: str = None,
+                         output_dir: str = "./",
+                         n_pol: int = 1,
+                         dtype: np.dtype = np.complex64,
+                         backend: str = "matlab",
+                         block_size: int = None,
+                         save_output: bool = True,
+                         cache: ProductCache = None,
+                         matlab_worker: MatlabWorker = None):
+    """
+    Sample Matlab command line call:
+
+    .. code-block:: bash
+
+        generate_test_vector complex_sinusoid 1000 0.01,0.5,0.1 single 1 \
+            config/default_header.json single_channel.dump ./ 1
 
-        output_base = output_base.format(
-            func_name=func_lookup[domain_name].__name__)
 
-        output_base, log_file_name, output_file_name = \
-            util.create_output_file_names(output_file_name, output_base)
+    Usage:
 
-        dada_file = psr_formats.DADAFile(
-            os.path.join(output_dir, output_file_name))
+    .. code-block:: python
 
-        dada_file.data = output_data
-        dada_file.dump_data()
-        return dada_file
+        generator = generate_test_vector(backend="matlab", domain_name="freq")
+        dada_file = generator([10], [np.pi/4], 0.1,
+                              n_bins=1000,
+                              n_pol=2,
+                              output_dir="./",
+                              output_file_name="complex_sinusoid.dump",
+                              dtype=np.complex64)
+
+        generator = generate_test_vector(backend="python", domain_name="time")
+        dada_file = generator([10], [1],
+                              n_bins=1000,
+                              n_pol=2,
+                              output_dir="./",
+                              output_file_name="complex_sinusoid.dump",
+                              dtype=np.complex64)
+
+    Stream a large test vector to disk, never holding more than
+    ``block_size`` samples in memory:
+
+    .. code-block:: python
+
+        generator = generate_test_vector(backend="python", domain_name="freq")
+        dada_file = generator([10], [np.pi/4], 0.1,
+                              n_bins=10**9,
+                              n_pol=2,
+                              block_size=2**20)
+
+    Args:
+        backend (str): Whether use Matlab or Python
+        header_template (str): DADA header template. Both the Matlab
+            and Python backends write its fields to the test vector's
+            header. Defaults to the configured ``header_file_path``.
+        block_size (int): Python backend only. If provided, write the
+            DADA header once and then generate and append ``block_size``
+            samples at a time. The returned ``DADAFile`` is not loaded.
+            Requires ``save_output``.
+        save_output (bool): Python backend only. If False, the test vector
+            is not written to disk, and only resides in the returned
+            ``DADAFile``.
+        cache (ProductCache): If provided, reuse a previously
+            generated test vector with the same parameters, if one exists,
+            and add newly generated test vectors to the cache. Noise test
+            vectors, and test vectors that are not saved, are not cached.
+        matlab_worker (MatlabWorker): Matlab backend only. If provided,
+            run as a job on this worker, rather than starting a new
+            executable.
+    """
+    return util.run_cmd_steps(_generate_test_vector(
+        *args,
+        n_bins=n_bins,
+        domain_name=domain_name,
+        header_template=header_template,
+        output_file_name=output_file_name,
+        output_dir=output_dir,
+        n_pol=n_pol,
+        dtype=dtype,
+        backend=backend,
+        block_size=block_size,
+        save_output=save_output,
+        cache=cache),
+        matlab_worker=matlab_worker)
+
+
+async def generate_test_vector_async(*args,
+                                     semaphore: asyncio.Semaphore = None,
+                                     matlab_worker: MatlabWorker = None,
+                                     **kwargs):
+    """
+    asyncio variant of :func:`generate_test_vector`. See
+    :func:`channelize_async`.
+    """
+    return await util.run_cmd_steps_async(
+        _generate_test_vector(*args, **kwargs),
+        semaphore=semaphore, matlab_worker=matlab_worker)
@@ -0,0 +1,253 @@
+import os
+import logging
+import queue
+import shlex
+import subprocess
+import threading
+import typing
+
+from .config import build_dir
+
+__all__ = [
+    "MatlabWorker"
+]
+
+module_logger = logging.getLogger(__name__)
+
+
+class _WorkerExited(RuntimeError):
+    pass
+
+
+class MatlabWorker:
+    """
+    Client for a long lived ``build/matlab_worker`` process, which runs
+    any number of ``channelize``, ``synthesize`` and
+    ``generate_test_vector`` jobs while only paying the Matlab runtime's
+    start up cost once. See ``matlab/matlab_worker.m`` for the protocol.
+
+    The worker process is started on the first job. Before each job the
+    process is checked, and if it has exited it is restarted. If the
+    process dies or hangs during a job, it is restarted and the job is
+    retried, up to ``max_restarts`` times. After a ``fork``, the child
+    starts its own worker process rather than sharing the parent's.
+
+    Usage:
+
+    .. code-block:: python
+
+        with MatlabWorker() as worker:
+            channelizer = channelize(backend="matlab", matlab_worker=worker)
+            synthesizer = synthesize(backend="matlab", matlab_worker=worker)
+            for file_path in file_paths:
+                synthesizer(channelizer(file_path))
+
+    Args:
+        executable (str): Path to the compiled worker. Defaults to
+            ``build/matlab_worker``.
+        startup_timeout (float): Seconds to wait for the worker to be ready
+        ping_timeout (float): Seconds to wait for a reply to :meth:`ping`
+        job_timeout (float): Seconds to wait for a job to finish before
+            the worker is considered hung. None waits indefinitely.
+        max_restarts (int): Number of times a job is retried on a new
+            worker process.
+    """
+
+    status_prefix = "@@worker"
+
+    def __init__(self,
+                 executable: str = None,
+                 startup_timeout: float = 300.0,
+                 ping_timeout: float = 30.0,
+                 job_timeout: float = None,
+                 max_restarts: int = 1):
+        if executable is None:
+            executable = os.path.join(build_dir, "matlab_worker")
+        self.executable = executable
+        self.startup_timeout = startup_timeout
+        self.ping_timeout = ping_timeout
+        self.job_timeout = job_timeout
+        self.max_restarts = max_restarts
+        self._process = None
+        self._lines = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Start the worker process, and wait until it is ready for jobs.
+        """
+        module_logger.debug(f"MatlabWorker.start: starting {self.executable}")
+        self._process = subprocess.Popen(
+            [self.executable],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            bufsize=1)
+        self._pid = os.getpid()
+        self._lines = queue.Queue()
+        threading.Thread(
+            target=self._read_lines,
+            args=(self._process.stdout, self._lines),
+            daemon=True).start()
+        try:
+            self._wait_status("ready", timeout=self.startup_timeout)
+        except (_WorkerExited, TimeoutError) as err:
+            self._kill()
+            raise RuntimeError(
+                f"MatlabWorker.start: {self.executable} failed to start: {err}")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Ask the worker process to exit, killing it if it doesn't.
+        """
+        if not self._owns_process():
+            return
+        module_logger.debug("MatlabWorker.stop: stopping worker")
+        try:
+            self._send("exit")
+            self._process.wait(timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            self._kill()
+            return
+        self._close()
+
+    def restart(self) -> None:
+        if self._owns_process():
+            self._kill()
+        self.start()
+
+    def is_alive(self) -> bool:
+        """
+        Whether this process' worker is running.
+        """
+        return self._owns_process() and self._process.poll() is None
+
+    def ping(self) -> bool:
+        """
+        Health check: whether the worker process replies within
+        ``ping_timeout`` seconds.
+        """
+        if not self.is_alive():
+            return False
+        with self._lock:
+            try:
+                self._send("ping")
+                self._wait_status("pong", timeout=self.ping_timeout)
+            except (OSError, _WorkerExited, TimeoutError):
+                return False
+        return True
+
+    def run(self,
+            job_name: str,
+            *args: typing.Tuple[str],
+            log_file_path: str = None) -> None:
+        """
+        Run a single job, restarting the worker if need be. The job's
+        output is streamed to ``log_file_path``, if provided.
+
+        Args:
+            job_name (str): One of "channelize", "synthesize" or
+                "generate_test_vector"
+            args (tuple): Arguments for the job, as they would be passed to
+                the stand alone executable
+            log_file_path (str): Path to job log file
+        """
+        job_str = "\t".join([job_name] + [str(arg) for arg in args])
+        with self._lock:
+            for attempt in range(self.max_restarts + 1):
+                if not self.is_alive():
+                    self.restart()
+                module_logger.debug(f"MatlabWorker.run: job={job_str!r}")
+                try:
+                    self._send(job_str)
+                    if log_file_path is not None:
+                        with open(log_file_path, "w") as log_file:
+                            self._wait_status(
+                                "ok", log_file=log_file,
+                                timeout=self.job_timeout)
+                    else:
+                        self._wait_status("ok", timeout=self.job_timeout)
+                    return
+                except (OSError, _WorkerExited, TimeoutError) as err:
+                    module_logger.error(
+                        (f"MatlabWorker.run: worker failed on attempt "
+                         f"{attempt + 1}: {err}"))
+                    self._kill()
+        raise RuntimeError(f"MatlabWorker.run: job {job_name} failed")
+
+    def run_cmd(self, cmd_str: str, log_file_path: str = None) -> None:
+        """
+        Drop in replacement for :func:`util.run_cmd` for commands that
+        call one of the executables in ``build/``.
+        """
+        cmd_split = shlex.split(cmd_str)
+        self.run(os.path.basename(cmd_split[0]), *cmd_split[1:],
+                 log_file_path=log_file_path)
+
+    def _owns_process(self) -> bool:
+        return self._process is not None and self._pid == os.getpid()
+
+    def _kill(self) -> None:
+        if self._owns_process():
+            self._process.kill()
+            self._process.wait()
+        self._close()
+
+    def _close(self) -> None:
+        if self._owns_process():
+            for stream in [self._process.stdin, self._process.stdout]:
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+        self._process = None
+
+    def _send(self, line: str) -> None:
+        self._process.stdin.write(line + "\n")
+        self._process.stdin.flush()
+
+    def _wait_status(self,
+                     expected: str,
+                     log_file: typing.TextIO = None,
+                     timeout: float = None) -> None:
+        """
+        Consume worker output until the next status line. Other lines are
+        written to log_file.
+        """
+        prefix = f"{self.status_prefix} "
+        while True:
+            try:
+                line = self._lines.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(
+                    f"no reply from worker after {timeout} seconds")
+            if line is None:
+                raise _WorkerExited("worker process exited")
+            if line.startswith(prefix):
+                status = line[len(prefix):].rstrip("\n")
+                if status == expected:
+                    return
+                if status.startswith("error"):
+                    raise RuntimeError(f"MatlabWorker: {status}")
+                continue
+            if log_file is not None:
+                log_file.write(line)
+                log_file.flush()
+
+    @staticmethod
+    def _read_lines(stream: typing.TextIO, lines: queue.Queue) -> None:
+        try:
+            for line in stream:
+                lines.put(line)
+        except (OSError, ValueError):
+            # stream closed while the worker was being killed
+            pass
+        lines.put(None)
@@ -15,6 +15,8 @@ def pipeline(
     channelize_callback: callable,
     synthesize_callback: callable,
     output_dir: str = None,
+    in_memory: bool = False,
+    save_output: bool = False
 ) -> callable:
     """
 
@@ -57,25 +59,61 @@ def pipeline(
             functolls.partial(synthesize("python"), input_fft_length=16384)
         )
 
+    The `output_dir` given here can be overridden for a single call:
+
+    .. code-block::python
+
+        dada_files = pipeline_fn("time", 1000, 0.1, 1, output_dir="./tmp")
+
+    Pass the output of each step directly to the next, without writing
+    intermediate products to disk. Each callback gets called with the
+    previous step's `DADAFile` object instead of its file path, and with
+    `save_output`. The Python backends of `generate_test_vector`,
+    `channelize` and `synthesize` support this:
+
+    .. code-block::python
+
+        pipeline_fn = pipeline(
+            generate_test_vector(backend="python", domain_name="time"),
+            channelize(backend="python"),
+            synthesize(backend="python"),
+            in_memory=True
+        )
+
+    Args:
+        in_memory (bool): Pass `DADAFile` objects between steps.
+        save_output (bool): When `in_memory` is set, whether each step
+            should also write its output to disk.
 
     """
-    def _pipeline(*args, **kwargs):
+    if in_memory:
+        def _next_input(dada_file):
+            return dada_file
+        stage_kwargs = dict(save_output=save_output)
+    else:
+        def _next_input(dada_file):
+            return dada_file.file_path
+        stage_kwargs = {}
+
+    def _pipeline(*args, output_dir: str = output_dir, **kwargs):
         module_logger.debug(f"_pipeline: args={args}, kwargs={kwargs}")
         test_vector_dada_file = test_vector_callback(
-            *args, **kwargs, output_dir=output_dir)
+            *args, **kwargs, output_dir=output_dir, **stage_kwargs)
         channelized_file_name = "channelized." + \
             os.path.basename(test_vector_dada_file.file_path)
         synthesized_file_name = "synthesized." + \
             os.path.basename(test_vector_dada_file.file_path)
 
         channelized_dada_file = channelize_callback(
-            test_vector_dada_file.file_path,
+            _next_input(test_vector_dada_file),
             output_file_name=channelized_file_name,
-            output_dir=output_dir)
+            output_dir=output_dir,
+            **stage_kwargs)
         synthesized_dada_file = synthesize_callback(
-            channelized_dada_file.file_path,
+            _next_input(channelized_dada_file),
             output_file_name=synthesized_file_name,
-            output_dir=output_dir)
+            output_dir=output_dir,
+            **stage_kwargs)
 
         return (
             test_vector_dada_file,
@@ -0,0 +1,674 @@
+import logging
+import time
+import typing
+
+import numpy as np
+import scipy.signal
+
+from .tables import TableCache, default_table_cache
+
+__all__ = [
+    "polyphase_analysis",
+    "iter_polyphase_analysis",
+    "polyphase_analysis_lowcbf",
+    "iter_polyphase_analysis_lowcbf",
+    "polyphase_synthesis",
+    "iter_polyphase_synthesis",
+    "PolyphaseSynthesizer",
+    "analysis_function_params",
+    "lowcbf_fir_taps",
+    "lowcbf_channels",
+    "lowcbf_os_factor_str",
+    "lowcbf_kept_channels"
+]
+
+module_logger = logging.getLogger(__name__)
+
+lowcbf_fir_taps = 3072
+lowcbf_channels = 256
+lowcbf_os_factor_str = "4/3"
+lowcbf_kept_channels = 216
+# number of input samples between successive output samples,
+# lowcbf_channels / os_factor
+lowcbf_step = 192
+# pre-padding, half the filter length, so that the first output sample
+# corresponds to the first input sample
+lowcbf_padding = 1536
+# index of the first of the kept channels, after fftshift
+lowcbf_first_kept_channel = 20
+# firmware scaling: / 2^9 in the FIR filter and / 128 after the FFT, which
+# polyphase_analysis_lowcbf.m then undoes with 2^9 * 2048 * 256
+lowcbf_scale = 2048 * 256 / 128
+
+# name of analysis function -> (channels, os_factor_str, fir_filter_taps)
+analysis_function_params = {
+    "polyphase_analysis_lowcbf": (
+        lowcbf_channels, lowcbf_os_factor_str, lowcbf_fir_taps)
+}
+
+_quarter_turns = np.array([1, 1j, -1, -1j])
+
+
+class _AnalysisParams(typing.NamedTuple):
+    channels: int
+    step: int
+    fir_filter_coeff: np.ndarray
+
+    @property
+    def filter_length(self) -> int:
+        return self.fir_filter_coeff.shape[0]
+
+    def n_out(self, n_samples: int) -> int:
+        # Matches polyphase_analysis.m, which computes one output sample
+        # fewer than would fit in the input.
+        return max((n_samples - self.filter_length) // self.step, 0)
+
+
+def _analysis_params(fir_filter_coeff: np.ndarray,
+                     channels: int,
+                     os_factor_str: str) -> _AnalysisParams:
+    """
+    Input step between output samples, and the filter zero padded to a
+    multiple of ``channels``, as computed by Matlab's ``polyphase_analysis``.
+    """
+    os_nu, os_de = [int(v) for v in str(os_factor_str).split("/")]
+    fir_filter_coeff = np.asarray(fir_filter_coeff)
+    phases = -(-fir_filter_coeff.shape[0] // channels)
+    padded = np.zeros(phases*channels, dtype=fir_filter_coeff.dtype)
+    padded[:fir_filter_coeff.shape[0]] = fir_filter_coeff
+    return _AnalysisParams(channels, channels*os_de // os_nu, padded)
+
+
+def _analysis(data: np.ndarray,
+              params: _AnalysisParams,
+              n_out: int,
+              first_output: int = 0) -> np.ndarray:
+    """
+    Compute ``n_out`` output samples from the ``(nsamples, npol)`` array
+    ``data``, whose first sample is the first sample of output sample
+    ``first_output``.
+    """
+    channels, step, fir_filter_coeff = params
+    n_pol = data.shape[1]
+
+    # folded[k, p, n] = sum_j h[channels*j + n] * x[step*k + channels*j + n]
+    folded = np.zeros((n_out, n_pol, channels), dtype=data.dtype)
+    stride_dat, stride_pol = data.strides
+    for offset in range(0, params.filter_length, channels):
+        view = np.lib.stride_tricks.as_strided(
+            data[offset:],
+            shape=(n_out, n_pol, channels),
+            strides=(step*stride_dat, stride_pol, stride_dat),
+            writeable=False)
+        folded += view * fir_filter_coeff[offset:offset + channels]
+
+    # Matlab rotates each filtered block by step*k samples before the FFT,
+    # so that the channels don't rotate in phase from one output sample to
+    # the next. Rotating the folded block is equivalent.
+    shift = (step * np.arange(first_output, first_output + n_out)) % channels
+    rolled_idx = (np.arange(channels) - shift[:, np.newaxis]) % channels
+    rolled = np.take_along_axis(
+        folded, rolled_idx[:, np.newaxis, :], axis=-1)
+
+    # conj(ifft(conj(x))*channels**2) is fft(x)*channels
+    channelized = np.fft.fft(rolled, axis=-1) * channels
+    return channelized.transpose(0, 2, 1)
+
+
+def polyphase_analysis(data: np.ndarray,
+                       fir_filter_coeff: np.ndarray,
+                       channels: int,
+                       os_factor_str: str) -> np.ndarray:
+    """
+    Python equivalent of Matlab's ``polyphase_analysis``, the oversampled
+    polyphase filter bank used by the ``channelize`` command, for any
+    number of channels and oversampling factor.
+
+    As with :func:`polyphase_analysis_lowcbf`, the polyphase FIR filter is
+    evaluated as one multiply-add per filter phase between that phase's
+    coefficients and a strided view of the input, for every output sample,
+    polarization and channel at once, followed by a single batched FFT.
+
+    Args:
+        data (np.ndarray): Input of shape ``(ndat,)`` or ``(ndat, npol)``
+        fir_filter_coeff (np.ndarray): Prototype filter coefficients
+        channels (int): Number of output channels
+        os_factor_str (str): Oversampling factor, eg "8/7"
+    Returns:
+        np.ndarray: Channelized data of shape ``(nout, channels)`` or
+            ``(nout, channels, npol)``
+    """
+    params = _analysis_params(fir_filter_coeff, channels, os_factor_str)
+    data = np.asarray(data)
+    squeeze = data.ndim == 1
+    if squeeze:
+        data = data[:, np.newaxis]
+    dtype = np.result_type(data.dtype, params.fir_filter_coeff.dtype,
+                           np.complex64)
+    output = _analysis(data.astype(dtype, copy=False), params,
+                       params.n_out(data.shape[0]))
+    if squeeze:
+        output = output[..., 0]
+    return output
+
+
+def iter_polyphase_analysis(
+    blocks: typing.Iterable[np.ndarray],
+    fir_filter_coeff: np.ndarray,
+    channels: int,
+    os_factor_str: str
+) -> typing.Iterator[np.ndarray]:
+    """
+    Streaming version of :func:`polyphase_analysis`. Input blocks of shape
+    ``(ndat, npol)`` are channelized as they arrive. The input samples
+    that later output samples still need, fewer than the padded filter
+    length plus one output step, are carried over to the next block. The
+    concatenated output is identical to that of :func:`polyphase_analysis`
+    on the concatenated input.
+
+    Usage:
+
+    .. code-block:: python
+
+        data, header = dada.load_memmap("input.dump")
+        blocks = (data[i:i+2**20, 0, :]
+                  for i in range(0, data.shape[0], 2**20))
+        for channelized in iter_polyphase_analysis(blocks, h, 8, "8/7"):
+            ...
+
+    Args:
+        blocks (iterable): Input blocks of shape ``(ndat, npol)``
+        fir_filter_coeff (np.ndarray): Prototype filter coefficients
+        channels (int): Number of output channels
+        os_factor_str (str): Oversampling factor, eg "8/7"
+    Returns:
+        generator: yields channelized blocks of shape
+            ``(nout, channels, npol)``
+    """
+    params = _analysis_params(fir_filter_coeff, channels, os_factor_str)
+    history = None
+    n_done = 0
+    for block in blocks:
+        block = np.asarray(block)
+        if history is None:
+            dtype = np.result_type(
+                block.dtype, params.fir_filter_coeff.dtype, np.complex64)
+            history = np.zeros((0, block.shape[1]), dtype=dtype)
+        buffer = np.concatenate([history, block.astype(history.dtype)])
+        n_out = params.n_out(buffer.shape[0])
+        if n_out > 0:
+            yield _analysis(buffer, params, n_out, n_done)
+        n_done += n_out
+        history = buffer[n_out*params.step:]
+
+
+def _check_lowcbf_fir_filter_coeff(fir_filter_coeff):
+    fir_filter_coeff = np.asarray(fir_filter_coeff)
+    if fir_filter_coeff.shape[0] != lowcbf_fir_taps:
+        raise RuntimeError(
+            (f"polyphase_analysis_lowcbf: expected {lowcbf_fir_taps} "
+             f"filter coefficients, got {fir_filter_coeff.shape[0]}"))
+    return fir_filter_coeff
+
+
+def _lowcbf_analysis(padded: np.ndarray,
+                     fir_filter_coeff: np.ndarray,
+                     n_out: int,
+                     first_output: int = 0) -> np.ndarray:
+    """
+    Compute ``n_out`` output samples from the ``(nsamples, npol)`` array
+    ``padded``, whose first sample is the first sample of output sample
+    ``first_output``.
+    """
+    n_pol = padded.shape[1]
+
+    # fft_in[k, p, n] = sum_j h[256j + n] * x[192k + 256j + n, p]
+    fft_in = np.zeros((n_out, n_pol, lowcbf_channels), dtype=padded.dtype)
+    stride_dat, stride_pol = padded.strides
+    for tap in range(lowcbf_fir_taps // lowcbf_channels):
+        offset = tap * lowcbf_channels
+        view = np.lib.stride_tricks.as_strided(
+            padded[offset:],
+            shape=(n_out, n_pol, lowcbf_channels),
+            strides=(lowcbf_step*stride_dat, stride_pol, stride_dat),
+            writeable=False)
+        fft_in += view * fir_filter_coeff[offset:offset + lowcbf_channels]
+
+    channelized = np.fft.fftshift(np.fft.fft(fft_in, axis=-1), axes=-1)
+
+    # derotate by pi/2 per frequency bin and output sample, due to
+    # oversampling. DC is at index 128, and is not rotated.
+    output_idx = np.arange(first_output, first_output + n_out)
+    rotation = (output_idx[:, np.newaxis] *
+                np.arange(-lowcbf_channels//2, lowcbf_channels//2)) % 4
+    channelized *= _quarter_turns[rotation][:, np.newaxis, :]
+
+    kept = slice(lowcbf_first_kept_channel,
+                 lowcbf_first_kept_channel + lowcbf_kept_channels)
+    return channelized[..., kept].transpose(0, 2, 1) * lowcbf_scale
+
+
+def _lowcbf_n_out(n_samples: int) -> int:
+    # Matches PSTFilterbank.m, which computes one output sample fewer than
+    # would fit in the input.
+    return max((n_samples - lowcbf_fir_taps) // lowcbf_step, 0)
+
+
+def polyphase_analysis_lowcbf(data: np.ndarray,
+                              fir_filter_coeff: np.ndarray,
+                              do_padding: bool = True) -> np.ndarray:
+    """
+    Python equivalent of Matlab's ``polyphase_analysis_lowcbf``, which wraps
+    the Low CBF firmware model ``PSTFilterbank.m``: a 256 channel, 4/3
+    oversampled polyphase filter bank with 3072 taps, of which only the
+    216 channels spanning the critically sampled part of the band are
+    kept.
+
+    Rather than looping over each output sample and channel, the polyphase
+    FIR filter is evaluated as 12 multiply-adds between the filter
+    coefficients of each tap and a strided view of the input, so that
+    the filtered samples for every output sample, polarization and channel
+    are computed at once, followed by a single batched FFT.
+
+    Args:
+        data (np.ndarray): Complex input of shape ``(ndat,)`` or
+            ``(ndat, npol)``
+        fir_filter_coeff (np.ndarray): 3072 filter coefficients
+        do_padding (bool): Pre-pad the input with half the filter length
+            of zeros, as Matlab does on its first call.
+    Returns:
+        np.ndarray: Channelized data of shape ``(nout, 216)`` or
+            ``(nout, 216, npol)``
+    """
+    fir_filter_coeff = _check_lowcbf_fir_filter_coeff(fir_filter_coeff)
+    data = np.asarray(data)
+    squeeze = data.ndim == 1
+    if squeeze:
+        data = data[:, np.newaxis]
+    ndat, n_pol = data.shape
+
+    padding = lowcbf_padding if do_padding else 0
+    dtype = np.result_type(data.dtype, fir_filter_coeff.dtype, np.complex64)
+    padded = np.zeros((ndat + padding, n_pol), dtype=dtype)
+    padded[padding:] = data
+
+    output = _lowcbf_analysis(
+        padded, fir_filter_coeff, _lowcbf_n_out(padded.shape[0]))
+    if squeeze:
+        output = output[..., 0]
+    return output
+
+
+def iter_polyphase_analysis_lowcbf(
+    blocks: typing.Iterable[np.ndarray],
+    fir_filter_coeff: np.ndarray,
+    do_padding: bool = True
+) -> typing.Iterator[np.ndarray]:
+    """
+    Streaming version of :func:`polyphase_analysis_lowcbf`. Input blocks of
+    shape ``(ndat, npol)`` are channelized as they arrive. The input
+    samples that later output samples still need, fewer than the filter
+    length plus one output step, are carried over to the next block. The
+    concatenated output is identical to that of
+    :func:`polyphase_analysis_lowcbf` on the concatenated input.
+
+    Usage:
+
+    .. code-block:: python
+
+        data, header = dada.load_memmap("input.dump")
+        blocks = (data[i:i+2**20, 0, :]
+                  for i in range(0, data.shape[0], 2**20))
+        for channelized in iter_polyphase_analysis_lowcbf(blocks, h):
+            ...
+
+    Args:
+        blocks (iterable): Complex input blocks of shape ``(ndat, npol)``
+        fir_filter_coeff (np.ndarray): 3072 filter coefficients
+        do_padding (bool): See :func:`polyphase_analysis_lowcbf`
+    Returns:
+        generator: yields channelized blocks of shape ``(nout, 216, npol)``
+    """
+    fir_filter_coeff = _check_lowcbf_fir_filter_coeff(fir_filter_coeff)
+    history = None
+    n_done = 0
+    for block in blocks:
+        block = np.asarray(block)
+        if history is None:
+            dtype = np.result_type(
+                block.dtype, fir_filter_coeff.dtype, np.complex64)
+            padding = lowcbf_padding if do_padding else 0
+            history = np.zeros((padding, block.shape[1]), dtype=dtype)
+        buffer = np.concatenate([history, block.astype(history.dtype)])
+        n_out = _lowcbf_n_out(buffer.shape[0])
+        if n_out > 0:
+            yield _lowcbf_analysis(buffer, fir_filter_coeff, n_out, n_done)
+        n_done += n_out
+        history = buffer[n_out*lowcbf_step:]
+
+
+def _synthesis_params(input_fft_length: int,
+                      input_overlap: int,
+                      n_chan: int,
+                      os_factor_str: str) -> typing.Tuple[int, ...]:
+    """
+    Frame sizes for :func:`polyphase_synthesis`, as computed by Matlab's
+    ``polyphase_synthesis``.
+
+    Returns:
+        tuple: ``(input_keep, output_fft_length, output_overlap,
+            output_keep, fn_width)``
+    """
+    os_nu, os_de = [int(v) for v in str(os_factor_str).split("/")]
+    input_keep = input_fft_length - 2*input_overlap
+    if (input_fft_length * os_de) % os_nu != 0 or \
+            (input_overlap * os_de) % os_nu != 0:
+        raise RuntimeError(
+            (f"polyphase_synthesis: input_fft_length={input_fft_length} and "
+             f"input_overlap={input_overlap} must be multiples of the "
+             f"oversampling factor's numerator, {os_nu}"))
+    fn_width = input_fft_length * os_de // os_nu
+    output_fft_length = fn_width * n_chan
+    output_overlap = input_overlap * os_de // os_nu * n_chan
+    output_keep = output_fft_length - 2*output_overlap
+    return (input_keep, output_fft_length, output_overlap,
+            output_keep, fn_width)
+
+
+def _deripple_response(fir_filter_coeff: np.ndarray,
+                       n_chan: int,
+                       fn_width: int) -> np.ndarray:
+    """
+    Inverse of the filter's passband response, laid out across the
+    ``fn_width`` kept bins of a channel, with DC in the middle.
+    """
+    passband_length = fn_width // 2
+    _, response = scipy.signal.freqz(
+        fir_filter_coeff, 1, worN=n_chan*passband_length)
+    filter_response = 1.0 / np.abs(response[:passband_length + 1])
+    return np.concatenate([filter_response[passband_length:0:-1],
+                           filter_response[:passband_length]])
+
+
+class PolyphaseSynthesizer:
+    """
+    Batched Python equivalent of Matlab's ``polyphase_synthesis``: recombine
+    the channels of oversampled polyphase filter bank output into a single
+    channel, using overlap-save forward FFTs of ``input_fft_length`` in each
+    channel and a single large inverse FFT per frame. Each forward FFT frame
+    overlaps its neighbours by ``2*input_overlap`` samples, and the output
+    samples corresponding to the overlap are discarded.
+
+    Rather than transforming each channel and polarization separately, all
+    channels and polarizations of ``block_frames`` frames are stacked into
+    one array and transformed with a single FFT call, and likewise for the
+    inverse FFTs. The FFT window, deripple correction, and the phase ramp
+    that places the DC centred first channel at the start of the spectrum
+    are computed once, and the intermediate and output buffers are
+    allocated once and reused for every block.
+
+    Usage:
+
+    .. code-block:: python
+
+        data, header = dada.load_memmap("channelized.dump")
+        synthesizer = PolyphaseSynthesizer(
+            data.shape[1], data.shape[2], 1024, "8/7", input_overlap=128)
+        synthesized = synthesizer(data)
+
+    Args:
+        n_chan (int): Number of input channels
+        n_pol (int): Number of input polarizations
+        input_fft_length (int): Length of the forward FFTs
+        os_factor_str (str): Oversampling factor, eg "4/3"
+        input_overlap (int): Input samples discarded at either end of each
+            forward FFT frame
+        fft_window (np.ndarray): Optional window of ``input_fft_length``
+            applied to each forward FFT frame
+        fir_filter_coeff (np.ndarray): If provided, correct for the
+            passband ripple of this analysis filter.
+        dc_chan (bool): Whether the first channel is centred on DC, as with
+            ``PFB_DC_CHAN=1``
+        block_frames (int): Number of forward FFT frames transformed at
+            once. Defaults to as many as fit in a 64 MiB buffer.
+        table_cache (TableCache): Where the deripple response and phase
+            ramp are looked up. Defaults to ``default_table_cache``.
+    """
+
+    default_block_bytes = 2**26
+
+    def __init__(self,
+                 n_chan: int,
+                 n_pol: int,
+                 input_fft_length: int,
+                 os_factor_str: str,
+                 input_overlap: int = 0,
+                 fft_window: np.ndarray = None,
+                 fir_filter_coeff: np.ndarray = None,
+                 dc_chan: bool = True,
+                 block_frames: int = None,
+                 table_cache: TableCache = None):
+        if table_cache is None:
+            table_cache = default_table_cache
+        self.n_chan = n_chan
+        self.n_pol = n_pol
+        self.input_fft_length = input_fft_length
+        self.input_overlap = input_overlap
+        (self.input_keep, self.output_fft_length, self.output_overlap,
+         self.output_keep, self.fn_width) = _synthesis_params(
+            input_fft_length, input_overlap, n_chan, os_factor_str)
+        os_nu, os_de = [int(v) for v in str(os_factor_str).split("/")]
+
+        if block_frames is None:
+            frame_bytes = input_fft_length * n_chan * n_pol * 16
+            block_frames = max(self.default_block_bytes // frame_bytes, 1)
+        self.block_frames = block_frames
+
+        self._fft_window = None
+        if fft_window is not None:
+            self._fft_window = np.asarray(fft_window).ravel()[
+                :, np.newaxis, np.newaxis]
+
+        self._deripple = None
+        if fir_filter_coeff is not None:
+            fir_filter_coeff = np.asarray(fir_filter_coeff)
+            self._deripple = table_cache.get(
+                "deripple",
+                lambda: _deripple_response(
+                    fir_filter_coeff, n_chan, self.fn_width),
+                fir_filter_coeff=fir_filter_coeff,
+                n_chan=n_chan,
+                os_factor_str=str(os_factor_str),
+                input_fft_length=input_fft_length)[:, np.newaxis, np.newaxis]
+
+        # fftshift followed by discarding the oversampled band edges is the
+        # last ``lower`` and first ``upper`` bins of the unshifted spectrum
+        discard = (input_fft_length - self.fn_width) // 2
+        self._upper = discard + self.fn_width - input_fft_length // 2
+        self._lower = self.fn_width - self._upper
+
+        # Rolling the combined spectrum by -fn_width/2, so that the upper
+        # half of the DC centred first channel starts the spectrum, is
+        # equivalent to this phase ramp on the inverse FFT's output. The
+        # oversampling factor's scaling is folded in too.
+        def phase_ramp():
+            output_idx = np.arange(
+                self.output_overlap, self.output_overlap + self.output_keep)
+            shift = self.fn_width // 2 if dc_chan else 0
+            return (np.exp(-2j*np.pi*shift*output_idx /
+                           self.output_fft_length) * os_de / os_nu)
+
+        self._phase = table_cache.get(
+            "phase_ramp", phase_ramp,
+            n_chan=n_chan,
+            os_factor_str=str(os_factor_str),
+            input_fft_length=input_fft_length,
+            input_overlap=input_overlap,
+            dc_chan=dc_chan)[np.newaxis, :, np.newaxis]
+
+        self._frames = np.zeros(
+            (block_frames, input_fft_length, n_chan, n_pol),
+            dtype=np.complex128)
+        self._combined = np.zeros(
+            (block_frames, n_pol, n_chan, self.fn_width),
+            dtype=np.complex128)
+        self._output = np.zeros(
+            (block_frames*self.output_keep, n_pol), dtype=np.complex128)
+
+    def n_frames(self, n_dat: int) -> int:
+        """
+        Number of whole forward FFT frames in ``n_dat`` input samples.
+        """
+        return max((n_dat - 2*self.input_overlap) // self.input_keep, 0)
+
+    def output_length(self, n_dat: int) -> int:
+        return self.n_frames(n_dat) * self.output_keep
+
+    def __call__(self, data: np.ndarray) -> np.ndarray:
+        """
+        Synthesize all of ``data``, of shape ``(ndat, nchan, npol)``, into
+        a newly allocated array of shape ``(nout, npol)``.
+        """
+        output = np.zeros((self.output_length(data.shape[0]), self.n_pol),
+                          dtype=np.complex128)
+        n_done = 0
+        for block in self.iter_blocks(data):
+            output[n_done:n_done + block.shape[0]] = block
+            n_done += block.shape[0]
+        return output
+
+    def iter_blocks(self, data: np.ndarray) -> typing.Iterator[np.ndarray]:
+        """
+        Synthesize ``data`` one block of ``block_frames`` frames at a time.
+        ``data`` is only sliced, a block at a time, so it can be a memory
+        mapped file larger than memory.
+
+        The yielded array is the synthesizer's output buffer, and is
+        overwritten by the next block: copy it to keep it.
+        """
+        n_frames = self.n_frames(data.shape[0])
+        t0 = time.time()
+        for first_frame in range(0, n_frames, self.block_frames):
+            block_n_frames = min(self.block_frames, n_frames - first_frame)
+            start = first_frame * self.input_keep
+            stop = (start + block_n_frames*self.input_keep +
+                    2*self.input_overlap)
+            yield self._synthesize_block(data[start:stop], block_n_frames)
+        delta = time.time() - t0
+        if n_frames > 0 and delta > 0:
+            module_logger.info(
+                (f"PolyphaseSynthesizer: synthesized {n_frames} frames in "
+                 f"{delta:.3f} seconds, {n_frames / delta:.1f} frames/s, "
+                 f"{n_frames*self.output_keep / delta:.3e} samples/s"))
+
+    def _synthesize_block(self,
+                          data: np.ndarray,
+                          n_frames: int) -> np.ndarray:
+        frames = self._frames[:n_frames]
+        stride_dat, stride_chan, stride_pol = data.strides
+        view = np.lib.stride_tricks.as_strided(
+            data,
+            shape=frames.shape,
+            strides=(self.input_keep*stride_dat, stride_dat,
+                     stride_chan, stride_pol),
+            writeable=False)
+        if self._fft_window is not None:
+            np.multiply(view, self._fft_window, out=frames)
+        else:
+            frames[:] = view
+
+        spectra = np.fft.fft(frames, axis=1)
+        combined = self._combined[:n_frames]
+        # (frame, bin, chan, pol) view of the (frame, pol, chan, bin) buffer
+        combined_view = combined.transpose(0, 3, 2, 1)
+        combined_view[:, :self._lower] = spectra[:, -self._lower:]
+        combined_view[:, self._lower:] = spectra[:, :self._upper]
+        if self._deripple is not None:
+            np.multiply(combined_view, self._deripple, out=combined_view)
+
+        inverted = np.fft.ifft(combined.reshape(
+            n_frames, self.n_pol, self.output_fft_length), axis=-1)
+        inverted = inverted[..., self.output_overlap:
+                            self.output_overlap + self.output_keep]
+
+        output = self._output[:n_frames*self.output_keep]
+        np.multiply(inverted.transpose(0, 2, 1), self._phase,
+                    out=output.reshape(n_frames, self.output_keep, self.n_pol))
+        return output
+
+
+def polyphase_synthesis(data: np.ndarray,
+                        input_fft_length: int,
+                        os_factor_str: str,
+                        input_overlap: int = 0,
+                        fft_window: np.ndarray = None,
+                        fir_filter_coeff: np.ndarray = None,
+                        dc_chan: bool = True,
+                        table_cache: TableCache = None) -> np.ndarray:
+    """
+    Python equivalent of Matlab's ``polyphase_synthesis``. See
+    :class:`PolyphaseSynthesizer`.
+
+    Args:
+        data (np.ndarray): Complex channelized input of shape
+            ``(ndat, nchan, npol)``
+    Returns:
+        np.ndarray: Synthesized data of shape ``(nout, npol)``
+    """
+    synthesizer = PolyphaseSynthesizer(
+        data.shape[1], data.shape[2], input_fft_length, os_factor_str,
+        input_overlap=input_overlap,
+        fft_window=fft_window,
+        fir_filter_coeff=fir_filter_coeff,
+        dc_chan=dc_chan,
+        table_cache=table_cache)
+    return synthesizer(data)
+
+
+def iter_polyphase_synthesis(
+    data: np.ndarray,
+    input_fft_length: int,
+    os_factor_str: str,
+    input_overlap: int = 0,
+    fft_window: np.ndarray = None,
+    fir_filter_coeff: np.ndarray = None,
+    dc_chan: bool = True,
+    block_frames: int = None,
+    table_cache: TableCache = None
+) -> typing.Iterator[np.ndarray]:
+    """
+    Streaming version of :func:`polyphase_synthesis`. ``data`` is read
+    ``block_frames`` forward FFT frames at a time, so it can be a memory
+    mapped file larger than memory. Each block is sliced to include the
+    ``2*input_overlap`` samples shared with the next block's first frame,
+    and so the concatenated output is identical to
+    :func:`polyphase_synthesis`.
+
+    Each yielded block is written to the same preallocated buffer, so it
+    is only valid until the next block is requested.
+
+    Usage:
+
+    .. code-block:: python
+
+        data, header = dada.load_memmap("channelized.dump")
+        dada.stream_data("synthesized.dump", synthesized_header,
+                         iter_polyphase_synthesis(
+                            data, 1024, "8/7", 128, block_frames=256))
+
+    Args:
+        data (np.ndarray): See :func:`polyphase_synthesis`
+        block_frames (int): Number of forward FFT frames per block. See
+            :class:`PolyphaseSynthesizer`.
+    Returns:
+        generator: yields synthesized blocks of shape ``(nout, npol)``
+    """
+    synthesizer = PolyphaseSynthesizer(
+        data.shape[1], data.shape[2], input_fft_length, os_factor_str,
+        input_overlap=input_overlap,
+        fft_window=fft_window,
+        fir_filter_coeff=fir_filter_coeff,
+        dc_chan=dc_chan,
+        block_frames=block_frames,
+        table_cache=table_cache)
+    return synthesizer.iter_blocks(data)
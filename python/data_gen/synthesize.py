@@ -1,17 +1,22 @@
 import os
 import argparse
+import asyncio
 import logging
 
+import numpy as np
 import partialize
 import psr_formats
 import pfb.format_handler
 import pfb.fft_windows
 
-from . import util
+from . import util, dada, polyphase
+from .matlab_worker import MatlabWorker
+from .tables import TableCache, default_table_cache
 from .config import config, build_dir
 
 __all__ = [
-    "synthesize"
+    "synthesize",
+    "synthesize_async"
 ]
 
 module_logger = logging.getLogger(__name__)
@@ -24,25 +29,40 @@ fft_window_lookup = {
 }
 
 
-@partialize.partialize
-def synthesize(input_data_file_path,
-               input_fft_length: int = None,
-               input_overlap: int = None,
-               fft_window_str: str = "no_window",
-               output_file_name: str = None,
-               output_dir: str = "./",
-               deripple: bool = True,
-               backend: str = "matlab"):
+def _fft_window(fft_window_str: str,
+                input_fft_length: int,
+                input_overlap: int,
+                table_cache: TableCache = None):
     """
-    Synthesize data contained in some multichannel input data file.
-    Use either matlab or Python backends.
+    Look up an FFT window in ``table_cache``, computing it with
+    ``fft_window_lookup`` only the first time it is needed.
+    """
+    if table_cache is None:
+        table_cache = default_table_cache
+    fft_window_func = fft_window_lookup[fft_window_str]
+    return table_cache.get(
+        "fft_window",
+        lambda: fft_window_func(input_fft_length, input_overlap),
+        fft_window_str=fft_window_str,
+        input_fft_length=input_fft_length,
+        input_overlap=input_overlap)
 
-    Sample Matlab command:
 
-    .. code-block:: bash
-        ./build/synthesize \
-            channelized_data.dump \
-            16384 test_synthesis.dump ./ 1
+def _synthesize(input_data_file_path,
+                input_fft_length: int = None,
+                input_overlap: int = None,
+                fft_window_str: str = "no_window",
+                output_file_name: str = None,
+                output_dir: str = "./",
+                deripple: bool = True,
+                backend: str = "matlab",
+                engine: str = None,
+                block_frames: int = None,
+                table_cache: TableCache = None,
+                save_output: bool = True):
+    """
+    Generator that synthesizes data, yielding a ``(cmd_str, log_file_path)``
+    pair for each Matlab command it needs run. See :func:`synthesize`.
     """
     if input_fft_length is None:
         input_fft_length = config["input_fft_length"]
@@ -53,6 +73,7 @@ def synthesize(input_data_file_path,
     module_logger.debug((f"_synthesize: "
                          f"input_data_file_path={input_data_file_path}, "
                          f"input_fft_length={input_fft_length}, "
+                         f"save_output={save_output}, "
                          f"output_file_name={output_file_name}, "
                          f"output_dir={output_dir}"))
 
@@ -62,8 +83,18 @@ def synthesize(input_data_file_path,
     output_base, log_file_name, output_file_name = \
         util.create_output_file_names(output_file_name, output_base)
 
+    if engine is None:
+        engine = "pfb" if block_frames is None else "numpy"
+    if backend == "python" and engine not in ["pfb", "numpy"]:
+        raise RuntimeError(f"synthesize: unknown engine {engine}")
+    if block_frames is not None and \
+            (backend != "python" or engine != "numpy"):
+        raise RuntimeError(("synthesize: block_frames is only supported by "
+                            "the Python backend's numpy engine"))
+
     if backend == "matlab":
         deripple_int = 1 if deripple else 0
+        input_data_file_path = util.as_file_path(input_data_file_path)
         cmd_str = (f"{os.path.join(build_dir, matlab_cmd_str)} "
                    f"{input_data_file_path} "
                    f"{input_fft_length} "
@@ -72,28 +103,195 @@ def synthesize(input_data_file_path,
 
         module_logger.debug(f"_synthesize: cmd_str={cmd_str}")
 
-        util.run_cmd(cmd_str, log_file_path=os.path.join(
-            output_dir, log_file_name))
+        yield cmd_str, os.path.join(output_dir, log_file_name)
         return psr_formats.DADAFile(
             os.path.join(output_dir, output_file_name)).load_data()
 
+    elif backend == "python" and engine == "numpy":
+        input_data_file = util.as_dada_file(input_data_file_path)
+        fft_window = _fft_window(fft_window_str, input_fft_length,
+                                 input_overlap, table_cache)
+        return _synthesize_numpy_engine(
+            input_data_file,
+            input_fft_length=input_fft_length,
+            input_overlap=input_overlap,
+            fft_window=fft_window,
+            deripple=deripple,
+            block_frames=block_frames,
+            table_cache=table_cache,
+            output_file_path=os.path.join(output_dir, output_file_name),
+            save_output=save_output)
+
     elif backend == "python":
-        input_data_file = psr_formats.DADAFile(input_data_file_path)
-        fft_window_func = fft_window_lookup[fft_window_str]
-        fft_window = fft_window_func(input_fft_length, input_overlap)
+        input_data_file = util.as_dada_file(input_data_file_path)
+        fft_window = _fft_window(fft_window_str, input_fft_length,
+                                 input_overlap, table_cache)
         synthesizer = pfb.format_handler.PSRFormatSynthesizer(
             input_overlap=input_overlap,
             fft_window=fft_window,
             input_fft_length=input_fft_length,
             apply_deripple=deripple
         )
-        output_data_file = synthesizer(
-            input_data_file,
-            output_dir=output_dir,
-            output_file_name=output_file_name
-        )
+
+        def _write(pfb_output_dir):
+            return synthesizer(
+                input_data_file,
+                output_dir=pfb_output_dir,
+                output_file_name=output_file_name
+            )
+
+        if save_output:
+            return _write(output_dir)
+        return util.run_in_memory(
+            _write, os.path.join(output_dir, output_file_name))
+
+
+def _synthesize_numpy_engine(input_data_file: psr_formats.DADAFile,
+                             input_fft_length: int,
+                             input_overlap: int,
+                             fft_window,
+                             deripple: bool,
+                             block_frames: int,
+                             table_cache: TableCache,
+                             output_file_path: str,
+                             save_output: bool) -> psr_formats.DADAFile:
+    """
+    Synthesize with :class:`polyphase.PolyphaseSynthesizer`. With
+    ``block_frames``, the channelized data are read ``block_frames``
+    forward FFT frames at a time, and each synthesized block is appended
+    to the output file as it is computed. Mirrors the header changes
+    Matlab's ``synthesize`` makes.
+    """
+    input_data = dada.data_view(input_data_file)
+    if os.path.exists(input_data_file.file_path):
+        header = dada.read_header(input_data_file.file_path)
+    else:
+        header = dict(input_data_file.header)
+
+    os_factor_str = header["OS_FACTOR"]
+    os_nu, os_de = [int(v) for v in os_factor_str.split("/")]
+    fir_filter_coeff = None
+    if deripple:
+        fir_filter_coeff = np.array(
+            [float(c) for c in header["COEFF_0"].split(",")])
+
+    n_dat, n_chan, n_pol = input_data.shape
+    dtype = input_data.dtype
+    header = dada.create_header(header, n_chan=1, n_pol=n_pol, dtype=dtype)
+    header["TSAMP"] = str(float(header["TSAMP"]) * os_nu / os_de / n_chan)
+
+    synthesizer = polyphase.PolyphaseSynthesizer(
+        n_chan, n_pol, input_fft_length, os_factor_str,
+        input_overlap=input_overlap,
+        fft_window=fft_window,
+        fir_filter_coeff=fir_filter_coeff,
+        dc_chan=header.get("PFB_DC_CHAN", "1") == "1",
+        block_frames=block_frames,
+        table_cache=table_cache)
+
+    output_data_file = psr_formats.DADAFile(output_file_path)
+    output_data_file.header = header
+    if save_output and block_frames is not None:
+        # leave the data on disk; callers load it if they need to
+        dada.stream_data(output_file_path, header, (
+            block.astype(dtype)[:, np.newaxis, :]
+            for block in synthesizer.iter_blocks(input_data)))
         return output_data_file
 
+    output_data = synthesizer(input_data).astype(dtype)[:, np.newaxis, :]
+    if save_output:
+        dada.stream_data(output_file_path, header, [output_data])
+    output_data_file.data = output_data
+    return output_data_file
+
+
+@partialize.partialize
+def synthesize(input_data_file_path,
+               input_fft_length: int = None,
+               input_overlap: int = None,
+               fft_window_str: str = "no_window",
+               output_file_name: str = None,
+               output_dir: str = "./",
+               deripple: bool = True,
+               backend: str = "matlab",
+               engine: str = None,
+               block_frames: int = None,
+               table_cache: TableCache = None,
+               save_output: bool = True,
+               matlab_worker: MatlabWorker = None):
+    """
+    Synthesize data contained in some multichannel input data file.
+    Use either matlab or Python backends.
+
+    ``input_data_file_path`` can also be a ``DADAFile`` object. With the
+    Python backend its data are used directly, without reading from disk.
+    With ``save_output=False``, the Python backend returns the
+    synthesized ``DADAFile`` with its data in memory, and nothing is
+    written to ``output_dir``. The "pfb" engine can only write its
+    output, so it writes to a temporary directory that is removed once
+    the data are loaded.
+
+    With the Python backend, ``engine`` is either "pfb", the default,
+    which uses ``pfb.format_handler.PSRFormatSynthesizer``, or "numpy",
+    which uses :class:`polyphase.PolyphaseSynthesizer`. The latter
+    transforms all channels and polarizations of many frames with single
+    batched FFT calls, into buffers that are reused from one block to the
+    next, and logs its throughput in frames per second.
+
+    ``block_frames`` streams the "numpy" engine: the channelized file is
+    memory mapped and read ``block_frames`` forward FFT frames at a time,
+    and each block's inverted time series is appended to the output file
+    as it is computed, so peak memory no longer depends on the length of
+    the input. With ``block_frames`` and ``save_output=True``, the
+    returned ``DADAFile`` has not had its data loaded.
+
+    Both engines' FFT window, and the numpy engine's deripple response
+    and phase ramp, are looked up in ``table_cache``, a
+    :class:`TableCache`, so they are only computed once for any number of
+    files synthesized with the same parameters. Pass a ``TableCache`` with
+    a ``cache_dir`` to share them between processes and runs. The "pfb"
+    engine computes its own deripple response from the input file's
+    filter coefficients, as ``PSRFormatSynthesizer`` only takes whether
+    to apply one.
+
+    If ``matlab_worker`` is provided, the Matlab backend runs as a job on
+    that long lived :class:`MatlabWorker`, rather than starting a new
+    executable.
+
+    Sample Matlab command:
+
+    .. code-block:: bash
+        ./build/synthesize \
+            channelized_data.dump \
+            16384 test_synthesis.dump ./ 1
+    """
+    return util.run_cmd_steps(_synthesize(
+        input_data_file_path,
+        input_fft_length=input_fft_length,
+        input_overlap=input_overlap,
+        fft_window_str=fft_window_str,
+        output_file_name=output_file_name,
+        output_dir=output_dir,
+        deripple=deripple,
+        backend=backend,
+        engine=engine,
+        block_frames=block_frames,
+        table_cache=table_cache,
+        save_output=save_output),
+        matlab_worker=matlab_worker)
+
+
+async def synthesize_async(input_data_file_path,
+                           semaphore: asyncio.Semaphore = None,
+                           matlab_worker: MatlabWorker = None,
+                           **kwargs):
+    """
+    asyncio variant of :func:`synthesize`. See :func:`channelize_async`.
+    """
+    return await util.run_cmd_steps_async(
+        _synthesize(input_data_file_path, **kwargs),
+        semaphore=semaphore, matlab_worker=matlab_worker)
+
 
 def create_parser():
 
@@ -108,6 +306,22 @@ def create_parser():
     parser.add_argument("-fft", "--input_fft_length",
                         dest="input_fft_length", type=int, required=True)
 
+    parser.add_argument("-ov", "--input_overlap",
+                        dest="input_overlap", type=int, required=False)
+
+    parser.add_argument("-e", "--engine",
+                        dest="engine", type=str, required=False,
+                        default=None,
+                        help=("Specify a Python backend engine, "
+                              "either \"pfb\", the default, or \"numpy\""))
+
+    parser.add_argument("-bf", "--block-frames",
+                        dest="block_frames", type=int, required=False,
+                        default=None,
+                        help=("Synthesize this many forward FFT frames at "
+                              "a time, streaming the output to disk. "
+                              "Requires the numpy engine"))
+
     parser.add_argument("-b", "--backend",
                         dest="backend", type=str, required=False,
                         default="python",
@@ -136,6 +350,9 @@ if __name__ == "__main__":
         synthesizer(
             file_path,
             input_fft_length=parsed.input_fft_length,
+            input_overlap=parsed.input_overlap,
+            engine=parsed.engine,
+            block_frames=parsed.block_frames,
             output_dir=parsed.output_dir,
             output_file_name=output_file_name
         )
@@ -0,0 +1,145 @@
+import collections
+import hashlib
+import json
+import logging
+import os
+import threading
+import typing
+import uuid
+
+import numpy as np
+
+from .cache import file_hash, _to_json
+
+__all__ = [
+    "TableCache",
+    "default_table_cache"
+]
+
+module_logger = logging.getLogger(__name__)
+
+
+class TableCache:
+    """
+    Memoized lookup tables, like FFT windows and deripple responses, that
+    are identical for every file processed with the same parameters.
+
+    Tables are kept in an in-process least recently used cache of at most
+    ``max_entries`` tables. If ``cache_dir`` is provided, tables are also
+    saved there as ``.npy`` files, so that other processes, and later runs,
+    load them rather than computing them again.
+
+    Returned tables are read only, as they are shared between callers.
+
+    Usage:
+
+    .. code-block:: python
+
+        tables = TableCache("data/tables")
+        synthesizer = synthesize(backend="python", table_cache=tables)
+
+    Args:
+        cache_dir (str): Optional directory for ``.npy`` tables
+        max_entries (int): Maximum number of tables held in memory
+    """
+
+    def __init__(self, cache_dir: str = None, max_entries: int = 64):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._tables = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, table_name: str, **params) -> str:
+        """
+        Create a table key from the table's name and parameters. Array
+        parameters are replaced by the hash of their contents, and any
+        parameter ending in ``_file_path`` by the hash of the file's
+        contents.
+        """
+        params = dict(params)
+        for name, value in params.items():
+            if isinstance(value, np.ndarray):
+                params[name] = hashlib.sha256(
+                    memoryview(np.ascontiguousarray(value))).hexdigest()
+            elif name.endswith("_file_path") and value is not None:
+                params[name] = file_hash(value)
+        params_str = json.dumps(params, sort_keys=True, default=_to_json)
+        params_hash = hashlib.sha256(params_str.encode("utf-8")).hexdigest()
+        return f"{table_name}.{params_hash}"
+
+    def get(self,
+            table_name: str,
+            compute: typing.Callable[[], np.ndarray],
+            **params) -> np.ndarray:
+        """
+        Get a table, calling ``compute`` only if it is neither in memory
+        nor on disk.
+
+        Args:
+            table_name (str): Name of the kind of table, eg "fft_window"
+            compute (callable): Creates the table
+            params (dict): Everything the table depends on
+        Returns:
+            np.ndarray: read only table
+        """
+        key = self.key(table_name, **params)
+        with self._lock:
+            if key in self._tables:
+                self._tables.move_to_end(key)
+                self.hits += 1
+                return self._tables[key]
+
+        table = self._load(key)
+        if table is None:
+            module_logger.debug(f"TableCache.get: computing {key}")
+            table = np.array(compute())
+            self._save(key, table)
+            self.misses += 1
+        else:
+            self.hits += 1
+        table.setflags(write=False)
+
+        with self._lock:
+            self._tables[key] = table
+            self._tables.move_to_end(key)
+            while len(self._tables) > self.max_entries:
+                self._tables.popitem(last=False)
+        return table
+
+    def clear(self) -> None:
+        """
+        Forget the tables held in memory. Tables on disk are kept.
+        """
+        with self._lock:
+            self._tables.clear()
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _load(self, key: str) -> typing.Optional[np.ndarray]:
+        if self.cache_dir is None:
+            return None
+        try:
+            return np.load(self._cache_path(key), allow_pickle=False)
+        except FileNotFoundError:
+            return None
+        except ValueError as err:
+            # partially written or otherwise corrupt table
+            module_logger.error(f"TableCache._load: {key}: {err}")
+            return None
+
+    def _save(self, key: str, table: np.ndarray) -> None:
+        if self.cache_dir is None:
+            return
+        cache_path = self._cache_path(key)
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, table, allow_pickle=False)
+        os.replace(tmp_path, cache_path)
+
+
+default_table_cache = TableCache()
@@ -1,28 +1,40 @@
 import os
 import argparse
+import asyncio
 import subprocess
 import shlex
 import json
 import functools
+import tempfile
 
 import matplotlib.pyplot as plt
 import numpy as np
+import psr_formats
+
+from .catalog import (
+    TestVectorCatalog,
+    catalog_file_name,
+    meta_data_file_name,
+    test_data_sub_dir)
 
 __all__ = [
     "updir",
     "curdir",
     "run_cmd",
+    "run_cmd_async",
+    "run_cmd_steps",
+    "run_cmd_steps_async",
     "find_existing_test_data",
     "create_output_file_names",
+    "as_dada_file",
+    "as_file_path",
+    "run_in_memory",
     "matlab_dtype_lookup",
     "coro",
     "rpartial"
 ]
 
 
-meta_data_file_name = "meta.json"
-
-
 matlab_dtype_lookup = {
     np.float32: "single",
     np.float64: "double",
@@ -31,43 +43,37 @@ matlab_dtype_lookup = {
 }
 
 
-def find_existing_test_data(base_dir, domain_name, params):
+def find_existing_test_data(base_dir, domain_name, params, catalog=None):
     """
-    Determine if any existing test data exist in given base_dir
+    Determine if any existing test data exist in given base_dir. If a
+    :class:`TestVectorCatalog` is given, or one exists in base_dir, the
+    catalog is queried, otherwise the file system is probed directly.
 
     Args:
         base_dir (str): The base directory from where search will begin
         domain_name (str): "time" or "freq"
         params (tuple or dict): Dictionary or tuple of arguments for
             test vector creation
+        catalog (TestVectorCatalog, optional): Catalog of test vectors
     """
+    catalog_file_path = os.path.join(base_dir, catalog_file_name)
+    if catalog is None and os.path.exists(catalog_file_path):
+        with TestVectorCatalog(catalog_file_path) as catalog:
+            return find_existing_test_data(
+                base_dir, domain_name, params, catalog=catalog)
 
-    arg_order = {
-        "time": ("offset", "width"),
-        "freq": ("frequency", "phase", "bin_offset")
-    }
-
-    sub_dir_format_map = {
-        "time": "o-{offset:.3f}_w-{width:.3f}",
-        "freq": "f-{frequency:.3f}_b-{bin_offset:.3f}_p-{phase:.3f}"
-    }
-
-    sub_dir_formatter = sub_dir_format_map[domain_name]
-
-    if not hasattr(params, "keys"):
-        params_dict = {
-            arg_name: params[i]
-            for i, arg_name in enumerate(arg_order[domain_name])
-        }
-    else:
-        params_dict = params
+    if catalog is not None:
+        entry = catalog.lookup(domain_name, params)
+        if entry is None:
+            return None
+        return entry["meta_data"]
 
-    sub_dir = sub_dir_formatter.format(**params_dict)
+    sub_dir = test_data_sub_dir(domain_name, params)
 
     sub_dir_full = os.path.join(base_dir, domain_name, sub_dir)
     meta_data = None
     if os.path.exists(sub_dir_full):
-        meta_data_file_path = os.path.join(sub_dir, meta_data_file_name)
+        meta_data_file_path = os.path.join(sub_dir_full, meta_data_file_name)
         with open(meta_data_file_path, 'r') as f:
             meta_data = json.load(f)
 
@@ -91,6 +97,87 @@ def run_cmd(cmd_str: str, log_file_path: str = None):
     return cmd
 
 
+async def run_cmd_async(cmd_str: str,
+                        log_file_path: str = None,
+                        semaphore: asyncio.Semaphore = None):
+    """
+    asyncio counterpart of :func:`run_cmd`. Output is written to the log
+    file as it is produced, rather than when the command exits. If a
+    semaphore is given, it is held for as long as the command runs, which
+    bounds the number of commands in flight.
+
+    Usage:
+
+    .. code-block:: python
+
+        semaphore = asyncio.Semaphore(4)
+        await asyncio.gather(*[
+            run_cmd_async(cmd_str, log_file_path=f"{i}.log",
+                          semaphore=semaphore)
+            for i, cmd_str in enumerate(cmd_strs)])
+    """
+    if semaphore is not None:
+        async with semaphore:
+            return await run_cmd_async(cmd_str, log_file_path=log_file_path)
+
+    cmd_split = shlex.split(cmd_str)
+    if log_file_path is not None:
+        cmd = await asyncio.create_subprocess_exec(
+            *cmd_split,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT)
+        with open(log_file_path, "wb") as log_file:
+            async for line in cmd.stdout:
+                log_file.write(line)
+                log_file.flush()
+    else:
+        cmd = await asyncio.create_subprocess_exec(*cmd_split)
+
+    if await cmd.wait() != 0:
+        raise RuntimeError("Exited with non zero status")
+
+    return cmd
+
+
+def run_cmd_steps(steps, matlab_worker=None):
+    """
+    Drive a generator that yields ``(cmd_str, log_file_path)`` pairs for
+    each command it needs run, and returns some result once done. If a
+    :class:`MatlabWorker` is given, commands are run as jobs on it,
+    rather than as new processes.
+    """
+    _run_cmd = run_cmd if matlab_worker is None else matlab_worker.run_cmd
+    try:
+        cmd_args = next(steps)
+        while True:
+            _run_cmd(*cmd_args)
+            cmd_args = steps.send(None)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def run_cmd_steps_async(steps,
+                              semaphore: asyncio.Semaphore = None,
+                              matlab_worker=None):
+    """
+    asyncio counterpart of :func:`run_cmd_steps`, running each command
+    with :func:`run_cmd_async`, or, if a :class:`MatlabWorker` is given,
+    as a job on the worker in a separate thread.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        cmd_args = next(steps)
+        while True:
+            if matlab_worker is None:
+                await run_cmd_async(*cmd_args, semaphore=semaphore)
+            else:
+                await loop.run_in_executor(
+                    None, matlab_worker.run_cmd, *cmd_args)
+            cmd_args = steps.send(None)
+    except StopIteration as stop:
+        return stop.value
+
+
 def create_output_file_names(output_file_name, default_base):
     if output_file_name is None:
         output_base = default_base
@@ -102,6 +189,68 @@ def create_output_file_names(output_file_name, default_base):
     return output_base, log_file_name, output_file_name
 
 
+def as_dada_file(input_data_file) -> psr_formats.DADAFile:
+    """
+    Get a DADAFile object from either a path to a DADA file, or some
+    DADAFile like object, which is returned as is. This allows DADAFile
+    objects whose data only reside in memory to be passed between stages.
+    """
+    if hasattr(input_data_file, "file_path"):
+        return input_data_file
+    return psr_formats.DADAFile(input_data_file)
+
+
+def as_file_path(input_data_file) -> str:
+    """
+    Get the path to a DADA file from either a path or a DADAFile like
+    object. If the object's data only reside in memory, they get dumped
+    first.
+    """
+    if hasattr(input_data_file, "file_path"):
+        if not os.path.exists(input_data_file.file_path):
+            input_data_file.dump_data()
+        return input_data_file.file_path
+    return input_data_file
+
+
+def run_in_memory(write_func: callable,
+                  output_file_path: str) -> psr_formats.DADAFile:
+    """
+    Get the product of a stage that can only write its output to disk, like
+    ``pfb``'s channelizer and synthesizer, as a DADAFile whose data reside
+    in memory. ``write_func`` is called with a temporary output directory,
+    which is removed once the product's data are loaded, so nothing is
+    written next to ``output_file_path``, the path the returned object
+    reports.
+
+    Usage:
+
+    .. code-block:: python
+
+        dada_file = run_in_memory(
+            lambda output_dir: synthesizer(
+                input_file, output_dir=output_dir,
+                output_file_name="synthesized.dump"),
+            "./synthesized.dump")
+
+    Args:
+        write_func (callable): Called with an output directory, returns
+            the DADAFile it wrote there.
+        output_file_path (str): Path reported by the returned DADAFile
+    """
+    with tempfile.TemporaryDirectory(
+            prefix=".in_memory.",
+            dir=os.path.dirname(output_file_path) or None) as tmp_dir:
+        written = write_func(tmp_dir)
+        if written.data is None:
+            written.load_data()
+    # setting a DADAFile's file_path drops its header and data
+    dada_file = psr_formats.DADAFile(output_file_path)
+    dada_file.header = written.header
+    dada_file.data = written.data
+    return dada_file
+
+
 def report2plot(
     report_file_path: str,
     desired_keys: list = None,
@@ -183,7 +332,7 @@ def coro(func):
 
 
 def rpartial(func, *args, **kwargs):
-    return lambda *a: func(*(a + args), **kwargs)
+    return lambda *a, **kw: func(*(a + args), **{**kwargs, **kw})
 
 
 def create_parser():
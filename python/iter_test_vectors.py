@@ -3,7 +3,9 @@ import typing
 
 
 def iter_test_vectors(base_dir: str,
-                      domain_sub_dirs: typing.List[str] = None) -> None:
+                      domain_sub_dirs: typing.List[str] = None,
+                      catalog=None,
+                      skip_processed: bool = False) -> None:
     """
     Iterate through all the sub directories in the base directory, yielding
     each subdirectory.
@@ -12,12 +14,29 @@ def iter_test_vectors(base_dir: str,
         base_dir (str): The base directory where test vectors are found.
         domain_sub_dirs (list, optional): A specific set of sub directories
             under `base_dir` under which to look for data.
+        catalog (TestVectorCatalog, optional): If given, sub directories
+            are taken from the catalog rather than listed from disk.
+        skip_processed (bool, optional): Skip sub directories the catalog
+            marks as processed.
     Returns:
         generator: yields each subdirectory.
     """
     if domain_sub_dirs is None:
-        domain_sub_dirs = os.listdir(base_dir)
+        if catalog is not None:
+            domain_sub_dirs = ["time", "freq"]
+        else:
+            domain_sub_dirs = [
+                name for name in os.listdir(base_dir)
+                if os.path.isdir(os.path.join(base_dir, name))]
     for domain in domain_sub_dirs:
+        if catalog is not None:
+            for entry in catalog.find(domain):
+                if skip_processed and entry["processed"]:
+                    continue
+                yield domain, entry["sub_dir"]
+            continue
         sub_dir = os.path.join(base_dir, domain)
         for sub_sub_dir in os.listdir(sub_dir):
-            yield domain, os.path.join(sub_dir, sub_sub_dir)
+            sub_sub_dir = os.path.join(sub_dir, sub_sub_dir)
+            if os.path.isdir(sub_sub_dir):
+                yield domain, sub_sub_dir
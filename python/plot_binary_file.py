@@ -10,7 +10,8 @@ from compare_dump_files import load_binary_data, dtype_map
 module_logger = logging.getLogger(__name__)
 
 
-def plot_binary_files(*file_paths: str, dtype=None, offset=0):
+def plot_binary_files(*file_paths: str, dtype=None, offset=0,
+                      count=None, stride=1):
 
     module_logger.debug(f"Plotting {len(file_paths)} files")
 
@@ -21,7 +22,8 @@ def plot_binary_files(*file_paths: str, dtype=None, offset=0):
         if f.endswith(".npy"):
             data.append(np.load(f).flatten())
         else:
-            data.append(load_binary_data(f, dtype=dtype, offset=offset))
+            data.append(load_binary_data(f, dtype=dtype, offset=offset,
+                                         count=count, stride=stride))
 
     iscomplex = np.iscomplexobj(data[0])
     n_z = 2 if iscomplex else 1
@@ -67,6 +69,17 @@ def create_parser():
                         default=0,
                         help=("Specify the data location (in bytes) in "
                               "the binary file."))
+
+    parser.add_argument("--count",
+                        dest="count", type=int, required=False,
+                        default=None,
+                        help=("Specify the number of elements to plot. "
+                              "Defaults to all elements after offset."))
+
+    parser.add_argument("--stride",
+                        dest="stride", type=int, required=False,
+                        default=1,
+                        help="Plot every stride-th element.")
     return parser
 
 
@@ -80,7 +93,9 @@ def main():
     plot_binary_files(
         *parsed.input_file_paths,
         dtype=dtype_map[parsed.dtype],
-        offset=parsed.offset
+        offset=parsed.offset,
+        count=parsed.count,
+        stride=parsed.stride
     )
 
 
@@ -1,15 +1,15 @@
 import sys
 
-import psr_formats
 import numpy as np
 
 import matplotlib.pyplot as plt
 
+from data_gen import dada
+
 
 def plot_dada_file(file_path: str):
-    dada_file = psr_formats.DADAFile(file_path).load_data()
-    nchan = dada_file.nchan
-    npol = dada_file.npol
+    data, header = dada.load_memmap(file_path)
+    _, nchan, npol = data.shape
 
     fig, axes = plt.subplots(npol, 1)
     if not hasattr(axes, "__getitem__"):
@@ -21,14 +21,14 @@ def plot_dada_file(file_path: str):
 
     if nchan == 1:
         for ipol in range(npol):
-            axes[ipol].plot(np.abs(dada_file.data[:, 0, ipol]))
+            axes[ipol].plot(np.abs(data[:, 0, ipol]))
             axes[ipol].set_ylabel("Amplitude")
     else:
         imshow_kwargs = dict(
             aspect="auto"
         )
         for ipol in range(npol):
-            axes[ipol].imshow(np.abs(dada_file.data[:, :, ipol].T), **imshow_kwargs)
+            axes[ipol].imshow(np.abs(data[:, :, ipol].T), **imshow_kwargs)
             axes[ipol].set_ylabel("Channels")
 
     plt.show()
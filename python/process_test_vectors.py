@@ -11,7 +11,9 @@ from run_dspsr_with_dump import run_dspsr_with_dump, load_pulsar_params
 from iter_test_vectors import iter_test_vectors
 from compare_dump_files import load_n_chop
 from data_gen import (
-    generate_test_vector, channelize, synthesize, meta_data_file_name)
+    generate_test_vector, channelize, synthesize, meta_data_file_name,
+    TestVectorCatalog)
+from data_gen.catalog import catalog_file_name
 
 cur_dir = os.path.dirname(os.path.abspath(__file__))
 product_dir = os.path.join(os.path.dirname(cur_dir), "products")
@@ -64,7 +66,8 @@ def load_data_single_dir(sub_dir: str,
 def process_single_dir(sub_dir: str,
                        pulsar_params: dict = None,
                        fft_size: int = 16384,
-                       dump_stage: str = "Convolution") -> None:
+                       dump_stage: str = "Convolution",
+                       catalog: TestVectorCatalog = None) -> None:
     if not os.path.exists(sub_dir):
         raise RuntimeError(f"Can't find directory {sub_dir}")
 
@@ -101,6 +104,10 @@ def process_single_dir(sub_dir: str,
     with open(meta_data_file_path, 'w') as f:
         json.dump(meta_data, f)
 
+    if catalog is not None:
+        catalog.add(sub_dir, os.path.basename(os.path.dirname(sub_dir)),
+                    meta_data=meta_data, processed=True)
+
     return meta_data
 
 
@@ -108,7 +115,9 @@ def process_test_vectors(*args: tuple,
                          fft_size: int = 16384,
                          pulsar_params: dict = None,
                          dump_stage: str = "Convolution",
-                         plot: bool = True):
+                         plot: bool = True,
+                         catalog: TestVectorCatalog = None,
+                         skip_processed: bool = False):
     figsize = (16, 9)
     comp = comparator.MultiDomainComparator(domains={
         "time": comparator.SingleDomainComparator("time"),
@@ -125,11 +134,12 @@ def process_test_vectors(*args: tuple,
     comp.products["max"] = np.amax
     labels = ["input", "inverted", "dspsr_inverted"]
     report = {"time": [], "freq": []}
-    for domain_dir, sub_dir in iter_test_vectors(*args):
+    for domain_dir, sub_dir in iter_test_vectors(
+            *args, catalog=catalog, skip_processed=skip_processed):
         key = key_map[domain_dir]
         meta_data = process_single_dir(
             sub_dir, fft_size=fft_size, pulsar_params=pulsar_params,
-            dump_stage=dump_stage)
+            dump_stage=dump_stage, catalog=catalog)
         loaded, dada_files = load_data_single_dir(sub_dir, meta_data)
         loaded[-1] /= 8*fft_size
         res = {
@@ -223,6 +233,11 @@ def create_parser():
     parser.add_argument("-pl", "--plot",
                         dest="plot", action="store_true")
 
+    parser.add_argument("--skip-processed",
+                        dest="skip_processed", action="store_true",
+                        help=("Skip test vectors already marked as "
+                              "processed in the catalog"))
+
     parser.add_argument("-v", "--verbose",
                         dest="verbose", action="store_true")
 
@@ -239,13 +254,20 @@ def main():
     # generate_test_vector("time", n_pol=2)(1000, 0.1, 1, np.float32)
     pulsar_params = load_pulsar_params()
 
+    catalog = TestVectorCatalog(
+        os.path.join(parsed.base_dir, catalog_file_name))
+    catalog.index_directory(parsed.base_dir)
+
     report = process_test_vectors(
         parsed.base_dir,
         fft_size=parsed.fft_size,
         pulsar_params=pulsar_params,
         dump_stage="Convolution",
-        plot=parsed.plot
+        plot=parsed.plot,
+        catalog=catalog,
+        skip_processed=parsed.skip_processed
     )
+    catalog.close()
     with open(os.path.join(product_dir, "report.json"), "w") as f:
         json.dump(report, f, cls=comparator.util.NumpyEncoder)
 
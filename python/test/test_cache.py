@@ -0,0 +1,71 @@
+import unittest
+import logging
+import os
+import shutil
+
+from data_gen.cache import ProductCache
+from data_gen.util import curdir
+
+cur_dir = curdir(__file__)
+
+
+class TestProductCache(unittest.TestCase):
+
+    cache_dir = os.path.join(cur_dir, "test_cache")
+    product_file_path = os.path.join(cur_dir, "test_cache_product.dump")
+
+    def setUp(self):
+        self.cache = ProductCache(self.cache_dir, max_bytes=3500)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        if os.path.exists(self.product_file_path):
+            os.remove(self.product_file_path)
+
+    def create_product(self, contents: bytes = b"0"*1000):
+        if os.path.exists(self.product_file_path):
+            os.remove(self.product_file_path)
+        with open(self.product_file_path, "wb") as f:
+            f.write(contents)
+
+    def test_key(self):
+        key = self.cache.key(domain_name="time", args=([10], [1]))
+        self.assertTrue(
+            key == self.cache.key(args=([10], [1]), domain_name="time"))
+        self.assertTrue(
+            key != self.cache.key(domain_name="time", args=([11], [1])))
+
+    def test_fetch_store(self):
+        key = self.cache.key(domain_name="time", args=([10], [1]))
+        self.assertFalse(self.cache.fetch(key, self.product_file_path))
+
+        self.create_product(b"1"*1000)
+        self.cache.store(key, self.product_file_path)
+        os.remove(self.product_file_path)
+
+        self.assertTrue(self.cache.fetch(key, self.product_file_path))
+        with open(self.product_file_path, "rb") as f:
+            self.assertTrue(f.read() == b"1"*1000)
+        self.assertTrue(
+            self.cache.key_for_file(self.product_file_path) == key)
+
+    def test_evict(self):
+        keys = [self.cache.key(offset=i) for i in range(3)]
+        for idx, key in enumerate(keys):
+            self.create_product()
+            self.cache.store(key, self.product_file_path)
+            # explicit, well separated times, rather than relying on the
+            # resolution of the file system's timestamps
+            time_ns = (idx + 1) * 10**9
+            os.utime(self.cache._cache_path(key), ns=(time_ns, time_ns))
+        self.cache.fetch(keys[0], self.product_file_path)
+        self.create_product()
+        self.cache.store(self.cache.key(offset=3), self.product_file_path)
+
+        self.assertTrue(self.cache.fetch(keys[0], self.product_file_path))
+        self.assertFalse(self.cache.fetch(keys[1], self.product_file_path))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import logging
+import json
+import os
+import shutil
+
+from data_gen import catalog, util
+from data_gen.util import curdir
+
+cur_dir = curdir(__file__)
+
+
+class TestTestVectorCatalog(unittest.TestCase):
+
+    base_dir = os.path.join(cur_dir, "test_catalog")
+
+    def setUp(self):
+        self.freq_params = [(0.1, 0.785, 0.1), (0.2, 0.0, 0.3)]
+        for params in self.freq_params:
+            sub_dir = os.path.join(
+                self.base_dir, "freq", catalog.test_data_sub_dir(
+                    "freq", params))
+            os.makedirs(sub_dir)
+            with open(os.path.join(sub_dir, "input.dump"), "wb") as f:
+                f.write(bytes(100))
+            meta_data = {"freq_position": str(params[0]),
+                         "input_file": "input.dump"}
+            with open(os.path.join(
+                    sub_dir, catalog.meta_data_file_name), "w") as f:
+                json.dump(meta_data, f)
+        self.db_path = os.path.join(self.base_dir, catalog.catalog_file_name)
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def test_index_directory(self):
+        with catalog.TestVectorCatalog(self.db_path) as cat:
+            self.assertTrue(cat.index_directory(self.base_dir) == 2)
+            self.assertTrue(cat.index_directory(self.base_dir) == 0)
+            entry = cat.lookup("freq", self.freq_params[1])
+            self.assertTrue(entry["meta_data"]["freq_position"] == "0.2")
+            self.assertTrue(entry["frequency"] == 0.2)
+            products = cat.products(entry["sub_dir"])
+            self.assertTrue("input_file" in products)
+            self.assertTrue(cat.lookup("freq", (0.3, 0.0, 0.0)) is None)
+
+    def test_index_directory_skips_unknown(self):
+        os.makedirs(os.path.join(self.base_dir, "freq", "scratch"))
+        os.makedirs(os.path.join(self.base_dir, "freq", "x-1.000"))
+        with catalog.TestVectorCatalog(self.db_path) as cat:
+            self.assertTrue(cat.index_directory(self.base_dir) == 2)
+            self.assertTrue(len(cat.find("freq")) == 2)
+
+    def test_find(self):
+        with catalog.TestVectorCatalog(self.db_path) as cat:
+            cat.index_directory(self.base_dir)
+            self.assertTrue(len(cat.find("freq")) == 2)
+            self.assertTrue(len(cat.find("freq", frequency=(0.15, 1.0))) == 1)
+            self.assertTrue(len(cat.find("time")) == 0)
+
+    def test_mark_processed(self):
+        with catalog.TestVectorCatalog(self.db_path) as cat:
+            cat.index_directory(self.base_dir)
+            sub_dir = cat.lookup("freq", self.freq_params[0])["sub_dir"]
+            self.assertFalse(cat.is_processed(sub_dir))
+            cat.mark_processed(sub_dir)
+            self.assertTrue(cat.is_processed(sub_dir))
+
+    def test_find_existing_test_data(self):
+        params = {"frequency": 0.1, "phase": 0.785, "bin_offset": 0.1}
+        meta_data = util.find_existing_test_data(
+            self.base_dir, "freq", params)
+        self.assertTrue(meta_data["freq_position"] == "0.1")
+        with catalog.TestVectorCatalog(self.db_path) as cat:
+            cat.index_directory(self.base_dir)
+        meta_data = util.find_existing_test_data(
+            self.base_dir, "freq", params)
+        self.assertTrue(meta_data["freq_position"] == "0.1")
+        self.assertTrue(util.find_existing_test_data(
+            self.base_dir, "time", (0.1, 1)) is None)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
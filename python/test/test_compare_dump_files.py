@@ -0,0 +1,70 @@
+import unittest
+import logging
+import os
+import shutil
+
+import numpy as np
+
+from compare_dump_files import load_binary_data, load_n_chop_binary
+from data_gen.util import curdir
+
+cur_dir = curdir(__file__)
+
+
+class TestLoadBinaryData(unittest.TestCase):
+
+    data_dir = os.path.join(cur_dir, "test_compare_dump_files")
+
+    def setUp(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.file_paths = [os.path.join(self.data_dir, f"{n}.dat")
+                           for n in [100, 90]]
+        for file_path, n in zip(self.file_paths, [100, 90]):
+            np.arange(n, dtype=np.float32).tofile(file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def test_load_binary_data(self):
+        file_path = self.file_paths[0]
+        expected = np.arange(100, dtype=np.float32)
+
+        data = load_binary_data(file_path, np.float32)
+        self.assertTrue(np.array_equal(data, expected))
+
+        # offset is in bytes
+        data = load_binary_data(file_path, np.float32, offset=40)
+        self.assertTrue(np.array_equal(data, expected[10:]))
+
+        data = load_binary_data(file_path, np.float32, offset=40, count=5)
+        self.assertTrue(np.array_equal(data, expected[10:15]))
+
+        data = load_binary_data(file_path, np.float32, stride=3)
+        self.assertTrue(np.array_equal(data, expected[::3]))
+
+        data = load_binary_data(
+            file_path, np.float32, offset=4, count=4, stride=7)
+        self.assertTrue(np.array_equal(data, expected[1::7][:4]))
+
+        # count is capped at the number of elements in the file
+        data = load_binary_data(file_path, np.float32, offset=360, count=50)
+        self.assertTrue(np.array_equal(data, expected[90:]))
+
+        data = load_binary_data(file_path, np.float32, offset=400)
+        self.assertTrue(data.shape == (0,))
+
+    def test_load_n_chop_binary(self):
+        data = load_n_chop_binary(*self.file_paths, dtype=np.float32)
+        self.assertTrue(all(d.shape == (90,) for d in data))
+        self.assertTrue(np.array_equal(data[0], data[1]))
+
+        data = load_n_chop_binary(
+            *self.file_paths, dtype=np.float32, offset=8, stride=4)
+        expected = np.arange(2, 90, 4, dtype=np.float32)
+        for d in data:
+            self.assertTrue(np.array_equal(d, expected))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import logging
+import os
+
+import numpy as np
+
+from data_gen import dada
+from data_gen.config import config_dir
+from data_gen.util import curdir
+
+cur_dir = curdir(__file__)
+
+
+class TestDADA(unittest.TestCase):
+
+    file_path = os.path.join(cur_dir, "test_dada.dump")
+    header_template = os.path.join(config_dir, "default_header.json")
+
+    def setUp(self):
+        self.data = (np.random.rand(1000, 4, 2) +
+                     1j*np.random.rand(1000, 4, 2)).astype(np.complex64)
+        header = dada.create_header(
+            dada.load_header_template(self.header_template),
+            n_chan=4, n_pol=2, dtype=np.complex64)
+        dada.stream_data(
+            self.file_path, header,
+            (self.data[i:i+300] for i in range(0, 1000, 300)))
+
+    def tearDown(self):
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+    def test_read_header(self):
+        header = dada.read_header(self.file_path)
+        self.assertTrue(header["HDR_SIZE"] == "4096")
+        self.assertTrue(header["NCHAN"] == "4")
+        self.assertTrue(header["NPOL"] == "2")
+        self.assertTrue(header["NBIT"] == "32")
+        self.assertTrue(header["NDIM"] == "2")
+        self.assertTrue(header["UTC_START"] == "2019-02-05-01:15:49")
+
+    def test_load_memmap(self):
+        data, header = dada.load_memmap(self.file_path)
+        self.assertTrue(data.shape == self.data.shape)
+        self.assertTrue(data.dtype == np.complex64)
+        self.assertTrue(np.array_equal(data, self.data))
+        self.assertTrue(np.array_equal(data[:, 2, 1], self.data[:, 2, 1]))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import asyncio
 import logging
 import os
 import glob
@@ -6,9 +7,12 @@ import time
 
 import numpy as np
 
-from data_gen.generate_test_vector import generate_test_vector
-from data_gen.channelize import channelize
+from data_gen import dada
+from data_gen.generate_test_vector import (
+    generate_test_vector, complex_sinusoid, time_domain_impulse, noise)
+from data_gen.channelize import channelize, channelize_async
 from data_gen.synthesize import synthesize
+from data_gen.pipeline import pipeline
 from data_gen.util import curdir
 
 cur_dir = curdir(__file__)
@@ -79,6 +83,29 @@ class TestGenerateTestVector(data_gen_test_case_factory()):
                               output_file_name="noise.dump",
                               output_dir="./", n_pol=2)
 
+    def test_generate_test_vectors_python_streaming(self):
+        import psr_formats
+
+        for domain_name, args in [("time", self.time_domain_args),
+                                  ("freq", self.freq_domain_args)]:
+            generator = generate_test_vector(
+                backend="python", domain_name=domain_name)
+            kwargs = dict(n_pol=2, output_dir=output_dir,
+                          dtype=np.complex64)
+            expected = generator(
+                *args, output_file_name=f"{domain_name}.dump", **kwargs)
+            streamed = generator(
+                *args, output_file_name=f"{domain_name}.streamed.dump",
+                block_size=128, **kwargs)
+            self.assertTrue(dada.read_header(streamed.file_path) ==
+                            dada.read_header(expected.file_path))
+            streamed = psr_formats.DADAFile(streamed.file_path).load_data()
+            self.assertTrue(streamed.data.shape == expected.data.shape)
+            self.assertTrue(np.allclose(streamed.data, expected.data))
+            with self.assertRaises(RuntimeError):
+                generator(*args, block_size=128, save_output=False,
+                          **kwargs)
+
     def test_generate_test_vectors_default_name(self):
         original_val = self.time_domain_kwargs["output_file_name"]
 
@@ -95,6 +122,45 @@ class TestGenerateTestVector(data_gen_test_case_factory()):
         self.time_domain_kwargs["output_file_name"] = original_val
 
 
+class TestComplexSinusoid(unittest.TestCase):
+
+    n = 10007
+    freqs = [10, 0.1, 2048.5]
+    phases = [np.pi/4, 0.0, 1.0]
+    bin_offset = 0.1
+
+    def expected(self):
+        t = np.arange(self.n)
+        sig = np.zeros(self.n, dtype=np.complex128)
+        for freq, phase in zip(self.freqs, self.phases):
+            if freq < 1.0:
+                freq = int(self.n*freq)
+            sig += np.exp(
+                1j*(2*np.pi*(freq + self.bin_offset)/self.n*t + phase))
+        return sig
+
+    def test_complex_sinusoid(self):
+        sig = complex_sinusoid(self.n, self.freqs, self.phases,
+                               self.bin_offset, dtype=np.complex128,
+                               block_elements=999)
+        self.assertTrue(sig.dtype == np.complex128)
+        self.assertTrue(np.allclose(sig, self.expected(), atol=1e-10))
+
+    def test_complex_sinusoid_single_precision(self):
+        sig = complex_sinusoid(self.n, self.freqs, self.phases,
+                               self.bin_offset, dtype=np.complex64,
+                               single_precision=True)
+        self.assertTrue(sig.dtype == np.complex64)
+        self.assertTrue(np.allclose(sig, self.expected(), atol=1e-5))
+
+    def test_empty(self):
+        for sig in [complex_sinusoid(0, self.freqs, self.phases),
+                    time_domain_impulse(0, [0.1], [1]),
+                    noise(0)]:
+            self.assertTrue(sig.shape == (0,))
+            self.assertTrue(sig.dtype == np.complex64)
+
+
 # @unittest.skip("")
 class TestChannelize(data_gen_test_case_factory()):
 
@@ -116,6 +182,29 @@ class TestChannelize(data_gen_test_case_factory()):
         module_logger.info((f"test_channelize_matlab: "
                             f"matlab channelizer took {delta:.3f} seconds"))
 
+    def test_channelize_matlab_async(self):
+
+        async def _channelize_all():
+            semaphore = asyncio.Semaphore(2)
+            return await asyncio.gather(*[
+                channelize_async(
+                    self.input_data_path,
+                    semaphore=semaphore,
+                    backend="matlab",
+                    output_dir=output_dir,
+                    output_file_name=f"channelize_async.{i}.dump")
+                for i in range(3)])
+
+        t0 = time.time()
+        dada_files = asyncio.run(_channelize_all())
+        delta = time.time() - t0
+        module_logger.info((f"test_channelize_matlab_async: "
+                            f"3 matlab channelizers took {delta:.3f} seconds"))
+        for i, dada_file in enumerate(dada_files):
+            self.assertTrue(f"channelize_async.{i}.dump" in dada_file.file_path)
+            self.assertTrue(os.path.exists(os.path.join(
+                output_dir, f"channelize_async.{i}.log")))
+
     def test_channelize_python(self):
         channelizer = channelize(backend="python", output_dir=output_dir)
         t0 = time.time()
@@ -125,6 +214,79 @@ class TestChannelize(data_gen_test_case_factory()):
         module_logger.info((f"test_channelize_python: "
                             f"python channelizer took {delta:.3f} seconds"))
 
+    def test_channelize_python_numpy_engine(self):
+        channelizer = channelize(
+            backend="python", channels=8, os_factor_str="8/7",
+            output_dir=output_dir)
+        expected = channelizer(
+            self.input_data_path, **self.channelize_kwargs)
+        numpy_channelized = channelizer(
+            self.input_data_path, engine="numpy", save_output=False,
+            output_file_name="channelized.numpy.dump")
+        self.assertTrue(
+            numpy_channelized.data.shape == expected.data.shape)
+        self.assertTrue(np.allclose(
+            numpy_channelized.data, expected.data,
+            rtol=1e-4, atol=1e-4*np.amax(np.abs(expected.data))))
+
+    def test_channelize_python_block_size(self):
+        channelizer = channelize(
+            backend="python", channels=8, os_factor_str="8/7",
+            engine="numpy", output_dir=output_dir)
+        expected = channelizer(
+            self.input_data_path, save_output=False,
+            output_file_name="channelized.numpy.dump")
+        streamed = channelizer(
+            self.input_data_path, block_size=2**14,
+            output_file_name="channelized.block_size.dump")
+        streamed.load_data()
+        self.assertTrue(streamed.data.shape == expected.data.shape)
+        self.assertTrue(np.allclose(streamed.data, expected.data))
+        with self.assertRaises(RuntimeError):
+            channelizer(self.input_data_path, engine="pfb", block_size=2**14)
+
+    def test_channelize_python_in_memory(self):
+        channelizer = channelize(
+            backend="python", channels=8, os_factor_str="8/7",
+            output_dir=output_dir)
+        expected = channelizer(
+            self.input_data_path, **self.channelize_kwargs)
+        in_memory = channelizer(
+            self.input_data_path, save_output=False,
+            output_file_name="channelized.in_memory.dump")
+        self.assertFalse(os.path.exists(in_memory.file_path))
+        self.assertTrue(
+            glob.glob(os.path.join(output_dir, ".in_memory.*")) == [])
+        # the same pfb channelizer runs, whether or not the output is saved
+        self.assertTrue(np.array_equal(in_memory.data, expected.data))
+
+    def test_channelize_python_lowcbf(self):
+        channelizer = channelize(
+            backend="python",
+            analysis_function="polyphase_analysis_lowcbf",
+            output_dir=output_dir)
+        t0 = time.time()
+        dada_file = channelizer(
+            self.input_data_path, **self.channelize_kwargs)
+        delta = time.time() - t0
+        module_logger.info((f"test_channelize_python_lowcbf: "
+                            f"python channelizer took {delta:.3f} seconds"))
+        self.assertTrue(dada_file.data.shape[1] == 216)
+        self.assertTrue(os.path.exists(dada_file.file_path))
+
+    def test_channelize_python_lowcbf_block_size(self):
+        channelizer = channelize(
+            backend="python",
+            analysis_function="polyphase_analysis_lowcbf",
+            output_dir=output_dir)
+        expected = channelizer(
+            self.input_data_path, **self.channelize_kwargs)
+        streamed = channelizer(
+            self.input_data_path, block_size=2**14,
+            output_file_name="channelized.block_size.dump")
+        streamed.load_data()
+        self.assertTrue(np.array_equal(streamed.data, expected.data))
+
 
 # @unittest.skip("")
 class TestSynthesize(data_gen_test_case_factory()):
@@ -150,6 +312,81 @@ class TestSynthesize(data_gen_test_case_factory()):
         synthesizer(
             self.input_data_path)
 
+    def test_synthesize_python_block_frames(self):
+        synthesizer = synthesize(backend="python", **self.synthesize_kwargs)
+        expected = synthesizer(
+            self.input_data_path, engine="numpy", save_output=False)
+        streamed = synthesizer(
+            self.input_data_path, block_frames=8, save_output=False)
+        self.assertTrue(np.allclose(streamed.data, expected.data))
+        pfb_synthesized = synthesizer(
+            self.input_data_path, engine="pfb",
+            output_file_name="synthesized.pfb.dump")
+        if pfb_synthesized.data is None:
+            pfb_synthesized.load_data()
+        self.assertTrue(pfb_synthesized.data.shape == expected.data.shape)
+        self.assertTrue(np.allclose(
+            expected.data, pfb_synthesized.data,
+            rtol=1e-4, atol=1e-4*np.amax(np.abs(pfb_synthesized.data))))
+        streamed = synthesizer(
+            self.input_data_path, block_frames=8,
+            output_file_name="synthesized.block_frames.dump")
+        self.assertTrue(os.path.exists(streamed.file_path))
+
+    def test_synthesize_python_tsamp(self):
+        generator = generate_test_vector(
+            backend="python", domain_name="time", n_bins=2**15)
+        input_data_file = generator(
+            0.1, 1, n_pol=2, output_dir=output_dir,
+            output_file_name="tsamp.dump")
+        channelized = channelize(
+            backend="python", channels=8, os_factor_str="8/7",
+            engine="numpy", output_dir=output_dir)(
+            input_data_file.file_path, block_size=2**13,
+            output_file_name="channelized.tsamp.dump")
+        synthesized = synthesize(
+            backend="python", engine="numpy", input_fft_length=1024,
+            input_overlap=128, deripple=False)(
+            channelized.file_path, save_output=False)
+        self.assertTrue(np.isclose(
+            float(synthesized.header["TSAMP"]),
+            float(dada.read_header(input_data_file.file_path)["TSAMP"])))
+
+    def test_synthesize_python_in_memory(self):
+        synthesizer = synthesize(backend="python", **self.synthesize_kwargs)
+        for engine in ["numpy", "pfb"]:
+            expected = synthesizer(
+                self.input_data_path, engine=engine,
+                output_file_name=f"synthesized.{engine}.dump")
+            if expected.data is None:
+                expected.load_data()
+            in_memory = synthesizer(
+                self.input_data_path, engine=engine, save_output=False,
+                output_file_name=f"synthesized.{engine}.in_memory.dump")
+            self.assertTrue(in_memory.data is not None)
+            self.assertFalse(os.path.exists(in_memory.file_path))
+            self.assertTrue(np.array_equal(in_memory.data, expected.data))
+        self.assertTrue(
+            glob.glob(os.path.join(output_dir, ".in_memory.*")) == [])
+
+
+class TestPipeline(data_gen_test_case_factory()):
+
+    def test_pipeline_in_memory(self):
+        pipeline_fn = pipeline(
+            generate_test_vector(backend="python", domain_name="time",
+                                 n_bins=2**17, n_pol=2),
+            channelize(backend="python", channels=8, os_factor_str="8/7"),
+            synthesize(backend="python", input_fft_length=1024,
+                       input_overlap=128),
+            output_dir=output_dir,
+            in_memory=True
+        )
+        dada_files = pipeline_fn(0.1, 1)
+        for dada_file in dada_files:
+            self.assertTrue(dada_file.data is not None)
+            self.assertFalse(os.path.exists(dada_file.file_path))
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
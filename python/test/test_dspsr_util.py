@@ -1,6 +1,11 @@
 import unittest
+import io
 import os
+import glob
 import logging
+import concurrent.futures
+
+import numpy as np
 
 import data_gen
 
@@ -46,6 +51,55 @@ class TestDSPSRUtil(unittest.TestCase):
 
         self.__class__.file_paths |= set(output)
 
+    def test_run_dspsr_map(self):
+
+        output = data_gen.run_dspsr.map(
+            [self.simulated_pulsar_file_path]*2,
+            output_file_name=["test_run_dspsr_map.0",
+                              "test_run_dspsr_map.1"],
+            output_dir=test_dir,
+            max_workers=2
+        )
+        self.assertTrue(len(output) == 2)
+        for res in output:
+            for file_path in res:
+                self.assertTrue(os.path.exists(file_path))
+            self.__class__.file_paths |= set(res)
+        self.assertTrue(len(glob.glob(os.path.join(test_dir, "*.dat"))) == 0)
+
+    def test_run_dspsr_submit(self):
+
+        futures = [data_gen.run_dspsr.submit(
+            self.simulated_pulsar_file_path,
+            output_file_name=f"test_run_dspsr_submit_{idx}",
+            output_dir=test_dir
+        ) for idx in range(2)]
+        for future in futures:
+            res = future.result()
+            for file_path in res:
+                self.assertTrue(os.path.exists(file_path))
+            self.__class__.file_paths |= set(res)
+        self.assertTrue(
+            data_gen.dspsr_util.DspsrRunner() is not data_gen.run_dspsr)
+
+    def test_run_dspsr_concurrent_calls(self):
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(
+                data_gen.run_dspsr_with_dump,
+                self.simulated_pulsar_file_path,
+                output_file_name=f"test_run_dspsr_concurrent_calls_{idx}",
+                output_dir=test_dir,
+                dump_stage="Detection"
+            ) for idx in range(2)]
+            outputs = [future.result() for future in futures]
+        for dump, ar, log in outputs:
+            for file_path in [dump.file_path, ar, log]:
+                self.assertTrue(os.path.exists(file_path))
+            self.__class__.file_paths |= set([dump, ar, log])
+        self.assertFalse(os.path.exists("pre_Detection.dump"))
+        self.assertTrue(len(glob.glob("*.dat")) == 0)
+
     def test_run_dspsr_with_dump(self):
 
         output = data_gen.run_dspsr_with_dump(
@@ -60,6 +114,34 @@ class TestDSPSRUtil(unittest.TestCase):
 
         self.__class__.file_paths |= set(output)
 
+    def test_run_dspsr_with_dump_failed(self):
+
+        kwargs = dict(
+            dspsr_bin="false",
+            output_file_name="test_run_dspsr_with_dump_failed",
+            output_dir=test_dir,
+            dump_stage="Detection"
+        )
+        dump, ar, log = data_gen.run_dspsr_with_dump(
+            self.simulated_pulsar_file_path, **kwargs)
+        self.assertTrue(dump is None)
+        [(dump, ar, log)] = data_gen.run_dspsr_with_dump.map(
+            [self.simulated_pulsar_file_path], **kwargs)
+        self.assertTrue(dump is None)
+        self.__class__.file_paths.add(log)
+
+    def test_run_dspsr_with_dump_not_created(self):
+
+        dump, ar, log = data_gen.run_dspsr_with_dump(
+            self.simulated_pulsar_file_path,
+            dspsr_bin="true",
+            output_file_name="test_run_dspsr_with_dump_not_created",
+            output_dir=test_dir,
+            dump_stage="Detection"
+        )
+        self.assertTrue(dump is None)
+        self.__class__.file_paths.add(log)
+
     def test_psrdiff(self):
         output = data_gen.run_psrdiff(
             *self.psrdiff_test_file_paths,
@@ -67,6 +149,21 @@ class TestDSPSRUtil(unittest.TestCase):
         )
         self.__class__.file_paths |= set(output)
 
+    def test_psrdiff_concurrent_calls(self):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(
+                data_gen.run_psrdiff,
+                *self.psrdiff_test_file_paths,
+                output_file_name=f"test_psrdiff_concurrent_calls_{idx}.out",
+                output_dir=test_dir
+            ) for idx in range(2)]
+            outputs = [future.result() for future in futures]
+        for output in outputs:
+            for file_path in output:
+                self.assertTrue(os.path.exists(file_path))
+            self.__class__.file_paths |= set(output)
+        self.assertFalse(os.path.exists("psrdiff.out"))
+
     def test_psrtxt(self):
         output = data_gen.run_psrtxt(
             self.psrtxt_test_file_path,
@@ -74,6 +171,15 @@ class TestDSPSRUtil(unittest.TestCase):
         )
         self.__class__.file_paths |= set(output)
 
+    def test_psrtxt_pipe(self):
+        data, log = data_gen.run_psrtxt(
+            self.psrtxt_test_file_path,
+            output_dir=test_dir,
+            pipe=True
+        )
+        self.assertTrue(data.ndim == 2)
+        self.__class__.file_paths.add(log)
+
     def test_find_in_log(self):
         val = data_gen.find_in_log(
             self.test_log_file_path,
@@ -85,12 +191,48 @@ class TestDSPSRUtil(unittest.TestCase):
                 self.test_log_file_path,
                 "foo")
 
+    def test_log_index(self):
+        log_file_path = os.path.join(test_dir, "test_log_index.log")
+        with open(log_file_path, "w") as f:
+            f.write(("dsp::InverseFilterbank output_fft_length=229376 "
+                     "nchan=8\nnchan=16\n"))
+        self.__class__.file_paths.add(log_file_path)
+
+        index = data_gen.log_index(log_file_path)
+        self.assertTrue(index["output_fft_length"] == "229376")
+        self.assertTrue(index["fft_length"] == "229376")
+        self.assertTrue(index.values("nchan") == ["8", "16"])
+        self.assertTrue(data_gen.log_index(log_file_path) is index)
+        with self.assertRaises(KeyError):
+            index["foo"]
+
+        # the log is indexed again once it changes
+        with open(log_file_path, "a") as f:
+            f.write("nchan=32 \n")
+        os.utime(log_file_path, ns=(0, 0))
+        self.assertTrue(data_gen.log_index(log_file_path).values(
+            "nchan") == ["8", "16", "32"])
+
     def test_load_psrtxt_data(self):
 
         data = data_gen.load_psrtxt_data(
             self.test_load_psrtxt_data_file_path)
         self.assertTrue(data[3, 330] == -0.000184)
 
+    def test_parse_psrtxt(self):
+        txt = b"0 0 1.5 -0.000184\n0 1 2.5 3\n\n0 2 3.5 4\n"
+        expected = np.array([[0, 0, 1.5, -0.000184],
+                             [0, 1, 2.5, 3],
+                             [0, 2, 3.5, 4]]).transpose()
+        # chunks that end part way through a line
+        for chunk_size in [5, 1024]:
+            data = data_gen.parse_psrtxt(
+                io.BytesIO(txt), chunk_size=chunk_size)
+            self.assertTrue(np.array_equal(data, expected))
+
+        with self.assertRaises(ValueError):
+            data_gen.parse_psrtxt(io.BytesIO(b"0 0 1.5\n0 1\n"))
+
     @classmethod
     def tearDownClass(cls):
         print(cls.file_paths)
@@ -0,0 +1,40 @@
+import unittest
+import logging
+
+import numpy as np
+
+from data_gen.fft_backend import FFTBackend
+
+
+class TestFFTBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_spectra(self):
+        fft_backend = FFTBackend(workers=2)
+        a, b = (self.rng.standard_normal(1000) +
+                1j*self.rng.standard_normal(1000) for i in range(2))
+        spectra = fft_backend.spectra(a, b.astype(np.complex64),
+                                      domain=[0, 512])
+        self.assertTrue(spectra.shape == (2, 512))
+        self.assertTrue(np.allclose(spectra[0], np.fft.fft(a[:512])))
+        self.assertTrue(np.allclose(
+            spectra[1], np.fft.fft(b.astype(np.complex64)[:512])))
+
+    def test_spectra_real(self):
+        fft_backend = FFTBackend()
+        for n in [512, 511]:
+            a, b = (self.rng.standard_normal(n) for i in range(2))
+            spectra = fft_backend.spectra(a, b)
+            self.assertTrue(np.allclose(spectra[0], np.fft.fft(a)))
+            self.assertTrue(np.allclose(spectra[1], np.fft.fft(b)))
+
+    def test_spectra_lengths(self):
+        with self.assertRaises(ValueError):
+            FFTBackend().spectra(np.zeros(10), np.zeros(12))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
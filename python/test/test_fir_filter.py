@@ -0,0 +1,66 @@
+import unittest
+import logging
+import os
+import shutil
+import time
+
+import numpy as np
+
+from data_gen import fir_filter
+from data_gen.config import config_dir
+from data_gen.util import curdir
+
+cur_dir = curdir(__file__)
+
+
+class TestFIRFilter(unittest.TestCase):
+
+    cache_dir = os.path.join(cur_dir, "test_fir_filter_cache")
+    coeff_file_path = os.path.join(cur_dir, "test_fir_filter_coeff.txt")
+
+    def setUp(self):
+        self.coeff = np.random.rand(6144)
+        np.savetxt(self.coeff_file_path, self.coeff)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        for file_path in [self.coeff_file_path,
+                          self.coeff_file_path.replace(".txt", ".npy")]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def test_read_fir_filter_coeff(self):
+        coeff = fir_filter.read_fir_filter_coeff(
+            os.path.join(config_dir, "PST_filtertaps.txt"),
+            cache_dir=self.cache_dir)
+        self.assertTrue(coeff.shape == (3072,))
+
+    def test_read_fir_filter_coeff_cache(self):
+        coeff = fir_filter.read_fir_filter_coeff(
+            self.coeff_file_path, cache_dir=self.cache_dir)
+        self.assertTrue(np.allclose(coeff, self.coeff))
+        self.assertFalse(coeff.flags.writeable)
+        self.assertTrue(len(os.listdir(self.cache_dir)) == 1)
+        self.assertTrue(coeff is fir_filter.read_fir_filter_coeff(
+            self.coeff_file_path, cache_dir=self.cache_dir))
+
+        # modified files are parsed again
+        time.sleep(0.01)
+        np.savetxt(self.coeff_file_path, 2*self.coeff)
+        coeff = fir_filter.read_fir_filter_coeff(
+            self.coeff_file_path, cache_dir=self.cache_dir)
+        self.assertTrue(np.allclose(coeff, 2*self.coeff))
+        self.assertTrue(len(os.listdir(self.cache_dir)) == 2)
+
+    def test_read_fir_filter_coeff_npy(self):
+        npy_file_path = self.coeff_file_path.replace(".txt", ".npy")
+        np.save(npy_file_path, self.coeff)
+        coeff = fir_filter.read_fir_filter_coeff(
+            npy_file_path, cache_dir=self.cache_dir)
+        self.assertTrue(np.array_equal(coeff, self.coeff))
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import logging
+import os
+import stat
+import sys
+
+from data_gen.matlab_worker import MatlabWorker
+from data_gen.util import curdir
+
+cur_dir = curdir(__file__)
+
+# Stands in for build/matlab_worker, speaking the same protocol
+fake_worker_src = f"""#!{sys.executable}
+import sys, time
+print("@@worker ready", flush=True)
+for line in sys.stdin:
+    fields = line.rstrip("\\n").split("\\t")
+    if fields[0] == "exit":
+        break
+    elif fields[0] == "ping":
+        print("@@worker pong", flush=True)
+    elif fields[0] == "crash":
+        sys.exit(1)
+    elif fields[0] == "fail":
+        print("@@worker error bad job", flush=True)
+    else:
+        print(" ".join(fields), flush=True)
+        print("@@worker ok", flush=True)
+"""
+
+
+class TestMatlabWorker(unittest.TestCase):
+
+    executable = os.path.join(cur_dir, "fake_matlab_worker")
+    log_file_path = os.path.join(cur_dir, "test_matlab_worker.log")
+
+    def setUp(self):
+        with open(self.executable, "w") as f:
+            f.write(fake_worker_src)
+        os.chmod(self.executable, os.stat(self.executable).st_mode |
+                 stat.S_IXUSR)
+        self.worker = MatlabWorker(self.executable, startup_timeout=10,
+                                   ping_timeout=10)
+
+    def tearDown(self):
+        self.worker.stop()
+        for file_path in [self.executable, self.log_file_path]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def test_run_cmd(self):
+        self.assertFalse(self.worker.is_alive())
+        self.worker.run_cmd("build/channelize in.dump 8 8/7",
+                            log_file_path=self.log_file_path)
+        pid = self.worker._process.pid
+        self.worker.run("synthesize", "in.dump", 1024)
+        self.assertTrue(self.worker._process.pid == pid)
+        self.assertTrue(self.worker.ping())
+        with open(self.log_file_path, "r") as f:
+            self.assertTrue(f.read() == "channelize in.dump 8 8/7\n")
+
+    def test_restart(self):
+        self.worker.run("channelize")
+        pid = self.worker._process.pid
+        with self.assertRaises(RuntimeError):
+            self.worker.run("crash")
+        self.assertFalse(self.worker.is_alive())
+        self.worker.run("channelize")
+        self.assertTrue(self.worker._process.pid != pid)
+
+    def test_job_error(self):
+        with self.assertRaises(RuntimeError):
+            self.worker.run("fail")
+        self.assertTrue(self.worker.ping())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,234 @@
+import unittest
+import logging
+import os
+
+import numpy as np
+import scipy.signal
+
+from data_gen import polyphase, fir_filter
+from data_gen.config import config_dir
+
+
+def pst_filterbank(din, fir_filter_coeff, do_padding=True):
+    """
+    Direct translation of the Low CBF firmware model, PSTFilterbank.m
+    """
+    padding = 1536 if do_padding else 0
+    n_total = din.shape[0] + padding
+    n_out = (n_total - 3072) // 192
+    dinp = np.zeros(n_total, dtype=np.complex128)
+    dinp[padding:] = din
+    dout = np.zeros((216, n_out), dtype=np.complex128)
+    fft_in = np.zeros(256, dtype=np.complex128)
+    for k in range(n_out):
+        for n1 in range(256):
+            fft_in[n1] = np.sum(
+                fir_filter_coeff[n1::256] *
+                dinp[k*192 + n1:k*192 + n1 + 256*12:256]) / 2**9
+        dout1 = np.fft.fftshift(np.fft.fft(fft_in)) / 128
+        rotation = np.mod(k * np.arange(-128, 128), 4)
+        dout2 = dout1 * np.exp(1j*2*np.pi*rotation/4)
+        dout[:, k] = dout2[20:236]
+    return dout * 2**9 * 2048 * 256
+
+
+def matlab_polyphase_analysis(din, fir_filter_coeff, block, os_nu, os_de):
+    """
+    Direct translation of polyphase_analysis.m, for a single polarization
+    """
+    step = block * os_de // os_nu
+    phases = -(-fir_filter_coeff.shape[0] // block)
+    f = np.zeros(phases*block)
+    f[:fir_filter_coeff.shape[0]] = fir_filter_coeff
+    fl = f.shape[0]
+    n_blocks = (din.shape[0] - fl) // step
+    out = np.zeros((n_blocks, block), dtype=np.complex128)
+    for k in range(n_blocks):
+        in_block = din[step*k:step*k + fl]
+        index = step*k - (step*k // block)*block
+        temp = np.conj(np.roll(f*in_block, index))
+        temp2 = np.zeros(block, dtype=np.complex128)
+        for m in range(phases):
+            temp2 += temp[block*m:block*(m + 1)]
+        out[k] = np.conj(np.fft.ifft(temp2)*block**2)
+    return out
+
+
+def matlab_polyphase_synthesis(din, input_fft_length, os_nu, os_de,
+                               input_overlap, fft_window, fir_filter_coeff):
+    """
+    Direct translation of polyphase_synthesis.m, for input whose first
+    channel is centred on DC.
+    """
+    n_dat, n_chan = din.shape
+    input_keep = input_fft_length - 2*input_overlap
+    n_blocks = (n_dat - 2*input_overlap) // input_keep
+    output_fft_length = input_fft_length * os_de // os_nu * n_chan
+    output_overlap = input_overlap * os_de // os_nu * n_chan
+    output_keep = output_fft_length - 2*output_overlap
+    fn_width = input_fft_length * os_de // os_nu
+    fn_width_2 = fn_width // 2
+    discard_2 = (input_fft_length - fn_width) // 2
+    passband_length = fn_width // 2
+    _, h0 = scipy.signal.freqz(fir_filter_coeff, 1, n_chan*passband_length)
+    filter_response = 1.0 / np.abs(h0[:passband_length + 1])
+    out = np.zeros(n_blocks*output_keep, dtype=np.complex128)
+    for n in range(n_blocks):
+        in_dat = din[input_keep*n:input_keep*n + input_fft_length, :]
+        in_dat = in_dat * fft_window[:, np.newaxis]
+        spectra = np.fft.fftshift(np.fft.fft(in_dat, axis=0), axes=0)
+        fn = spectra[discard_2:discard_2 + fn_width, :].copy()
+        for ii in range(1, passband_length + 1):
+            fn[ii - 1] *= filter_response[passband_length - ii + 1]
+            fn[passband_length + ii - 1] *= filter_response[ii - 1]
+        ffff = np.zeros(n_chan*fn_width, dtype=np.complex128)
+        ffff[:fn_width_2] = fn[fn_width_2:, 0]
+        ffff[n_chan*fn_width - fn_width_2:] = fn[:fn_width_2, 0]
+        for chan in range(1, n_chan):
+            idx_start = (chan - 1)*fn_width + fn_width_2
+            ffff[idx_start:idx_start + fn_width] = fn[:, chan]
+        iffff = np.fft.ifft(ffff) / (os_nu / os_de)
+        out[output_keep*n:output_keep*(n + 1)] = \
+            iffff[output_overlap:output_fft_length - output_overlap]
+    return out
+
+
+class TestPolyphase(unittest.TestCase):
+
+    fir_filter_path = os.path.join(config_dir, "PST_filtertaps.txt")
+
+    def setUp(self):
+        self.fir_filter_coeff = fir_filter.read_fir_filter_coeff(
+            self.fir_filter_path)
+        self.data = (np.random.rand(8000, 2) +
+                     1j*np.random.rand(8000, 2)).astype(np.complex64)
+
+    def test_polyphase_analysis_lowcbf(self):
+        channelized = polyphase.polyphase_analysis_lowcbf(
+            self.data, self.fir_filter_coeff)
+        self.assertTrue(channelized.shape == (33, 216, 2))
+        for i_pol in range(2):
+            expected = pst_filterbank(
+                self.data[:, i_pol], self.fir_filter_coeff).T
+            self.assertTrue(np.allclose(
+                channelized[:, :, i_pol], expected,
+                rtol=1e-10, atol=1e-10*np.amax(np.abs(expected))))
+
+    def test_polyphase_analysis_lowcbf_no_padding(self):
+        channelized = polyphase.polyphase_analysis_lowcbf(
+            self.data[:, 0], self.fir_filter_coeff, do_padding=False)
+        expected = pst_filterbank(
+            self.data[:, 0], self.fir_filter_coeff, do_padding=False).T
+        self.assertTrue(channelized.shape == expected.shape)
+        self.assertTrue(np.allclose(
+            channelized, expected,
+            rtol=1e-10, atol=1e-10*np.amax(np.abs(expected))))
+
+    def test_iter_polyphase_analysis_lowcbf(self):
+        expected = polyphase.polyphase_analysis_lowcbf(
+            self.data, self.fir_filter_coeff)
+        for block_size in [100, 1000, 3500, 8000]:
+            blocks = (self.data[idx:idx + block_size]
+                      for idx in range(0, self.data.shape[0], block_size))
+            channelized = np.concatenate(list(
+                polyphase.iter_polyphase_analysis_lowcbf(
+                    blocks, self.fir_filter_coeff)))
+            self.assertTrue(np.array_equal(channelized, expected))
+
+
+class TestPolyphaseAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.fir_filter_coeff = scipy.signal.firwin(81, 1/8)
+        self.data = (np.random.rand(4000, 2) +
+                     1j*np.random.rand(4000, 2)).astype(np.complex64)
+
+    def test_polyphase_analysis(self):
+        for channels, os_nu, os_de in [(8, 8, 7), (16, 4, 3), (8, 1, 1)]:
+            channelized = polyphase.polyphase_analysis(
+                self.data, self.fir_filter_coeff, channels,
+                f"{os_nu}/{os_de}")
+            for i_pol in range(2):
+                expected = matlab_polyphase_analysis(
+                    self.data[:, i_pol], self.fir_filter_coeff,
+                    channels, os_nu, os_de)
+                self.assertTrue(channelized.shape[:2] == expected.shape)
+                self.assertTrue(np.allclose(
+                    channelized[:, :, i_pol], expected,
+                    rtol=1e-10, atol=1e-10*np.amax(np.abs(expected))))
+
+    def test_iter_polyphase_analysis(self):
+        expected = polyphase.polyphase_analysis(
+            self.data, self.fir_filter_coeff, 8, "8/7")
+        for block_size in [50, 100, 1000, 4000]:
+            blocks = (self.data[idx:idx + block_size]
+                      for idx in range(0, self.data.shape[0], block_size))
+            channelized = np.concatenate(list(
+                polyphase.iter_polyphase_analysis(
+                    blocks, self.fir_filter_coeff, 8, "8/7")))
+            self.assertTrue(np.array_equal(channelized, expected))
+
+
+class TestPolyphaseSynthesis(unittest.TestCase):
+
+    input_fft_length = 128
+    input_overlap = 16
+    os_factor_str = "8/7"
+
+    def setUp(self):
+        self.data = (np.random.rand(3000, 8, 2) +
+                     1j*np.random.rand(3000, 8, 2)).astype(np.complex64)
+        self.fft_window = np.hanning(self.input_fft_length)
+        self.fir_filter_coeff = scipy.signal.firwin(81, 1/8)
+
+    def test_polyphase_synthesis(self):
+        synthesized = polyphase.polyphase_synthesis(
+            self.data, self.input_fft_length, self.os_factor_str,
+            input_overlap=self.input_overlap,
+            fft_window=self.fft_window,
+            fir_filter_coeff=self.fir_filter_coeff)
+        for i_pol in range(2):
+            expected = matlab_polyphase_synthesis(
+                self.data[:, :, i_pol], self.input_fft_length, 8, 7,
+                self.input_overlap, self.fft_window, self.fir_filter_coeff)
+            self.assertTrue(synthesized.shape[0] == expected.shape[0])
+            self.assertTrue(np.allclose(
+                synthesized[:, i_pol], expected,
+                rtol=1e-10, atol=1e-10*np.amax(np.abs(expected))))
+
+    def test_iter_polyphase_synthesis(self):
+        expected = polyphase.polyphase_synthesis(
+            self.data, self.input_fft_length, self.os_factor_str,
+            input_overlap=self.input_overlap,
+            fir_filter_coeff=self.fir_filter_coeff)
+        for block_frames in [1, 5, 30]:
+            synthesized = np.concatenate([
+                block.copy() for block in polyphase.iter_polyphase_synthesis(
+                    self.data, self.input_fft_length, self.os_factor_str,
+                    input_overlap=self.input_overlap,
+                    fir_filter_coeff=self.fir_filter_coeff,
+                    block_frames=block_frames)])
+            self.assertTrue(np.allclose(synthesized, expected,
+                                        rtol=0, atol=1e-12))
+
+    def test_polyphase_synthesizer_no_dc_chan(self):
+        synthesizer = polyphase.PolyphaseSynthesizer(
+            8, 2, self.input_fft_length, self.os_factor_str,
+            input_overlap=self.input_overlap, dc_chan=False, block_frames=4)
+        synthesized = synthesizer(self.data)
+        self.assertTrue(synthesized.shape == (
+            synthesizer.output_length(self.data.shape[0]), 2))
+        # without a DC centred channel, the channels' kept bins are simply
+        # concatenated
+        spectra = np.fft.fftshift(np.fft.fft(
+            self.data[:self.input_fft_length].astype(np.complex128), axis=0),
+            axes=0)
+        kept = spectra[8:120].transpose(2, 1, 0).reshape(2, -1)
+        expected = np.fft.ifft(kept, axis=-1)[:, 112:784].T * 7 / 8
+        self.assertTrue(np.allclose(synthesized[:672], expected,
+                                    rtol=0, atol=1e-12))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
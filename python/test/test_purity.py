@@ -0,0 +1,94 @@
+import unittest
+import logging
+
+import numpy as np
+
+from data_gen.config import load_config
+from verify import purity
+from verify import util as test_util
+
+
+class TestChannelizeKwargs(unittest.TestCase):
+
+    def test_mid_external(self):
+        config = load_config("mid_external")
+        self.assertTrue(config["backend"]["channelize"] == "python")
+        self.assertTrue(purity.channelize_kwargs(
+            config["backend"]["channelize"],
+            config["analysis_function"]) == {})
+
+    def test_analysis_function(self):
+        self.assertTrue(purity.channelize_kwargs(
+            "python", "polyphase_analysis_lowcbf") ==
+            {"analysis_function": "polyphase_analysis_lowcbf"})
+        self.assertTrue(purity.channelize_kwargs(
+            "python", "polyphase_analysis") == {})
+        self.assertTrue(purity.channelize_kwargs("python") == {})
+        self.assertTrue(purity.channelize_kwargs(
+            "matlab", "polyphase_analysis_lowcbf") == {})
+
+
+class TestParseShard(unittest.TestCase):
+
+    def test_parse_shard(self):
+        self.assertTrue(purity.parse_shard("1/4") == (1, 4))
+        self.assertTrue(purity.parse_shard("4/4") == (4, 4))
+        self.assertTrue(purity.parse_shard("1/1") == (1, 1))
+
+    def test_parse_shard_invalid(self):
+        for shard_str in ["0/4", "5/4", "-1/4", "1/0",
+                          "2", "1/2/3", "a/4", ""]:
+            with self.assertRaises(ValueError):
+                purity.parse_shard(shard_str)
+
+
+class TestPurityMetrics(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.a = (rng.standard_normal((3, 256)) +
+                  1j*rng.standard_normal((3, 256)))
+        self.a[:, 17] = 100.0
+
+    def assert_metrics(self, metrics, a):
+        magnitude = np.abs(a)
+        self.assertTrue(np.allclose(metrics["mean"], np.mean(magnitude)))
+        self.assertTrue(np.allclose(metrics["sum"], np.sum(magnitude)))
+        self.assertTrue(np.allclose(metrics["max"], np.amax(magnitude)))
+        for name in ["total_spurious", "mean_spurious", "max_spurious"]:
+            expected = getattr(test_util, name)(a)
+            self.assertTrue(np.allclose(metrics[name], expected))
+
+    def test_purity_metrics(self):
+        a = self.a[0]
+        metrics = test_util.purity_metrics(a)
+        self.assert_metrics(metrics, a)
+        # the input is not modified
+        self.assertTrue(np.abs(a[17]) == 100.0)
+
+    def test_purity_metrics_batch(self):
+        scale = 1.0 / 512
+        metrics = test_util.purity_metrics(self.a, scale=scale)
+        for name, value in metrics.items():
+            self.assertTrue(value.shape == (3,))
+        for i in range(self.a.shape[0]):
+            self.assert_metrics(
+                {name: value[i] for name, value in metrics.items()},
+                scale*self.a[i])
+
+    def test_diff_metrics(self):
+        a, b = self.a[0], self.a[1]
+        diff = np.abs(a - b)
+        metrics = test_util.diff_metrics(a, b)
+        self.assertTrue(np.allclose(metrics["mean"], np.mean(diff)))
+        self.assertTrue(np.allclose(metrics["sum"], np.sum(diff)))
+        self.assertTrue(np.allclose(metrics["max"], np.amax(diff)))
+
+        metrics = test_util.diff_metrics(self.a[:2], self.a[1:])
+        diff = np.abs(self.a[:2] - self.a[1:])
+        self.assertTrue(np.allclose(metrics["mean"], np.mean(diff, axis=-1)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import logging
+import json
+import os
+import shutil
+
+from data_gen.util import curdir
+from verify.report import JSONLinesReport, merge_reports
+
+cur_dir = curdir(__file__)
+
+
+class TestJSONLinesReport(unittest.TestCase):
+
+    report_dir = os.path.join(cur_dir, "test_report")
+    params = {"channels": 8, "os_factor": "8/7"}
+
+    def setUp(self):
+        os.makedirs(self.report_dir)
+        self.file_path = os.path.join(self.report_dir, "report.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.report_dir)
+
+    def test_append(self):
+        report = JSONLinesReport(self.file_path, params=self.params)
+        self.assertFalse(report.is_done("test_time", 10))
+        report.append("test_time", {"arg": 10, "max": 0.5})
+        self.assertTrue(report.is_done("test_time", 10))
+        self.assertFalse(report.is_done("test_freq", 10))
+        self.assertFalse(report.is_done("test_time", 11))
+
+        self.assertTrue(report.read_params() == self.params)
+        records = list(report.records())
+        self.assertTrue(records == [
+            {"arg": 10, "max": 0.5, "method": "test_time"}])
+
+    def test_resume(self):
+        report = JSONLinesReport(self.file_path, params=self.params)
+        report.append("test_time", {"arg": 10, "max": 0.5})
+
+        resumed = JSONLinesReport(
+            self.file_path, resume=True, params=self.params)
+        self.assertTrue(resumed.is_done("test_time", 10))
+        resumed.append("test_time", {"arg": 20, "max": 0.25})
+        self.assertTrue(
+            [r["arg"] for r in resumed.records()] == [10, 20])
+
+    def test_resume_partial_line(self):
+        report = JSONLinesReport(self.file_path, params=self.params)
+        report.append("test_time", {"arg": 10, "max": 0.5})
+        with open(self.file_path, "a") as f:
+            f.write('{"arg": 20, "ma')
+
+        resumed = JSONLinesReport(
+            self.file_path, resume=True, params=self.params)
+        self.assertTrue(resumed.is_done("test_time", 10))
+        self.assertFalse(resumed.is_done("test_time", 20))
+        with open(self.file_path, "r") as f:
+            self.assertTrue(f.read().endswith("\n"))
+        resumed.append("test_time", {"arg": 20, "max": 0.25})
+        self.assertTrue(
+            [r["arg"] for r in resumed.records()] == [10, 20])
+
+    def test_resume_params_mismatch(self):
+        report = JSONLinesReport(self.file_path, params=self.params)
+        report.append("test_time", {"arg": 10, "max": 0.5})
+        with self.assertRaises(RuntimeError):
+            JSONLinesReport(self.file_path, resume=True,
+                            params=dict(self.params, channels=16))
+
+    def test_restart(self):
+        report = JSONLinesReport(self.file_path, params=self.params)
+        report.append("test_time", {"arg": 10, "max": 0.5})
+        with self.assertRaises(RuntimeError):
+            JSONLinesReport(self.file_path, params=self.params)
+        self.assertTrue(report.is_done("test_time", 10))
+
+        restarted = JSONLinesReport(
+            self.file_path, params=self.params, restart=True)
+        self.assertFalse(restarted.is_done("test_time", 10))
+        self.assertTrue(list(restarted.records()) == [])
+        self.assertTrue(restarted.read_params() == self.params)
+
+    def test_aggregate(self):
+        report = JSONLinesReport(self.file_path, params=self.params)
+        for arg in [30, 10, 20]:
+            report.append("test_time", {"arg": arg})
+        report.append("test_freq", {"arg": 5})
+
+        json_file_path = os.path.join(self.report_dir, "report.json")
+        aggregated = report.write_json(json_file_path)
+        self.assertTrue(
+            [r["arg"] for r in aggregated["test_time"]] == [10, 20, 30])
+        self.assertTrue(aggregated["test_freq"] == [{"arg": 5}])
+        with open(json_file_path, "r") as f:
+            self.assertTrue(json.load(f) == aggregated)
+
+
+class TestMergeReports(unittest.TestCase):
+
+    report_dir = os.path.join(cur_dir, "test_merge_reports")
+    params = {"channels": 8, "os_factor": "8/7"}
+
+    def setUp(self):
+        os.makedirs(self.report_dir)
+        self.file_paths = [
+            os.path.join(self.report_dir, f"report.{shard}.jsonl")
+            for shard in range(2)]
+
+    def tearDown(self):
+        shutil.rmtree(self.report_dir)
+
+    def test_merge_reports(self):
+        shards = [JSONLinesReport(file_path, params=self.params)
+                  for file_path in self.file_paths]
+        for arg in [10, 20, 30, 40]:
+            shards[arg // 10 % 2].append("test_time", {"arg": arg})
+        shards[1].append("test_freq", {"arg": 5})
+
+        json_file_path = os.path.join(self.report_dir, "report.json")
+        merged = merge_reports(self.file_paths, json_file_path)
+        self.assertTrue(
+            [r["arg"] for r in merged["test_time"]] == [10, 20, 30, 40])
+        self.assertTrue(merged["test_freq"] == [{"arg": 5}])
+        with open(json_file_path, "r") as f:
+            self.assertTrue(json.load(f) == merged)
+
+    def test_merge_reports_params_mismatch(self):
+        JSONLinesReport(self.file_paths[0], params=self.params)
+        JSONLinesReport(self.file_paths[1],
+                        params=dict(self.params, channels=16))
+        with self.assertRaises(RuntimeError):
+            merge_reports(self.file_paths)
+
+    def test_merge_reports_missing(self):
+        JSONLinesReport(self.file_paths[0], params=self.params)
+        with self.assertRaises(FileNotFoundError):
+            merge_reports(self.file_paths)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import logging
+import os
+import shutil
+
+import numpy as np
+
+from data_gen.tables import TableCache
+from data_gen.util import curdir
+
+cur_dir = curdir(__file__)
+
+
+class TestTableCache(unittest.TestCase):
+
+    cache_dir = os.path.join(cur_dir, "test_tables")
+
+    def setUp(self):
+        self.n_computed = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def compute(self):
+        self.n_computed += 1
+        return np.hanning(1024)
+
+    def test_key(self):
+        tables = TableCache()
+        coeff = np.arange(10.0)
+        key = tables.key("deripple", fir_filter_coeff=coeff, n_chan=8)
+        self.assertTrue(key == tables.key(
+            "deripple", n_chan=8, fir_filter_coeff=coeff.copy()))
+        self.assertTrue(key != tables.key(
+            "deripple", n_chan=8, fir_filter_coeff=coeff + 1))
+        self.assertTrue(key != tables.key(
+            "fft_window", n_chan=8, fir_filter_coeff=coeff))
+
+    def test_get(self):
+        tables = TableCache(max_entries=2)
+        table = tables.get("fft_window", self.compute, input_fft_length=1024)
+        self.assertTrue(np.array_equal(table, np.hanning(1024)))
+        self.assertFalse(table.flags.writeable)
+        tables.get("fft_window", self.compute, input_fft_length=1024)
+        self.assertTrue(self.n_computed == 1)
+
+        # least recently used tables are evicted
+        tables.get("fft_window", self.compute, input_fft_length=512)
+        tables.get("fft_window", self.compute, input_fft_length=256)
+        tables.get("fft_window", self.compute, input_fft_length=1024)
+        self.assertTrue(self.n_computed == 4)
+        self.assertTrue(tables.hits == 1 and tables.misses == 4)
+
+    def test_get_cache_dir(self):
+        tables = TableCache(self.cache_dir)
+        expected = tables.get(
+            "fft_window", self.compute, input_fft_length=1024)
+        self.assertTrue(len(os.listdir(self.cache_dir)) == 1)
+
+        # a new process finds the table on disk
+        table = TableCache(self.cache_dir).get(
+            "fft_window", self.compute, input_fft_length=1024)
+        self.assertTrue(self.n_computed == 1)
+        self.assertTrue(np.array_equal(table, expected))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -36,6 +36,25 @@ def create_parser(**kwargs):
         default="", type=str,
         help="Specify any additional arguments to pass to dspsr")
 
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir", action="store",
+        default=None, type=str,
+        help=("Specify a directory in which to cache test vectors and "
+              "channelized products between runs"))
+
+    parser.add_argument(
+        "--cache-size",
+        dest="cache_size", action="store",
+        default=50, type=float,
+        help="Specify the maximum size of the cache, in GB")
+
+    parser.add_argument(
+        "--matlab-worker",
+        dest="matlab_worker", action="store_true",
+        help=("Run Matlab backends as jobs on a single long lived "
+              "build/matlab_worker process"))
+
     parser.add_argument("-v", "--verbose",
                         dest="verbose", action="store_true")
 
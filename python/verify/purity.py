@@ -1,9 +1,11 @@
 import logging
 import os
 import functools
-import json
 import glob
 import typing
+import shutil
+import concurrent.futures
+import multiprocessing
 
 import numpy as np
 import comparator
@@ -12,10 +14,14 @@ from tqdm import tqdm
 
 import data_gen
 import data_gen.util
-from data_gen.config import matplotlib_config, load_config
+import data_gen.polyphase
+from data_gen import dada
+from data_gen.cache import file_hash
+from data_gen.config import matplotlib_config, load_config, config_dir
 
 from . import util as test_util
 from .common import create_parser
+from .report import JSONLinesReport, merge_reports
 
 
 matplotlib_config()
@@ -27,6 +33,42 @@ base_dir = data_gen.util.updir(test_dir, 2)
 data_dir = os.path.join(base_dir, "data")
 products_dir = os.path.join(base_dir, "products")
 
+# Set in the parent process immediately before worker processes are forked
+_worker_test = None
+
+
+def _run_worker_test(arg):
+    return _worker_test(arg)
+
+
+def channelize_kwargs(channelize_backend: str,
+                      analysis_function: str = None) -> dict:
+    """
+    Arguments for :func:`data_gen.channelize` that select the configured
+    ``analysis_function``. Only the Python backend's own engines are
+    selected by name; anything else, like ``polyphase_analysis_padded``,
+    which only the Matlab backend implements, uses the backend's default
+    channelizer.
+    """
+    if channelize_backend == "python" and \
+            analysis_function in data_gen.polyphase.analysis_function_params:
+        return {"analysis_function": analysis_function}
+    return {}
+
+
+def parse_shard(shard_str: str) -> typing.Tuple[int, int]:
+    """
+    Parse a shard specification like "2/4", the second of four shards.
+    """
+    try:
+        shard, n_shards = [int(v) for v in shard_str.split("/")]
+    except ValueError:
+        raise ValueError(f"parse_shard: can't parse shard {shard_str!r}")
+    if not 1 <= shard <= n_shards:
+        raise ValueError(
+            f"parse_shard: shard {shard} is not between 1 and {n_shards}")
+    return shard, n_shards
+
 
 class TestPurity:
 
@@ -63,7 +105,16 @@ class TestPurity:
                  dm: float,
                  period: float,
                  extra_dspsr_args: str = "",
-                 save_output: bool = False):
+                 save_output: bool = False,
+                 jobs: int = 1,
+                 cache: data_gen.ProductCache = None,
+                 matlab_worker: data_gen.MatlabWorker = None,
+                 analysis_function: str = None,
+                 report_file_path: str = None,
+                 resume: bool = False,
+                 restart: bool = False,
+                 shard: typing.Tuple[int, int] = None,
+                 workers: int = None):
 
         make_plots = False
         if n_test == 1:
@@ -75,7 +126,10 @@ class TestPurity:
         self.deripple = deripple
         self.fft_window = fft_window
         self.save_output = save_output
+        self.jobs = jobs
+        self.shard = shard
 
+        os_factor_str = os_factor
         os_factor = pfb.rational.Rational.from_str(os_factor)
         # normalize = os_factor.normalize(input_fft_length * channels)
         normalize = input_fft_length * channels
@@ -107,10 +161,15 @@ class TestPurity:
         self.total_sample_shift = total_sample_shift
         self.generator = data_gen.generate_test_vector(
             backend=backend["test_vectors"],
-            n_bins=self.n_samples
+            n_bins=self.n_samples,
+            cache=cache,
+            matlab_worker=matlab_worker
         )
         self.channelizer = data_gen.channelize(
-            backend=backend["channelize"])
+            backend=backend["channelize"],
+            cache=cache,
+            matlab_worker=matlab_worker,
+            **channelize_kwargs(backend["channelize"], analysis_function))
         self.pipeline = data_gen.pipeline(
             self.generator,
             self.channelizer,
@@ -124,8 +183,9 @@ class TestPurity:
                 data_gen.synthesize,
                 deripple=deripple,
                 backend=backend["synthesize"],
-                fft_window_str=fft_window)
-            self.synthesizer = lambda a: [synthesizer(a)]
+                fft_window_str=fft_window,
+                matlab_worker=matlab_worker)
+            self.synthesizer = lambda a, **kwargs: [synthesizer(a, **kwargs)]
         else:
             self.synthesizer = functools.partial(
                 data_gen.run_dspsr_with_dump,
@@ -151,16 +211,135 @@ class TestPurity:
         comp.operators["this"] = lambda a: a
         comp.operators["diff"] = lambda a, b: a - b
 
-        comp.products["mean"] = lambda a: np.mean(np.abs(a))
-        comp.products["sum"] = lambda a: np.sum(np.abs(a))
-        comp.products["max"] = lambda a: np.amax(np.abs(a))
-
-        comp.products["total_spurious"] = test_util.total_spurious
-        comp.products["mean_spurious"] = test_util.mean_spurious
-        comp.products["max_spurious"] = test_util.max_spurious
+        # a single fused product, so that the magnitude and power of each
+        # operator result are only computed once
+        comp.products["metrics"] = test_util.purity_metrics
+        # reused for every test vector processed by this process
+        self._scratch = None
 
         self.comp = comp
-        self.report = {}
+        # Without plots, the frequency domain comparison only needs the
+        # spectra, so it is done with one batched FFT rather than comp.freq
+        self.fft_backend = data_gen.FFTBackend(workers=workers)
+
+        # everything that affects the results, so that a resumed report
+        # is never mixed with results from some other configuration
+        self.params = {
+            "n_test": n_test,
+            "dspsr_bin": dspsr_bin,
+            "os_factor": str(os_factor_str),
+            "input_fft_length": input_fft_length,
+            "input_overlap": input_overlap,
+            "fft_window": fft_window,
+            "deripple": deripple,
+            "channels": channels,
+            "fir_filter_taps": fir_filter_taps,
+            "fir_filter_coeff_file_path": fir_filter_coeff_file_path,
+            "fir_filter_coeff_hash": file_hash(
+                os.path.join(config_dir, fir_filter_coeff_file_path)),
+            "blocks": blocks,
+            "backend": backend,
+            "dump_stage": dump_stage,
+            "extra_dspsr_args": extra_dspsr_args,
+            "analysis_function": analysis_function
+        }
+        if report_file_path is None:
+            report_file_path = os.path.join(
+                products_dir, f"report.purity.{self.param_str()}.jsonl")
+        self.report = JSONLinesReport(
+            report_file_path, resume=resume, params=self.params,
+            restart=restart)
+
+    def _test_single(self, arg, *,
+                     test_vector_func: callable,
+                     test_method_name: str,
+                     report_func: callable,
+                     output_dir: str):
+
+        dump_files = test_vector_func(arg, output_dir=output_dir)
+        inverted_dump = self.synthesizer(
+            dump_files[1].file_path, output_dir=output_dir)
+        inverted_dump = inverted_dump[0]
+
+        input_dat, inverted_dat, inverted_scale = self.chop(
+            dump_files[0], inverted_dump)
+        inverted_dat = self._scaled(inverted_dat, inverted_scale)
+
+        # Plots show the operator results themselves, so they need the
+        # comparator, and the scaled inputs.
+        if self.make_plots:
+            res_op_time, res_prod_time = self.comp.time(
+                input_dat, inverted_dat
+            )
+            res_op_freq, res_prod_freq = self.comp.freq(
+                input_dat/self.fft_size, inverted_dat/self.fft_size
+            )
+        else:
+            res_prod_time = self.time_products(input_dat, inverted_dat)
+            res_prod_freq = self.freq_products(input_dat, inverted_dat)
+
+        if self.make_plots:
+            fig, axes = test_util.plot_freq_domain_comparison(
+                res_op_time, res_op_freq,
+                subplots_kwargs=dict(figsize=(10, 14)),
+                labels=["Input data", "InverseFilterbank"])
+            fig.suptitle(f"{test_method_name} {arg}")
+            fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+            fig.savefig(os.path.join(
+                products_dir, f"{test_method_name}.{arg}.png"))
+
+        sub_report = report_func(res_prod_time, res_prod_freq)
+        sub_report["arg"] = arg
+
+        return sub_report, list(dump_files) + [inverted_dump]
+
+    def time_products(self, a: np.ndarray, b: np.ndarray) -> dict:
+        """
+        The ``"this"`` and ``"diff"`` products of ``self.comp.time``,
+        without keeping the comparator's operator results: the difference
+        statistics come from a single pass over ``b - a``.
+        """
+        return {
+            "this": [{"metrics": test_util.purity_metrics(arr)}
+                     for arr in (a, b)],
+            "diff": {(1, 0): {"metrics": test_util.diff_metrics(b, a)}}
+        }
+
+    def freq_products(self, *arrays: np.ndarray) -> dict:
+        """
+        The ``"this"`` products of ``self.comp.freq``, from a single
+        batched FFT of ``arrays``. Every frequency domain result scales
+        with the inputs, so rather than dividing the inputs by
+        ``fft_size``, the metrics are scaled.
+        """
+        spectra = self.fft_backend.spectra(
+            *arrays, domain=[0, self.fft_size])
+        metrics = test_util.purity_metrics(
+            spectra, scale=1.0 / self.fft_size)
+        return {"this": [
+            {"metrics": {name: value[i] for name, value in metrics.items()}}
+            for i in range(len(arrays))]}
+
+    def _test_isolated(self, arg, *, test_method_name: str, **kwargs):
+        """
+        Run a single test vector in its own output directory, which is also
+        the working directory, so that concurrent test vectors do not
+        overwrite each other's products.
+        """
+        output_dir = os.path.join(
+            self.output_dir, f"{test_method_name}.{arg}")
+        os.makedirs(output_dir, exist_ok=True)
+        cwd = os.getcwd()
+        os.chdir(output_dir)
+        try:
+            sub_report, _ = self._test_single(
+                arg, test_method_name=test_method_name,
+                output_dir=output_dir, **kwargs)
+        finally:
+            os.chdir(cwd)
+            if not self.save_output:
+                shutil.rmtree(output_dir, ignore_errors=True)
+        return sub_report
 
     def _test(self, *,
               test_vector_func: callable,
@@ -168,43 +347,54 @@ class TestPurity:
               test_method_name: str,
               report_func: callable):
 
+        test_kwargs = dict(
+            test_vector_func=test_vector_func,
+            test_method_name=test_method_name,
+            report_func=report_func)
+
+        if self.shard is not None:
+            # interleave, so that each shard gets a similar mix of args
+            shard, n_shards = self.shard
+            test_vector_args = test_vector_args[shard - 1::n_shards]
+
+        n_args = len(test_vector_args)
+        test_vector_args = [
+            arg for arg in test_vector_args
+            if not self.report.is_done(test_method_name, arg)]
+        if len(test_vector_args) < n_args:
+            module_logger.info(
+                (f"{test_method_name}: skipping "
+                 f"{n_args - len(test_vector_args)} test vectors already in "
+                 f"{self.report.file_path}"))
+
+        if self.jobs > 1:
+            global _worker_test
+            _worker_test = functools.partial(
+                self._test_isolated, **test_kwargs)
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.jobs,
+                mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                futures = [executor.submit(_run_worker_test, arg)
+                           for arg in test_vector_args]
+                for future in tqdm(
+                    concurrent.futures.as_completed(futures),
+                    total=len(futures),
+                    desc=test_method_name
+                ):
+                    self.report.append(test_method_name, future.result())
+            _worker_test = None
+            return
+
         self.files = []
-        method_report = []
         for arg in tqdm(test_vector_args, desc=test_method_name):
-            dump_files = test_vector_func(arg)
-            inverted_dump = self.synthesizer(
-                dump_files[1].file_path)
-            inverted_dump = inverted_dump[0]
+            sub_report, files = self._test_single(
+                arg, output_dir=self.output_dir, **test_kwargs)
+            self.report.append(test_method_name, sub_report)
 
-            input_dat, inverted_dat = self.chop(
-                dump_files[0], inverted_dump)
-            res_op_time, res_prod_time = self.comp.time(
-                input_dat, inverted_dat
-            )
-
-            res_op_freq, res_prod_freq = self.comp.freq(
-                input_dat/self.fft_size, inverted_dat/self.fft_size
-            )
-
-            if self.make_plots:
-                fig, axes = test_util.plot_freq_domain_comparison(
-                    res_op_time, res_op_freq,
-                    subplots_kwargs=dict(figsize=(10, 14)),
-                    labels=["Input data", "InverseFilterbank"])
-                fig.suptitle(f"{test_method_name} {arg}")
-                fig.tight_layout(rect=[0, 0.03, 1, 0.95])
-                fig.savefig(os.path.join(
-                    products_dir, f"{test_method_name}.{arg}.png"))
-
-            sub_report = report_func(res_prod_time, res_prod_freq)
-            sub_report["arg"] = arg
-            method_report.append(sub_report)
-
-            self.files.extend(dump_files)
-            self.files.append(inverted_dump)
+            self.files.extend(files)
             if not self.save_output:
                 self.dispose()
-            self.report[test_method_name] = method_report
 
     def temporal_purity(self):
         module_logger.debug("temporal_purity")
@@ -215,8 +405,8 @@ class TestPurity:
         time_domain_test_method_name = "test_time_domain_impulse"
 
         def time_domain_report_func(res_prod_time, res_prod_freq):
-            prod_diff = res_prod_time["diff"][1, 0]
-            prod_this = res_prod_time["this"][1]
+            prod_diff = res_prod_time["diff"][1, 0]["metrics"]
+            prod_this = res_prod_time["this"][1]["metrics"]
 
             return {
                 "mean_diff": prod_diff["mean"],
@@ -244,8 +434,8 @@ class TestPurity:
         freq_domain_test_method_name = "test_complex_sinusoid"
 
         def freq_domain_report_func(res_prod_time, res_prod_freq):
-            prod_diff = res_prod_time["diff"][1, 0]
-            prod_this = res_prod_freq["this"][1]
+            prod_diff = res_prod_time["diff"][1, 0]["metrics"]
+            prod_this = res_prod_freq["this"][1]["metrics"]
 
             return {
                 "mean_diff": prod_diff["mean"],
@@ -274,15 +464,39 @@ class TestPurity:
             os.remove(file_path)
 
     def chop(self, input_dump_file, inverted_dump_file):
-        input_dat = (input_dump_file.data[self.total_sample_shift:, 0, :]
-                     .flatten())
-        inverted_dat = inverted_dump_file.data.flatten()
+        """
+        Align the input and inverted time series. Both are returned as
+        views of the DADA files' data wherever their layout allows, along
+        with the factor by which the inverted data have to be scaled.
+
+        Returns:
+            tuple: ``(input_dat, inverted_dat, inverted_scale)``
+        """
+        input_data = dada.data_view(input_dump_file)
+        inverted_data = dada.data_view(inverted_dump_file)
+        input_dat = input_data[self.total_sample_shift:, 0, :].ravel()
+        inverted_dat = inverted_data.ravel()
+        inverted_scale = 1.0
         if self.dspsr_bin is not None:
-            inverted_dat /= self.normalize
-
-        return input_dat, inverted_dat
-
-    def finish(self):
+            inverted_scale = 1.0 / self.normalize
+
+        return input_dat, inverted_dat, inverted_scale
+
+    def _scaled(self, a: np.ndarray, scale: float) -> np.ndarray:
+        """
+        Scale ``a`` into a scratch buffer that is reused from one test
+        vector to the next, rather than in place, which would modify the
+        data product, or into a new array.
+        """
+        if scale == 1.0:
+            return a
+        dtype = np.result_type(a.dtype, np.float32)
+        if self._scratch is None or self._scratch.dtype != dtype or \
+                self._scratch.shape[0] < a.shape[0]:
+            self._scratch = np.empty(a.shape[0], dtype=dtype)
+        return np.multiply(a, scale, out=self._scratch[:a.shape[0]])
+
+    def param_str(self) -> str:
         param_str = ".".join([
             f"fft_length-{self.input_fft_length}",
             f"deripple-{1 if self.deripple else 0}",
@@ -294,18 +508,68 @@ class TestPurity:
                 arg.strip("-") for arg in self.extra_dspsr_args.split()
             ])
             param_str += f".{extra_args_str}"
+        if self.shard is not None:
+            param_str += f".shard-{self.shard[0]}-of-{self.shard[1]}"
+        return param_str
 
+    def finish(self):
+        """
+        Build the final JSON report from the JSON lines report.
+        """
         param_path = os.path.join(
-            products_dir, f"report.purity.{param_str}.json")
-        with open(param_path, "w") as f:
-            json.dump(self.report, f, cls=comparator.NumpyEncoder)
+            products_dir, f"report.purity.{self.param_str()}.json")
+        self.report.write_json(param_path)
 
 
 if __name__ == "__main__":
 
-    parsed = create_parser(
-        description="DSPSR PFB inversion purity"
-    ).parse_args()
+    parser = create_parser(
+        description="DSPSR PFB inversion purity")
+
+    parser.add_argument("-j", "--jobs",
+                        dest="jobs", action="store",
+                        default=1, type=int,
+                        help=("Specify the number of test vectors "
+                              "to process concurrently"))
+
+    parser.add_argument("--workers",
+                        dest="workers", action="store",
+                        default=None, type=int,
+                        help=("Specify the number of threads used by each "
+                              "frequency domain comparison's FFT"))
+
+    parser.add_argument("--resume",
+                        dest="resume", action="store_true",
+                        help=("Skip test vectors already in the JSON lines "
+                              "report, rather than starting a new one"))
+
+    parser.add_argument("--restart",
+                        dest="restart", action="store_true",
+                        help=("Overwrite an existing JSON lines report, "
+                              "rather than refusing to start"))
+
+    parser.add_argument("--report-file",
+                        dest="report_file_path", action="store",
+                        default=None, type=str,
+                        help=("Specify the JSON lines report file. Defaults "
+                              "to products/report.purity.<params>.jsonl. "
+                              "With --merge, the merged JSON report file"))
+
+    parser.add_argument("--shard",
+                        dest="shard", action="store",
+                        default=None, type=parse_shard,
+                        help=("Only run shard i of N, given as \"i/N\", of "
+                              "the test vectors, so that a sweep can be "
+                              "split across machines"))
+
+    parser.add_argument("--merge",
+                        dest="merge_file_paths", action="store",
+                        nargs="+", default=None, type=str,
+                        help=("Merge these JSON lines reports, eg those of "
+                              "each shard, into the final JSON report, "
+                              "rather than running any test vectors"))
+
+    parsed = parser.parse_args()
 
     level = logging.INFO
     if parsed.verbose:
@@ -320,6 +584,24 @@ if __name__ == "__main__":
 
     config = load_config(parsed.sub_config_name)
 
+    if parsed.merge_file_paths is not None:
+        merged_file_path = parsed.report_file_path
+        if merged_file_path is None:
+            merged_file_path = os.path.join(
+                products_dir, "report.purity.merged.json")
+        merge_reports(parsed.merge_file_paths, merged_file_path)
+        module_logger.info(f"Merged reports into {merged_file_path}")
+        raise SystemExit(0)
+
+    cache = None
+    if parsed.cache_dir is not None:
+        cache = data_gen.ProductCache(
+            parsed.cache_dir, max_bytes=int(parsed.cache_size*2**30))
+
+    matlab_worker = None
+    if parsed.matlab_worker:
+        matlab_worker = data_gen.MatlabWorker()
+
     purity_test = TestPurity(
         dspsr_bin=config["dspsr_bin"],
         os_factor=config["os_factor"],
@@ -337,7 +619,16 @@ if __name__ == "__main__":
         period=config["period"],
         n_test=parsed.n_test,
         extra_dspsr_args=parsed.extra_args,
-        save_output=parsed.save_output
+        save_output=parsed.save_output,
+        jobs=parsed.jobs,
+        cache=cache,
+        matlab_worker=matlab_worker,
+        analysis_function=config.get("analysis_function"),
+        report_file_path=parsed.report_file_path,
+        resume=parsed.resume,
+        restart=parsed.restart,
+        shard=parsed.shard,
+        workers=parsed.workers
     )
 
     if parsed.do_time:
@@ -345,3 +636,6 @@ if __name__ == "__main__":
     if parsed.do_freq:
         purity_test.spectral_purity()
     purity_test.finish()
+
+    if matlab_worker is not None:
+        matlab_worker.stop()
@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import typing
+
+import comparator
+
+__all__ = [
+    "JSONLinesReport",
+    "merge_reports"
+]
+
+module_logger = logging.getLogger(__name__)
+
+
+class JSONLinesReport:
+    """
+    Report sink that appends one JSON line per test vector result as soon
+    as it is computed, so that a crash part way through a sweep loses at
+    most the test vector in progress, and the report never has to be held
+    in memory.
+
+    Each line is a sub report with two extra fields: ``method``, the name
+    of the test method, and ``arg``, the test vector argument. The lines
+    double as a checkpoint: a rerun with ``resume=True`` skips the
+    arguments already in the file. If ``params`` are provided, they are
+    written to the first line, and a resumed report must have been
+    started with the same ``params``, so that results from different
+    configurations are never mixed. An existing report is only
+    overwritten with ``restart=True``, so that a rerun that forgets to
+    resume does not throw the checkpoint away.
+
+    Usage:
+
+    .. code-block:: python
+
+        report = JSONLinesReport("report.purity.jsonl", resume=True)
+        for arg in args:
+            if report.is_done("test_complex_sinusoid", arg):
+                continue
+            report.append("test_complex_sinusoid", {"arg": arg, ...})
+        report.write_json("report.purity.json")
+
+    Args:
+        file_path (str): Path to the ``.jsonl`` file
+        resume (bool): Keep the results already in ``file_path``, rather
+            than starting a new report.
+        params (dict): Parameters of the sweep producing the report
+        restart (bool): Start a new report even if ``file_path`` already
+            holds results.
+    """
+
+    params_method = "__params__"
+
+    def __init__(self,
+                 file_path: str,
+                 resume: bool = False,
+                 params: dict = None,
+                 restart: bool = False):
+        self.file_path = file_path
+        self._done = {}
+        if params is not None:
+            # normalize, so that params compare equal to those read back
+            params = json.loads(
+                json.dumps(params, cls=comparator.NumpyEncoder))
+        self.params = params
+        if resume and os.path.exists(file_path):
+            self._truncate_partial_line()
+            file_params = self.read_params()
+            if params is not None and file_params != params:
+                raise RuntimeError(
+                    (f"JSONLinesReport: {file_path} was started with "
+                     f"different parameters, {file_params}, than {params}"))
+            for record in self.records():
+                self._done.setdefault(record["method"], set()).add(
+                    self._arg_key(record["arg"]))
+            module_logger.info(
+                (f"JSONLinesReport: resuming {file_path} with "
+                 f"{sum(len(v) for v in self._done.values())} results"))
+        else:
+            if not restart and os.path.exists(file_path) and \
+                    os.path.getsize(file_path) > 0:
+                raise RuntimeError(
+                    (f"JSONLinesReport: {file_path} already exists; "
+                     f"resume it, or restart to overwrite it"))
+            with open(file_path, "w") as f:
+                if params is not None:
+                    f.write(json.dumps({
+                        "method": self.params_method,
+                        "params": params}) + "\n")
+
+    def append(self, method_name: str, sub_report: dict) -> None:
+        """
+        Append a single test vector's result, and flush it to disk.
+        """
+        record = dict(sub_report, method=method_name)
+        line = json.dumps(record, cls=comparator.NumpyEncoder)
+        with open(self.file_path, "a") as f:
+            f.write(line + "\n")
+        self._done.setdefault(method_name, set()).add(
+            self._arg_key(record["arg"]))
+
+    def is_done(self, method_name: str, arg) -> bool:
+        return self._arg_key(arg) in self._done.get(method_name, set())
+
+    def records(self) -> typing.Iterator[dict]:
+        """
+        Iterate over the results in the file, in the order they were
+        appended.
+        """
+        for record in self._read_lines():
+            if record["method"] != self.params_method:
+                yield record
+
+    def read_params(self) -> typing.Optional[dict]:
+        """
+        The parameters written to the file when the report was started.
+        """
+        for record in self._read_lines():
+            if record["method"] == self.params_method:
+                return record["params"]
+            return None
+        return None
+
+    def _read_lines(self) -> typing.Iterator[dict]:
+        with open(self.file_path, "r") as f:
+            for line in f:
+                if line.strip() != "":
+                    yield json.loads(line)
+
+    def aggregate(self) -> dict:
+        """
+        Build the same report that :class:`TestPurity` used to keep in
+        memory: a list of sub reports, sorted by argument, for each test
+        method.
+        """
+        return _aggregate(self.records())
+
+    def write_json(self, file_path: str) -> dict:
+        """
+        Write the aggregated report as a single JSON file.
+        """
+        report = self.aggregate()
+        with open(file_path, "w") as f:
+            json.dump(report, f, cls=comparator.NumpyEncoder)
+        return report
+
+    def _truncate_partial_line(self) -> None:
+        """
+        Remove anything after the last complete line, left by a crash in
+        the middle of a write.
+        """
+        with open(self.file_path, "rb+") as f:
+            contents = f.read()
+            end = contents.rfind(b"\n") + 1
+            if end != len(contents):
+                module_logger.warning(
+                    (f"JSONLinesReport: discarding partial line at the end "
+                     f"of {self.file_path}"))
+                f.truncate(end)
+
+    @staticmethod
+    def _arg_key(arg) -> str:
+        return json.dumps(arg, cls=comparator.NumpyEncoder, sort_keys=True)
+
+
+def _aggregate(records: typing.Iterable[dict]) -> dict:
+    report = {}
+    for record in records:
+        record = dict(record)
+        method_name = record.pop("method")
+        report.setdefault(method_name, []).append(record)
+    for method_name, method_report in report.items():
+        try:
+            method_report.sort(key=lambda record: record["arg"])
+        except TypeError:
+            pass
+    return report
+
+
+def merge_reports(file_paths: typing.List[str],
+                  json_file_path: str = None) -> dict:
+    """
+    Merge the JSON lines reports of the shards of a sweep into a single
+    report, optionally written to ``json_file_path``. All the reports must
+    have been started with the same parameters.
+    """
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"merge_reports: no report {file_path}")
+    reports = [JSONLinesReport(file_path, resume=True)
+               for file_path in file_paths]
+    params = [report.read_params() for report in reports]
+    if any(p != params[0] for p in params[1:]):
+        raise RuntimeError(
+            (f"merge_reports: {file_paths} were produced with different "
+             f"parameters"))
+
+    records = {}
+    for report in reports:
+        for record in report.records():
+            key = (record["method"], JSONLinesReport._arg_key(record["arg"]))
+            records[key] = record
+    merged = _aggregate(records.values())
+
+    if json_file_path is not None:
+        with open(json_file_path, "w") as f:
+            json.dump(merged, f, cls=comparator.NumpyEncoder)
+    return merged
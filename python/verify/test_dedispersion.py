@@ -154,14 +154,12 @@ class TestDedispersion(unittest.TestCase):
             #     functools.partial(data_gen.run_psrtxt, output_dir=test_dir),
             #     data_gen.load_psrtxt_data
             # )
-            txt_chain = data_gen.BaseRunner.chain(
-                functools.partial(
-                    data_gen.run_psrtxt, output_dir=test_dir),
-                data_gen.load_psrtxt_data
-            )
+            # parse psrtxt's output directly, without a .txt file
+            run_psrtxt = functools.partial(
+                data_gen.run_psrtxt, output_dir=test_dir, pipe=True)
             # data_diff = diff_chain(sim_ar, inv_ar)[-1][2:, :]
-            data_sim = txt_chain(sim_ar)[-1][2:, :]
-            data_inv = txt_chain(inv_ar)[-1][2:, :]
+            data_sim = run_psrtxt(sim_ar)[0][2:, :]
+            data_inv = run_psrtxt(inv_ar)[0][2:, :]
             fig, axes = plt.subplots(2, 2, figsize=(10, 10))
             # x = data_diff[0, :]
             x = np.arange(data_sim.shape[1])
@@ -66,7 +66,9 @@ class TestMatlabDspsrPfbInversion:
         dm: float,
         period: float,
         extra_dspsr_args: str = "",
-        save_output: bool = False
+        save_output: bool = False,
+        cache: data_gen.ProductCache = None,
+        matlab_worker: data_gen.MatlabWorker = None
     ):
 
         make_plots = False
@@ -113,14 +115,19 @@ class TestMatlabDspsrPfbInversion:
         self.generator = functools.partial(
             data_gen.generate_test_vector,
             n_bins=self.n_samples,
-            backend=backend["test_vectors"])
+            backend=backend["test_vectors"],
+            cache=cache,
+            matlab_worker=matlab_worker)
         self.channelizer = data_gen.channelize(
-            backend=backend["channelize"])
+            backend=backend["channelize"],
+            cache=cache,
+            matlab_worker=matlab_worker)
         self.synthesizer = functools.partial(
             data_gen.synthesize,
             deripple=deripple,
             backend=backend["synthesize"],
-            fft_window_str=fft_window)
+            fft_window_str=fft_window,
+            matlab_worker=matlab_worker)
         self.pipeline = data_gen.pipeline(
             self.generator,
             self.channelizer,
@@ -322,6 +329,15 @@ if __name__ == "__main__":
 
     config = load_config(parsed.sub_config_name)
 
+    cache = None
+    if parsed.cache_dir is not None:
+        cache = data_gen.ProductCache(
+            parsed.cache_dir, max_bytes=int(parsed.cache_size*2**30))
+
+    matlab_worker = None
+    if parsed.matlab_worker:
+        matlab_worker = data_gen.MatlabWorker()
+
     test = TestMatlabDspsrPfbInversion(
         dspsr_bin=config["dspsr_bin"],
         os_factor=config["os_factor"],
@@ -339,7 +355,9 @@ if __name__ == "__main__":
         period=config["period"],
         n_test=parsed.n_test,
         extra_dspsr_args=parsed.extra_args,
-        save_output=parsed.save_output
+        save_output=parsed.save_output,
+        cache=cache,
+        matlab_worker=matlab_worker
     )
 
     if parsed.do_time:
@@ -350,3 +368,6 @@ if __name__ == "__main__":
         test.test_simulated_pulsar()
 
     test.finish()
+
+    if matlab_worker is not None:
+        matlab_worker.stop()
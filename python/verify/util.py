@@ -6,6 +6,8 @@ __all__ = [
     "total_spurious",
     "mean_spurious",
     "max_spurious",
+    "purity_metrics",
+    "diff_metrics",
     "dB",
     "plot_time_domain_comparison",
     "plot_freq_domain_comparison"
@@ -36,6 +38,56 @@ def max_spurious(a):
     return val
 
 
+def purity_metrics(a, axis: int = -1, scale: float = 1.0) -> dict:
+    """
+    Fused version of the ``mean``, ``sum`` and ``max`` of ``np.abs(a)``,
+    and of :func:`total_spurious`, :func:`mean_spurious` and
+    :func:`max_spurious`. The magnitude and power are computed once, and
+    the peak is zeroed in place in the power array, rather than in a copy
+    per metric.
+
+    ``a`` can be a single result, or a 2-D batch with one result per row,
+    in which case each metric is an array with one value per row.
+
+    The metrics are those of ``scale*a``, without ``scale*a`` ever being
+    computed: the scale is applied to the reduced values instead.
+
+    Returns:
+        dict: with keys "mean", "sum", "max", "total_spurious",
+            "mean_spurious" and "max_spurious"
+    """
+    a = np.asarray(a)
+    magnitude = np.abs(a)
+    power = np.square(magnitude)
+    peak_idx = np.expand_dims(np.argmax(power, axis=axis), axis)
+    np.put_along_axis(power, peak_idx, 0.0, axis=axis)
+    scale = np.abs(scale)
+    power_scale = scale**2
+    total_spurious_power = np.sum(power, axis=axis) * power_scale
+    return {
+        "mean": np.mean(magnitude, axis=axis) * scale,
+        "sum": np.sum(magnitude, axis=axis) * scale,
+        "max": np.amax(magnitude, axis=axis) * scale,
+        "total_spurious": dB(total_spurious_power),
+        "mean_spurious": dB(total_spurious_power / a.shape[axis]),
+        "max_spurious": dB(np.amax(power, axis=axis) * power_scale)
+    }
+
+
+def diff_metrics(a, b, axis: int = -1) -> dict:
+    """
+    Mean, total and maximum of ``np.abs(a - b)``, computed from a single
+    difference array. Like :func:`purity_metrics`, ``a`` and ``b`` can be
+    2-D batches with one result per row.
+    """
+    diff = np.abs(np.subtract(a, b))
+    return {
+        "mean": np.mean(diff, axis=axis),
+        "sum": np.sum(diff, axis=axis),
+        "max": np.amax(diff, axis=axis)
+    }
+
+
 def dB(a):
     """
     Assumes a is already in "power" space
@@ -1,8 +1,10 @@
 # Verify that dspsr's InverseFilterbankEngineCPU works for a variety of
 # inputs.
 import unittest
+import argparse
 import logging
 import os
+import sys
 
 import data_gen
 
@@ -11,6 +13,8 @@ base_dir = data_gen.util.updir(test_dir, 2)
 data_dir = os.path.join(base_dir, "data")
 products_dir = os.path.join(base_dir, "products")
 
+module_logger = logging.getLogger(__name__)
+
 
 class VerifyDSPSRPFBInversion(unittest.TestCase):
 
@@ -49,9 +53,11 @@ class VerifyDSPSRPFBInversion(unittest.TestCase):
         )
 
     @classmethod
-    def build_test_cases(cls, skips=None):
-        if skips is None:
-            skips = []
+    def case_matrix(cls):
+        """
+        Names of each of the dspsr inversion test cases, and the arguments
+        used to fill ``inversion_extra_args``.
+        """
         test_method_names = [
             "test_single_channel_after_dedispersion_deripple_tukey",
             "test_multi_channel_after_dedispersion_deripple_tukey",
@@ -82,17 +88,61 @@ class VerifyDSPSRPFBInversion(unittest.TestCase):
             ("16", "D", "", "no_window")
         ]
 
+        return test_method_names, test_method_args
+
+    @classmethod
+    def run_matrix(cls, skips=None, max_workers=None):
+        """
+        Run every test case in the matrix at once, with up to max_workers
+        concurrent dspsr processes.
+        """
+        if skips is None:
+            skips = []
+        cases = [(name, args) for name, args in zip(*cls.case_matrix())
+                 if name not in skips]
+        return data_gen.run_dspsr.map(
+            [cls.channelized_file_path.file_path]*len(cases),
+            output_file_name=[name for name, args in cases],
+            extra_args=[cls.inversion_extra_args.format(*args)
+                        for name, args in cases],
+            output_dir=products_dir,
+            max_workers=max_workers,
+            **cls.dspsr_kwargs
+        )
+
+    @classmethod
+    def build_test_cases(cls, skips=None, max_workers=None):
+        """
+        Add a test method for each case in the matrix. If max_workers is
+        given, the whole matrix is run up front with :meth:`run_matrix`,
+        and each test method checks its own result.
+        """
+        if skips is None:
+            skips = []
+        test_method_names, test_method_args = cls.case_matrix()
+
+        results = {}
+        if max_workers is not None:
+            names = [name for name in test_method_names if name not in skips]
+            results = dict(zip(names, cls.run_matrix(
+                skips=skips, max_workers=max_workers)))
+
         def test_method_factory(method_name, args):
             def test_method(self):
-                extra_args = self.inversion_extra_args.format(*args)
-                print(extra_args)
-                data_gen.run_dspsr(
-                    self.channelized_file_path.file_path,
-                    extra_args=extra_args,
-                    output_dir=products_dir,
-                    output_file_name=method_name,
-                    **self.dspsr_kwargs
-                )
+                if method_name in results:
+                    ar, log = results[method_name]
+                else:
+                    extra_args = self.inversion_extra_args.format(*args)
+                    module_logger.debug(
+                        f"{method_name}: extra_args={extra_args}")
+                    ar, log = data_gen.run_dspsr(
+                        self.channelized_file_path.file_path,
+                        extra_args=extra_args,
+                        output_dir=products_dir,
+                        output_file_name=method_name,
+                        **self.dspsr_kwargs
+                    )
+                self.assertTrue(os.path.exists(ar), f"dspsr failed, see {log}")
             test_method.__name__ = method_name
             return test_method
 
@@ -111,9 +161,18 @@ class VerifyDSPSRPFBInversion(unittest.TestCase):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="verify dspsr's inverse filterbank")
+    parser.add_argument("-j", "--jobs", dest="jobs", type=int, default=1,
+                        help=("Run the whole test matrix with this many "
+                              "concurrent dspsr processes"))
+    parsed, unittest_args = parser.parse_known_args()
     VerifyDSPSRPFBInversion.init()
-    VerifyDSPSRPFBInversion.build_test_cases(skips=[
+    skips = [
 
-    ])
+    ]
     logging.basicConfig(level=logging.ERROR)
-    unittest.main()
+    VerifyDSPSRPFBInversion.build_test_cases(
+        skips=skips,
+        max_workers=parsed.jobs if parsed.jobs > 1 else None)
+    unittest.main(argv=sys.argv[:1] + unittest_args)